@@ -1,20 +1,45 @@
 import streamlit as st
 import pandas as pd
 
+from dateconverts.cube import SummaryCube, build_cube, split_measures
+from dateconverts.export import default_exports, new_version
+from dateconverts.ingest import is_csv, load_upload, upload_key
+from dateconverts.scheduler import workers_for
+from dateconverts.splitter import (
+    DEFAULT_CHUNKSIZE, SLOT_WIDTHS, default_streams, split_datetime_columns, stream_split_csv
+)
+from dateconverts.ui import cube_panel, numeric_format_select, parse_report_panel
+from dateconverts.ui_common import data_upload, profiler_panel, session_profiler
+
 st.set_page_config(page_title="Date-Time Splitter", page_icon="⏰", layout="centered")
 st.title("⏰ Convert Date-Time Columns")
 st.write("Upload a CSV/XLSX and choose columns to split into Date, Time, and Hour Slot.")
 
-uploaded_file = st.file_uploader("📤 Upload CSV or Excel file", type=["csv", "xlsx"])
+# Optional per-stage timings (sidebar)
+profiler = session_profiler()
+
+uploaded_file = data_upload()
 if not uploaded_file:
     st.info("👆 Upload a CSV or Excel file to begin.")
     st.stop()
 
-# Read file
-if uploaded_file.name.endswith(".csv"):
-    df = pd.read_csv(uploaded_file)
+# Streaming mode: the CSV is converted chunk by chunk into a temp file,
+# so memory stays bounded by the chunk size instead of the file size
+streaming = is_csv(uploaded_file) and st.checkbox(
+    "🚰 Streaming mode for very large CSVs (convert in chunks, constant memory)", value=False
+)
+
+if streaming:
+    chunksize = st.number_input("Rows per chunk", min_value=10_000, max_value=1_000_000,
+                                value=DEFAULT_CHUNKSIZE, step=10_000)
+    # Only the first rows are read for the preview and column list
+    uploaded_file.seek(0)
+    df = pd.read_csv(uploaded_file, nrows=10)
 else:
-    df = pd.read_excel(uploaded_file)
+    # Read file (parsed once per upload, later reruns hit the cache)
+    with profiler.stage("read_upload") as stage:
+        df = load_upload(uploaded_file)
+        stage.rows = len(df)
 
 st.subheader("Preview (first 10 rows)")
 st.dataframe(df.head(10))
@@ -25,36 +50,106 @@ selected_cols = st.multiselect(
     options=list(df.columns)
 )
 
+# Option: width of the _Hour_Slot intervals
+slot_minutes = st.selectbox("⏱️ Hour slot width (minutes):", SLOT_WIDTHS, index=0)
+
+# Option: how numeric (epoch / Excel serial) columns are read
+numeric_format = numeric_format_select()
+
 # Option: remove original columns after conversion
 remove_original = st.checkbox("Delete original columns after conversion", value=False)
 
+# Option: row counts per date × hour slot (× group), to pivot here instead
+# of downloading every row
+summary_cube = st.checkbox("🧊 Build a summary cube (rows per date × hour slot × group)", value=False)
+cube_group = None
+if summary_cube:
+    cube_group = st.selectbox("Summary group column (optional):",
+                              [None] + [c for c in df.columns if c not in selected_cols])
+
 if selected_cols:
-    for col in selected_cols:
-        # parse to datetime (coerce errors to NaT)
-        new_dt_col = col + "_datetime_parsed"
-        df[new_dt_col] = pd.to_datetime(df[col], errors='coerce')
-
-        # create Date, Time, Hour slot
-        df[col + "_Date"] = df[new_dt_col].dt.date
-        df[col + "_Time"] = df[new_dt_col].dt.strftime("%H:%M")
-        df[col + "_Hour_Slot"] = (
-            df[new_dt_col].dt.hour.astype("Int64").astype(str).str.zfill(2)
-            + ":00 - "
-            + (df[new_dt_col].dt.hour + 1).astype("Int64").astype(str).str.zfill(2)
-            + ":00"
-        )
-
-        # optional: drop the helper parsed column
-        df.drop(columns=[new_dt_col], inplace=True)
-
-        if remove_original:
-            df.drop(columns=[col], inplace=True)
-
-    st.success("✅ Conversion completed")
+    if streaming:
+        params = (upload_key(uploaded_file), tuple(selected_cols), remove_original, chunksize, slot_minutes,
+                  numeric_format, summary_cube, cube_group)
+        result = st.session_state.get("stream_result")
+        # The file may also have been cleaned up after a long idle time
+        if result is None or result["params"] != params or not default_streams.touch(result["path"]):
+            if result is not None:
+                default_streams.discard(result["path"])
+            out_path = default_streams.new_path(".csv")
+            # One small cube per chunk, merged at the end
+            cube_parts = []
+            on_chunk = None
+            if summary_cube:
+                def on_chunk(chunk):
+                    cube_parts.append(build_cube(split_measures(chunk, selected_cols, cube_group)))
+            uploaded_file.seek(0)
+            try:
+                with st.spinner("Converting in chunks..."), profiler.stage("stream_split_csv") as stage:
+                    preview, reports, rows = stream_split_csv(
+                        uploaded_file, selected_cols, out_path, remove_original, chunksize,
+                        slot_minutes=slot_minutes, numeric_format=numeric_format, workers=workers_for(chunksize),
+                        on_chunk=on_chunk
+                    )
+                    stage.rows = rows
+            except BaseException:
+                default_streams.discard(out_path)
+                raise
+            # Counts the finished file against the directory's size budget
+            default_streams.touch(out_path)
+            result = {"params": params, "path": out_path, "preview": preview, "reports": reports, "rows": rows,
+                      "cube": SummaryCube.concat(cube_parts) if cube_parts else None}
+            st.session_state.stream_result = result
+        preview, reports, cube = result["preview"], result["reports"], result["cube"]
+        st.success(f"✅ Conversion completed ({result['rows']:,} rows streamed)")
+    else:
+        # Cached per upload and options: reruns that only change the cube
+        # view or the download don't split the rows again
+        split_params = (upload_key(uploaded_file), tuple(selected_cols), slot_minutes, numeric_format,
+                        remove_original)
+        result = st.session_state.get("split_result")
+        if result is None or result["params"] != split_params:
+            with profiler.stage("split_columns", len(df)):
+                # Columns are parsed and split concurrently on large frames
+                reports = split_datetime_columns(df, selected_cols, remove_original, slot_minutes=slot_minutes,
+                                                 numeric_format=numeric_format, workers=workers_for(len(df)))
+            result = {"params": split_params, "df": df, "reports": reports, "version": new_version()}
+            st.session_state.split_result = result
+        df, reports = result["df"], result["reports"]
+        preview = df.head(20)
+        cube = None
+        if summary_cube:
+            cube_params = split_params + (cube_group,)
+            cached = st.session_state.get("split_summary_cube")
+            if cached is None or cached[0] != cube_params:
+                with profiler.stage("summary_cube", len(df)):
+                    cached = (cube_params, build_cube(split_measures(df, selected_cols, cube_group)))
+                st.session_state.split_summary_cube = cached
+            cube = cached[1]
+        st.success("✅ Conversion completed")
+
+    parse_report_panel(list(reports.values()))
     st.subheader("Converted Data (first 20 rows)")
-    st.dataframe(df.head(20))
+    st.dataframe(preview)
 
-    csv = df.to_csv(index=False).encode("utf-8")
-    st.download_button("📥 Download converted CSV", csv, file_name="converted_datetime_columns.csv", mime="text/csv")
+    if streaming:
+        # Served straight from the converted temp file
+        with open(result["path"], "rb") as f:
+            st.download_button("📥 Download converted CSV", f, file_name="converted_datetime_columns.csv", mime="text/csv")
+    else:
+        # Written only on request and cached per split result
+        if st.button("📦 Prepare Download"):
+            with st.spinner("Writing CSV file..."), profiler.stage("export_csv", len(df)):
+                default_exports.export(df, result["version"], "csv")
+        export_path = default_exports.get(result["version"], "csv")
+        if export_path:
+            with open(export_path, "rb") as f:
+                st.download_button("📥 Download converted CSV", f, file_name="converted_datetime_columns.csv",
+                                   mime="text/csv")
+
+    if cube is not None:
+        cube_panel(cube, key="split")
 else:
     st.info("👉 Please select at least one column to convert.")
+
+profiler_panel(profiler)
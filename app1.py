@@ -1,32 +1,65 @@
+from functools import partial
+
 import streamlit as st
-import pandas as pd
-from io import BytesIO
+
+from dateconverts.export import EXPORT_FORMATS, default_exports, new_version
+from dateconverts.ingest import (
+    is_csv, project_upload, upload_columns, upload_key, upload_preview, upload_sheet_names, with_all_columns
+)
+from dateconverts.percentiles import DEFAULT_PERCENTILES, MAX_PERCENTILE, MIN_PERCENTILE, parse_percentiles
+from dateconverts.pipeline import calculate_hours_job
+from dateconverts.sketches import DEFAULT_ALPHA, resolve_sketch_dir
+from dateconverts.ui import (
+    cancel_session_job, job_progress, numeric_format_select, parse_report_panel, session_frame, session_job,
+    session_memory_panel, set_session_frame, submit_session_job, take_finished_job
+)
+from dateconverts.ui_common import data_upload, profiler_panel, session_profiler
 
 st.set_page_config(page_title="⏱️ Hour & Percentile Calculator", page_icon="📊", layout="wide")
 
 st.title("📊 Hour Difference + Auto Percentile Calculator")
 
+# Optional per-stage timings (sidebar)
+profiler = session_profiler()
+
 # --- Initialize session ---
-if "df" not in st.session_state:
-    st.session_state.df = None
+# The working frame lives in a server-wide store with a memory cap
+# (see dateconverts.sessions), not in st.session_state
+if "df_version" not in st.session_state:
+    # Version stamp of the frame; exports are cached against it
+    st.session_state.df_version = new_version()
 
 # --- File Upload ---
-uploaded_file = st.file_uploader("📤 Upload CSV or Excel file", type=["csv", "xlsx"])
+uploaded_file = data_upload()
 
 if uploaded_file:
-    if uploaded_file.name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file)
-    else:
-        xls = pd.ExcelFile(uploaded_file)
-        sheet_name = st.selectbox("📑 Select a sheet to process:", xls.sheet_names)
-        df = pd.read_excel(xls, sheet_name=sheet_name)
-    st.session_state.df = df
+    sheet_name = None
+    if not is_csv(uploaded_file):
+        sheet_name = st.selectbox("📑 Select a sheet to process:", upload_sheet_names(uploaded_file))
+    # A new file/sheet starts over; otherwise reruns keep the columns
+    # computed so far.  Only the header row is read here, the columns
+    # themselves are loaded once they are chosen (see the calculate button)
+    source_key = upload_key(uploaded_file, sheet_name)
+    if st.session_state.get("source_key") != source_key:
+        with profiler.stage("read_header"):
+            upload_columns(uploaded_file, sheet_name)
+        cancel_session_job()
+        set_session_frame(None)
+        st.session_state.source_key = source_key
+        st.session_state.df_version = new_version()
+
+df = session_frame()
+if uploaded_file:
+    source_columns = upload_columns(uploaded_file, sheet_name)
+else:
+    source_columns = None if df is None else list(df.columns)
 
-if st.session_state.df is not None:
-    df = st.session_state.df
+if source_columns is not None:
+    # Columns computed by earlier runs can be picked as well
+    columns = source_columns if df is None else source_columns + [c for c in df.columns if c not in source_columns]
 
     st.subheader("📋 Uploaded / Processed Data Preview")
-    st.dataframe(df.head())
+    st.dataframe(df.head() if df is not None else upload_preview(uploaded_file, sheet_name))
 
     # =========================================================
     # 🕒 STEP 1: MULTIPLE HOUR DIFFERENCE CALCULATION
@@ -40,56 +73,86 @@ if st.session_state.df is not None:
         st.markdown(f"**🕒 Pair {i+1}**")
         c1, c2 = st.columns(2)
         with c1:
-            start_col = st.selectbox(f"Select Start Time Column (Pair {i+1})", df.columns, key=f"start_{i}")
+            start_col = st.selectbox(f"Select Start Time Column (Pair {i+1})", columns, key=f"start_{i}")
         with c2:
-            end_col = st.selectbox(f"Select End Time Column (Pair {i+1})", df.columns, key=f"end_{i}")
+            end_col = st.selectbox(f"Select End Time Column (Pair {i+1})", columns, key=f"end_{i}")
         pairs.append((start_col, end_col))
 
-    percentile_options = [90, 95]
-    selected_percentiles = st.multiselect("Select Percentiles to Calculate:", percentile_options, default=[90, 95])
-    group_col = st.selectbox("Select Grouping Column (Optional):", [None] + list(df.columns))
-
-    if st.button("⚙️ Calculate Hours + Percentiles"):
-        hr_columns = []
-        for (start_col, end_col) in pairs:
-            try:
-                start_time = pd.to_datetime(df[start_col], errors="coerce")
-                end_time = pd.to_datetime(df[end_col], errors="coerce")
-                diff_hours = (end_time - start_time).dt.total_seconds() / 3600
-
-                # Convert to hr.min (60-min format)
-                def convert_to_60min_format(x):
-                    if pd.isna(x):
-                        return None
-                    hrs = int(x)
-                    mins = round((x - hrs) * 60)
-                    return round(hrs + mins / 100, 2)  # ✅ round to 2 decimals
-
-                hr_col = f"{start_col}_to_{end_col}_Hr"
-                df[hr_col] = diff_hours.apply(convert_to_60min_format)
-                df[hr_col] = df[hr_col].round(2)  # ✅ ensure 2-decimal rounding
-                hr_columns.append(hr_col)
-
-            except Exception as e:
-                st.error(f"⚠️ Error calculating {start_col} → {end_col}: {e}")
+    # Epoch / Excel serial columns are detected from their values unless chosen here
+    numeric_format = numeric_format_select()
+
+    percentile_text = st.text_input(
+        f"Percentiles to Calculate (comma-separated, {MIN_PERCENTILE}–{MAX_PERCENTILE}):",
+        value=", ".join(map(str, DEFAULT_PERCENTILES))
+    )
+    try:
+        selected_percentiles = parse_percentiles(percentile_text)
+    except ValueError as e:
+        st.error(f"⚠️ Invalid percentiles: {e}")
+        selected_percentiles = []
+    group_col = st.selectbox("Select Grouping Column (Optional):", [None] + list(columns))
+
+    # ⚡ Optional approximate mode: per-group sketches saved to disk and merged across uploads
+    approx_mode = st.checkbox("⚡ Approximate percentiles (mergeable sketches, for very large or multi-file data)")
+    if approx_mode:
+        a1, a2 = st.columns(2)
+        with a1:
+            sketch_alpha = st.number_input("Relative error bound", min_value=0.001, max_value=0.1,
+                                           value=DEFAULT_ALPHA, step=0.001, format="%.3f")
+        with a2:
+            sketch_dir = st.text_input("Sketch folder (new uploads are folded into it; empty = the default folder)",
+                                       value="")
+        # Folders are always inside the server's sketch directory
+        try:
+            sketch_dir = resolve_sketch_dir(sketch_dir)
+        except ValueError as e:
+            st.error(f"⚠️ {e}")
+            sketch_dir = None
+
+    # The calculation runs as a background job: reruns show its progress
+    # and don't restart it
+    if st.button("⚙️ Calculate Hours + Percentiles") and not (approx_mode and sketch_dir is None):
+        load = None
+        if uploaded_file:
+            # Load just the chosen columns (cached per column) next to the
+            # ones computed before
+            needed = [col for pair in pairs for col in pair] + ([group_col] if group_col else [])
+            load = partial(project_upload, uploaded_file, needed, sheet_name, previous=df)
+        sketches = None
+        if approx_mode:
+            sketches = {"directory": sketch_dir, "alpha": sketch_alpha, "source": st.session_state.get("source_key")}
+        key = (st.session_state.get("source_key"), tuple(pairs), tuple(selected_percentiles), group_col,
+               numeric_format, None if sketches is None else tuple(sketches.values()))
+        submit_session_job(key, calculate_hours_job, df, pairs, selected_percentiles, group_col, numeric_format,
+                           load=load, sketches=sketches, profiler=profiler)
+
+    job = session_job()
+    if job is not None and job.running:
+        job_progress(job)
+
+    finished = take_finished_job()
+    if finished is not None and finished.status == "cancelled":
+        st.warning("⚠️ Calculation cancelled.")
+    elif finished is not None and finished.status == "failed":
+        st.error(f"⚠️ Calculation failed: {finished.error}")
+    elif finished is not None:
+        result = finished.result
+        for start_col, end_col, e in result["pair_errors"]:
+            st.error(f"⚠️ Error calculating {start_col} → {end_col}: {e}")
+
+        if result["parse_reports"]:
+            parse_report_panel(result["parse_reports"])
 
         # =========================================================
         # 🎯 STEP 2: PERCENTILE CALCULATION (Auto)
         # =========================================================
-        if hr_columns:
-            for p in selected_percentiles:
-                if group_col:
-                    grouped = df.groupby(group_col)[hr_columns].quantile(p / 100).reset_index()
-                    # Round grouped values
-                    grouped[hr_columns] = grouped[hr_columns].round(2)
-                    df = pd.merge(df, grouped, on=group_col, how="left", suffixes=("", f"_P{p}"))
-                else:
-                    for col in hr_columns:
-                        percentile_val = round(df[col].quantile(p / 100), 2)  # ✅ round to 2 decimals
-                        df[f"{col}_P{p}"] = percentile_val
-
-            st.success(f"✅ Hour & {', '.join(map(str, selected_percentiles))}th Percentile calculated successfully!")
-            st.session_state.df = df
+        if result["hr_columns"]:
+            if "sketch_error" in result:
+                st.error(f"⚠️ Error updating percentile sketches: {result['sketch_error']}")
+            st.success(f"✅ Hour & {', '.join(map(str, result['percentiles']))}th Percentile calculated successfully!")
+            df = result["df"]
+            set_session_frame(df)
+            st.session_state.df_version = new_version()
             st.dataframe(df.head(20))
         else:
             st.warning("⚠️ No valid hour columns found to calculate percentiles.")
@@ -100,23 +163,40 @@ if st.session_state.df is not None:
     st.markdown("---")
     st.markdown("## 💾 Step 2: Download Final Updated Dataset")
 
-    csv_data = df.to_csv(index=False).encode("utf-8")
-    st.download_button(
-        label="⬇️ Download Full Data (CSV)",
-        data=csv_data,
-        file_name="final_data.csv",
-        mime="text/csv"
-    )
-
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name="Processed_Data")
-    st.download_button(
-        label="⬇️ Download Full Data (Excel)",
-        data=output.getvalue(),
-        file_name="final_data.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+    # Exports are only built on request and cached per frame version
+    export_fmt = st.selectbox("Export format:", list(EXPORT_FORMATS),
+                              format_func=lambda fmt: EXPORT_FORMATS[fmt]["label"])
+    export_info = EXPORT_FORMATS[export_fmt]
+    # Only the chosen columns were loaded; the others are joined back on
+    # request, since that parses the whole upload
+    include_all = uploaded_file is not None and st.checkbox("📎 Include all original columns", value=False)
+    export_version = f"{st.session_state.df_version}-{'all' if include_all else 'loaded'}"
+    if st.button("📦 Prepare Download"):
+        if include_all:
+            with profiler.stage("join_columns") as stage:
+                export_df = with_all_columns(uploaded_file, df, sheet_name)
+                stage.rows = len(export_df)
+        else:
+            export_df = df
+        if export_df is None:
+            st.warning("⚠️ Nothing calculated yet: calculate first or include all original columns.")
+        else:
+            with st.spinner(f"Writing {export_info['label']} file..."):
+                with profiler.stage(f"export_{export_fmt}", len(export_df)):
+                    default_exports.export(export_df, export_version, export_fmt)
+
+    export_path = default_exports.get(export_version, export_fmt)
+    if export_path:
+        with open(export_path, "rb") as export_file:
+            st.download_button(
+                label=f"⬇️ Download Full Data ({export_info['label']})",
+                data=export_file,
+                file_name=f"final_data.{export_info['extension']}",
+                mime=export_info["mime"]
+            )
 
 else:
     st.info("👆 Please upload a CSV or Excel file to begin.")
+
+session_memory_panel()
+profiler_panel(profiler)
@@ -0,0 +1,75 @@
+"""Benchmark the single-pass variant parser against the old per-field regexes.
+
+    python benchmarks/bench_variants.py [--lines 100000] [--seed 0]
+
+The old ``extract_data`` (several ``re.search``/``re.sub``/``re.split``
+calls per line) is kept here as the reference implementation; the script
+checks that both produce identical results before timing them.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dateconverts.variants import extract_data, parse_lines  # noqa: E402
+from generators import generate_catalog  # noqa: E402
+
+
+def legacy_extract_data(line):
+    """extract_data as it was before the single-pass parser."""
+    name = ""
+    if "Rs." in line or "Lakh" in line:
+        if "Rs." in line:
+            name = line.split("Rs.")[0].strip()
+        else:
+            parts = re.split(r'\d+\.?\d*\s*Lakh', line, maxsplit=1, flags=re.IGNORECASE)
+            if len(parts) > 0:
+                name = parts[0].strip()
+    else:
+        name = line.strip()
+    name = name.rstrip(',*').strip()
+    name = re.sub(r'(\d+\.?\d*)\s*kw\s+', r'\1kW ', name, flags=re.IGNORECASE)
+    name = re.sub(r'(\d+\.?\d*)\s*kw\b', r'\1kW', name, flags=re.IGNORECASE)
+    price_match = re.search(r'Rs\.?\s*([\d\.]+)\s*Lakh', line, re.IGNORECASE)
+    if not price_match:
+        price_match = re.search(r'([\d\.]+)\s*Lakh', line, re.IGNORECASE)
+    price = price_match.group(1) if price_match else ""
+    battery_match = re.search(r'(\d+\.?\d*)\s*kWh', line, re.IGNORECASE)
+    battery = battery_match.group(1) + " kWh" if battery_match else ""
+    range_match = re.search(r'(\d+)\s*km', line, re.IGNORECASE)
+    range_km = range_match.group(1) + " km" if range_match else ""
+    return name, price, battery, range_km
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    lines = generate_catalog(args.lines, args.seed)
+    old, old_s = timed(lambda: [legacy_extract_data(line) for line in lines])
+    new, new_s = timed(lambda: [extract_data(line) for line in lines])
+    batch, batch_s = timed(parse_lines, lines)
+
+    if old != new:
+        print("MISMATCH between legacy and single-pass parser", file=sys.stderr)
+        return 1
+    print(f"{args.lines:,} lines")
+    print(f"  legacy extract_data : {old_s:.3f}s")
+    print(f"  single-pass         : {new_s:.3f}s ({old_s / new_s:.1f}x)")
+    print(f"  parse_lines (batch) : {batch_s:.3f}s ({old_s / batch_s:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
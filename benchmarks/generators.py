@@ -0,0 +1,78 @@
+"""Seeded synthetic inputs for the benchmarks.
+
+* :func:`timestamp_pairs` - start/end datetime string columns like the
+  exports the date/hour apps are used on, with a grouping column and a
+  configurable share of blank cells.
+* :func:`generate_catalog` - EV variant catalog lines as pasted from the
+  manufacturer websites.
+
+The same arguments (including ``seed``) always give the same data.
+"""
+import random
+
+import numpy as np
+import pandas as pd
+
+# String layouts the timestamp columns can be written in
+DATETIME_FORMATS = {
+    "iso": "%Y-%m-%d %H:%M:%S",
+    "dmy": "%d/%m/%Y %H:%M",
+    "mdy": "%m/%d/%Y %I:%M %p",
+}
+MAX_DURATION_DAYS = 3
+
+MAKES = {
+    "Mahindra": ["XEV 9e", "BE 6", "XUV400"],
+    "Tata": ["Nexon EV", "Punch EV", "Curvv EV", "Tiago EV"],
+    "MG": ["Windsor EV", "ZS EV", "Comet EV"],
+    "Hyundai": ["Creta Electric", "Ioniq 5"],
+}
+TRIMS = ["Pack One", "Pack Two", "Pack Three Select", "Creative Plus", "Empowered Plus LR", "Exclusive Pro"]
+CHARGERS = ["", " 7.2kw Charger", " 11.2kw Charger", " 3.3 kw"]
+
+
+def timestamp_pairs(rows, pairs=1, groups=20, nan_rate=0.01, fmt="iso", seed=0, days=90):
+    """Frame with ``start_i`` / ``end_i`` string columns and a ``group`` column.
+
+    Start times are spread over ``days`` days at minute resolution and
+    durations are exponential (mean 4 hours, at most three days).  A
+    ``nan_rate`` share of each timestamp column is left blank; ``groups=0``
+    leaves out the ``group`` column.
+    """
+    if fmt not in DATETIME_FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of {list(DATETIME_FORMATS)}")
+    rng = np.random.default_rng(seed)
+
+    # Format every possible minute once and index into it; formatting
+    # millions of timestamps one by one would dominate the setup time
+    minutes = pd.date_range("2024-01-01", periods=(days + MAX_DURATION_DAYS) * 1440, freq="min")
+    labels = np.asarray(minutes.strftime(DATETIME_FORMATS[fmt]), dtype=object)
+
+    data = {}
+    if groups:
+        names = np.asarray([f"G{i:03d}" for i in range(groups)], dtype=object)
+        data["group"] = names[rng.integers(0, groups, rows)]
+    for i in range(1, pairs + 1):
+        start = rng.integers(0, days * 1440, rows)
+        duration = np.minimum(rng.exponential(240, rows).astype("int64"), MAX_DURATION_DAYS * 1440 - 1)
+        for name, positions in ((f"start_{i}", start), (f"end_{i}", start + duration)):
+            values = labels[positions]
+            values[rng.random(rows) < nan_rate] = np.nan
+            data[name] = values
+    return pd.DataFrame(data)
+
+
+def generate_catalog(n_lines, seed=0):
+    """Seeded synthetic catalog lines in the pasted-from-website format."""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(n_lines):
+        make = rng.choice(list(MAKES))
+        name = f"{make} {rng.choice(MAKES[make])} {rng.choice(TRIMS)}{rng.choice(CHARGERS)} (Electric)"
+        price = f"{rng.uniform(7, 60):.2f}"
+        parts = [f"{rng.randint(25, 90)} kWh", f"{rng.randint(200, 700)} km"]
+        if rng.random() < 0.7:
+            parts.append(f"{rng.randint(60, 400)} bhp")
+        prefix = "Rs." if rng.random() < 0.95 else ""
+        lines.append(f"{name}{prefix}{price} Lakh*, " + ", ".join(parts))
+    return lines
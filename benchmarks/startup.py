@@ -0,0 +1,106 @@
+"""Measure the startup time and memory of the Streamlit pages.
+
+    python benchmarks/startup.py                 # separate scripts vs the multipage app
+    python benchmarks/startup.py --output startup.json
+
+Every measurement runs in a fresh Python process with Streamlit's
+``AppTest`` (no browser needed):
+
+* separate: each script on its own, as five ``streamlit run`` servers
+  would; time to the first rendered page and the resident memory of each
+  process, summed over the scripts;
+* multipage: ``streamlit_app.py`` in one process, its home page first
+  and then every page in turn; time to each page and the process memory
+  after it.
+
+The pages are opened without an upload, so the figures are the cost of
+the imports and the first render, not of any processing.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = ["app.py", "app1.py", "app2.py", "variant.py", "variant_app.py"]
+MULTIPAGE_APP = "streamlit_app.py"
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "openpyxl"]
+
+
+def _rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _loaded():
+    return [m for m in HEAVY_MODULES if m in sys.modules]
+
+
+def _child(mode, scripts):
+    """Run in the measured process: render the page(s) and print one JSON line each."""
+    started = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    from streamlit.testing.v1 import AppTest
+
+    if mode == "separate":
+        at = AppTest.from_file(os.path.join(ROOT, scripts[0]), default_timeout=60)
+        at.run()
+        print(json.dumps({"page": scripts[0], "seconds": time.perf_counter() - started, "rss_mb": _rss_mb(),
+                          "loaded": _loaded(), "error": bool(at.exception)}))
+        return
+    at = AppTest.from_file(os.path.join(ROOT, MULTIPAGE_APP), default_timeout=60)
+    for i, page in enumerate([MULTIPAGE_APP] + scripts):
+        if i:
+            started = time.perf_counter()
+            at.switch_page(page)
+        at.run()
+        print(json.dumps({"page": page, "seconds": time.perf_counter() - started, "rss_mb": _rss_mb(),
+                          "loaded": _loaded(), "error": bool(at.exception)}), flush=True)
+
+
+def _measure(mode, scripts):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, *scripts],
+                         cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return [json.loads(line) for line in out.splitlines() if line.startswith("{")]
+
+
+def _print(rows):
+    for row in rows:
+        print(f"  {row['page']:<18} {row['seconds']:>7.3f}s {row['rss_mb']:>8.1f} MB  "
+              f"{', '.join(row['loaded']) or '-'}{'  (error)' if row['error'] else ''}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        _child(args.child[0], args.child[1:])
+        return 0
+
+    report = {"separate": [row for script in SCRIPTS for row in _measure("separate", [script])]}
+    print("Separate scripts (one process each):")
+    _print(report["separate"])
+    print(f"  {'total':<18} {sum(r['seconds'] for r in report['separate']):>7.3f}s "
+          f"{sum(r['rss_mb'] for r in report['separate']):>8.1f} MB")
+
+    if os.path.exists(os.path.join(ROOT, MULTIPAGE_APP)):
+        # Light pages first, to show what opening them costs before any data page
+        order = ["variant.py", "variant_app.py", "app.py", "app1.py", "app2.py"]
+        report["multipage"] = _measure("multipage", order)
+        print(f"Multipage app ({MULTIPAGE_APP}, one process, pages opened in turn):")
+        _print(report["multipage"])
+        print(f"  {'total':<18} {sum(r['seconds'] for r in report['multipage']):>7.3f}s "
+              f"{report['multipage'][-1]['rss_mb']:>8.1f} MB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""Benchmark every processing stage of the apps on synthetic data.
+
+    python benchmarks/suite.py                       # 10k and 1M rows, compare to baseline.json
+    python benchmarks/suite.py --sizes 10k,1m,10m    # 10M rows needs ~6 GB of RAM
+    python benchmarks/suite.py --stages durations,percentiles
+    python benchmarks/suite.py --update-baseline     # record this machine's numbers
+
+Each stage runs on data from :mod:`generators` (seeded, so every run sees
+the same input).  Wall time is the best of ``--repeat`` runs; peak memory
+is measured with ``tracemalloc`` in a separate run so the tracing does not
+slow the timed ones.  Results are compared to the stored baseline and the
+script exits with status 1 when a stage got slower or hungrier than the
+tolerances allow.  Timings depend on the machine, so record a baseline
+on the machine you compare on.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dateconverts.buckets import add_bucket_column, bucket_histogram  # noqa: E402
+from dateconverts.parsing import parse_columns, parse_datetime  # noqa: E402
+from dateconverts.percentiles import add_percentile_columns  # noqa: E402
+from dateconverts.pipeline import add_hour_columns, hour_column_name  # noqa: E402
+from dateconverts.scheduler import default_workers, process_workers, run_tasks  # noqa: E402
+from dateconverts.splitter import split_datetime_columns  # noqa: E402
+from dateconverts.variants import extract_data, render_variant_html  # noqa: E402
+from generators import DATETIME_FORMATS, generate_catalog, timestamp_pairs  # noqa: E402
+
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+DEFAULT_SIZES = "10k,1m"
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# A stage only counts as a regression when it is both relatively and
+# absolutely worse; tiny inputs are too noisy for ratios alone
+TIME_TOLERANCE = 0.5     # +50 %
+MIN_TIME_DELTA = 0.1     # seconds
+MEMORY_TOLERANCE = 0.2   # +20 %
+MIN_MEMORY_DELTA = 1.0   # MB
+
+PAIRS = [("start_1", "end_1"), ("start_2", "end_2")]
+PERCENTILES = [90, 95]
+GROUP_COL = "group"
+
+
+class Inputs:
+    """Inputs for one size, built on first use and shared by the stages."""
+
+    def __init__(self, rows, groups, nan_rate, fmt, seed):
+        self.rows = rows
+        self.groups = groups
+        self.nan_rate = nan_rate
+        self.fmt = fmt
+        self.seed = seed
+
+    @cached_property
+    def frame(self):
+        return timestamp_pairs(self.rows, pairs=len(PAIRS), groups=self.groups,
+                               nan_rate=self.nan_rate, fmt=self.fmt, seed=self.seed)
+
+    @cached_property
+    def hour_frame(self):
+        df = self.frame.copy(deep=False)
+        add_hour_columns(df, PAIRS)
+        return df
+
+    @cached_property
+    def bucket_frame(self):
+        df = self.hour_frame.copy(deep=False)
+        return df, [add_bucket_column(df, col) for col in self.hr_columns]
+
+    @property
+    def hr_columns(self):
+        return [hour_column_name(start, end) for start, end in PAIRS]
+
+    @cached_property
+    def lines(self):
+        return generate_catalog(self.rows, self.seed)
+
+    @cached_property
+    def variants(self):
+        return [extract_data(line) for line in self.lines]
+
+
+@dataclass
+class Stage:
+    """One measured step: ``prepare(inputs)`` builds the arguments outside
+    the measurement, ``run(*args)`` is what gets timed."""
+
+    name: str
+    app: str
+    prepare: Callable
+    run: Callable
+
+
+def _copy(df):
+    # Stages add columns; a shallow copy keeps the shared input untouched
+    return df.copy(deep=False)
+
+
+def _text_columns(inputs):
+    return inputs.frame, [col for pair in PAIRS for col in pair]
+
+
+def _pooled(inputs):
+    # Start the shared pool's workers outside the measurement: a server
+    # pays for that once, not on every parse
+    run_tasks(abs, range(process_workers()), process_workers(), processes=True)
+    return _text_columns(inputs)
+
+
+STAGES = [
+    Stage("parse_datetime", "app.py / app1.py",
+          lambda i: (i.frame["start_1"],),
+          parse_datetime),
+    # All text columns of the pairs, in process (workers=1) and on the
+    # shared process pool with every core; the gap is the pool's gain
+    Stage("parse_columns", "app1.py / app2.py",
+          _text_columns,
+          lambda df, columns: parse_columns(df, columns, workers=1)),
+    Stage("parse_columns_pool", "app1.py / app2.py",
+          _pooled,
+          lambda df, columns: parse_columns(df, columns, workers=default_workers())),
+    Stage("split_columns", "app.py",
+          lambda i: (_copy(i.frame), ["start_1", "end_1"]),
+          split_datetime_columns),
+    Stage("durations", "app1.py",
+          lambda i: (_copy(i.frame), PAIRS),
+          add_hour_columns),
+    Stage("percentiles", "app1.py",
+          lambda i: (_copy(i.hour_frame), i.hr_columns, PERCENTILES, GROUP_COL),
+          add_percentile_columns),
+    Stage("buckets", "app2.py",
+          lambda i: (_copy(i.hour_frame), i.hr_columns),
+          lambda df, columns: [add_bucket_column(df, col) for col in columns]),
+    Stage("bucket_histogram", "app2.py",
+          lambda i: (*i.bucket_frame, GROUP_COL),
+          bucket_histogram),
+    Stage("variant_parse", "variant.py",
+          lambda i: (i.lines,),
+          lambda lines: [extract_data(line) for line in lines]),
+    Stage("variant_html", "variant.py",
+          lambda i: (i.variants,),
+          render_variant_html),
+]
+
+
+def parse_size(text):
+    """``"10k"`` / ``"1m"`` / ``"250000"`` -> number of rows."""
+    text = text.strip().lower()
+    if text in SIZES:
+        return SIZES[text]
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * multiplier)
+
+
+def size_label(rows):
+    for label, value in SIZES.items():
+        if value == rows:
+            return label
+    return str(rows)
+
+
+def measure(stage, inputs, repeat=1):
+    """Best wall time of ``repeat`` runs and the peak traced memory (MB)."""
+    best = float("inf")
+    for _ in range(repeat):
+        args = stage.prepare(inputs)
+        gc.collect()
+        started = time.perf_counter()
+        stage.run(*args)
+        best = min(best, time.perf_counter() - started)
+        del args
+
+    args = stage.prepare(inputs)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        stage.run(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(best, 4), "peak_mb": round(peak / 2**20, 2)}
+
+
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """Regression messages for results that are worse than the baseline."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        seconds, base_seconds = result["seconds"], base["seconds"]
+        if seconds > base_seconds * (1 + time_tolerance) and seconds - base_seconds > MIN_TIME_DELTA:
+            regressions.append(f"{key}: {seconds:.3f}s vs baseline {base_seconds:.3f}s")
+        peak, base_peak = result["peak_mb"], base["peak_mb"]
+        if peak > base_peak * (1 + memory_tolerance) and peak - base_peak > MIN_MEMORY_DELTA:
+            regressions.append(f"{key}: {peak:.1f} MB peak vs baseline {base_peak:.1f} MB")
+    return regressions
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"comma-separated row counts (default: {DEFAULT_SIZES})")
+    parser.add_argument("--stages", help="comma-separated stage names (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage, best is kept (default: 3)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--nan-rate", type=float, default=0.01)
+    parser.add_argument("--format", default="iso", choices=list(DATETIME_FORMATS))
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON to compare with")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    stages = STAGES
+    if args.stages:
+        wanted = set(args.stages.split(","))
+        unknown = wanted - {s.name for s in STAGES}
+        if unknown:
+            parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+        stages = [s for s in STAGES if s.name in wanted]
+    params = {"seed": args.seed, "groups": args.groups, "nan_rate": args.nan_rate, "format": args.format}
+
+    results = {}
+    for rows in (parse_size(s) for s in args.sizes.split(",")):
+        inputs = Inputs(rows, args.groups, args.nan_rate, args.format, args.seed)
+        for stage in stages:
+            key = f"{stage.name}@{size_label(rows)}"
+            results[key] = measure(stage, inputs, args.repeat)
+            print(f"{key:<28} {stage.app:<18} {results[key]['seconds']:>9.3f}s {results[key]['peak_mb']:>10.1f} MB",
+                  flush=True)
+        del inputs
+        gc.collect()
+
+    report = {
+        "params": params,
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    baseline = load_baseline(args.baseline)
+    if args.update_baseline:
+        if baseline and baseline.get("params") == params:
+            # Keep entries for sizes/stages that were not run this time
+            report["results"] = {**baseline["results"], **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
+        return 0
+    if baseline.get("params") != params:
+        print("Baseline was recorded with different generator settings; not comparing.")
+        return 0
+
+    regressions = compare(results, baseline["results"], args.time_tolerance, args.memory_tolerance)
+    if regressions:
+        print("\nREGRESSIONS:", file=sys.stderr)
+        for message in regressions:
+            print(f"  {message}", file=sys.stderr)
+        return 1
+    print("\nNo regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
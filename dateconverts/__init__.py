@@ -0,0 +1 @@
+"""Shared processing helpers used by the Streamlit date/hour tools."""
@@ -0,0 +1,5 @@
+import sys
+
+from dateconverts.cli import main
+
+sys.exit(main())
@@ -0,0 +1,104 @@
+"""Fixed-width duration buckets for the ``_Hr`` columns.
+
+Bucket numbers are computed with integer arithmetic on the whole array
+and labels are only created for buckets that actually contain values, so
+a single outlier no longer produces thousands of empty categories.  An
+optional cap sends everything above it into one overflow bucket.
+
+Buckets are right-closed like the ``pd.cut(..., include_lowest=True)``
+call they replace: with 0.5-hour buckets starting at 0, the value 1.0
+falls in ``0.5-1.0 Hr`` and 0.0 in ``0.0-0.5 Hr``.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_BUCKET_WIDTH = 0.5  # hours
+
+
+def bucket_column_name(col):
+    return col.replace("_Hr", "_Bucket")
+
+
+def _label_format(width):
+    # One decimal is enough for 0.5-hour steps; finer widths need two
+    return ".1f" if float(width * 10).is_integer() else ".2f"
+
+
+def bucket_codes(values, width=DEFAULT_BUCKET_WIDTH, cap=None):
+    """Assign bucket numbers to ``values``.
+
+    Returns ``(codes, origin)``: ``codes`` is -1 for missing values, the
+    bucket number counted from ``origin`` (the floor of the minimum)
+    otherwise, and ``-2`` for values above ``cap``.
+    """
+    values = np.asarray(values, dtype="float64")
+    valid = ~np.isnan(values)
+    codes = np.full(len(values), -1, dtype="int64")
+    if not valid.any():
+        return codes, None
+
+    origin = np.floor(values[valid].min())
+    steps = np.ceil((values[valid] - origin) / width).astype("int64") - 1
+    codes[valid] = np.maximum(steps, 0)  # the minimum itself goes in the first bucket
+    if cap is not None:
+        codes[valid & (values > cap)] = -2
+    return codes, origin
+
+
+def bucket_values(values, width=DEFAULT_BUCKET_WIDTH, cap=None):
+    """Bucket ``values`` into an ordered Categorical of populated buckets."""
+    codes, origin = bucket_codes(values, width, cap)
+    if origin is None:
+        return None
+
+    fmt = _label_format(width)
+    present, positions = np.unique(codes, return_inverse=True)
+    labels = []
+    for code in present:
+        if code == -2:
+            labels.append(f">{cap:{fmt}} Hr")
+        elif code >= 0:
+            lo = origin + code * width
+            labels.append(f"{lo:{fmt}}-{lo + width:{fmt}} Hr")
+
+    # np.unique sorts -2 (overflow) and -1 (missing) first: move overflow to
+    # the end of the categories and keep missing as -1
+    n_special = int((present < 0).sum())
+    has_overflow = bool((present == -2).any())
+    new_codes = positions - n_special
+    if has_overflow:
+        labels = labels[1:] + labels[:1]
+        new_codes[codes == -2] = len(labels) - 1
+    new_codes[codes == -1] = -1
+    return pd.Categorical.from_codes(new_codes, categories=labels, ordered=True)
+
+
+def add_bucket_column(df, col, width=DEFAULT_BUCKET_WIDTH, cap=None):
+    """Add a ``_Bucket`` column for ``col`` and return its name.
+
+    Returns None (and adds nothing) when ``col`` has no numeric values.
+    """
+    values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64")
+    buckets = bucket_values(values, width, cap)
+    if buckets is None:
+        return None
+    bucket_col = bucket_column_name(col)
+    df[bucket_col] = buckets
+    return bucket_col
+
+
+def bucket_histogram(df, bucket_columns, group_col=None):
+    """Row counts per bucket (and per group) as a compact long table.
+
+    Columns: ``column``, ``group_col`` (when given), ``bucket``, ``count``.
+    """
+    tables = []
+    for bucket_col in bucket_columns:
+        keys = [group_col, bucket_col] if group_col else [bucket_col]
+        counts = df.groupby(keys, observed=True, sort=True).size().reset_index(name="count")
+        counts = counts.rename(columns={bucket_col: "bucket"})
+        counts.insert(0, "column", bucket_col)
+        tables.append(counts)
+    if not tables:
+        return pd.DataFrame(columns=["column", "bucket", "count"])
+    return pd.concat(tables, ignore_index=True)
@@ -0,0 +1,211 @@
+"""Bulk variant catalogs: file ingestion, parallel parsing and per-model ZIPs.
+
+A catalog file holds one variant line per row:
+
+* ``.txt`` - one line per variant;
+* ``.csv`` - one row per variant; unquoted lines are split on their commas
+  by the CSV format, so the cells of a row are joined back with ``,``;
+* ``.xlsx`` - one row per variant on the first sheet, cells joined the same
+  way.
+
+Lines are parsed in chunks on the shared process pool
+(:mod:`dateconverts.scheduler`) with the rules from
+:mod:`dateconverts.variants`, and the result is written as one HTML
+fragment per model into a ZIP that is streamed to a temporary file.
+"""
+import csv
+import io
+import os
+import re
+import tempfile
+import time
+import zipfile
+from functools import partial
+
+from dateconverts.scheduler import process_workers, run_tasks
+from dateconverts.variants import MODEL_WORDS, group_by_model, parse_line, write_variant_block
+
+CATALOG_EXTENSIONS = (".txt", ".csv", ".xlsx")
+CHUNK_LINES = 20_000        # lines per task sent to a worker process
+PARALLEL_MIN_LINES = 50_000  # below this, starting processes costs more than it saves
+
+ERROR_FIELDS = ("line", "problem", "text")
+
+_UNSAFE_FILENAME = re.compile(r"[^\w.-]+")
+
+
+def _decode(data):
+    return data.decode("utf-8-sig", errors="replace")
+
+
+def _numbered(pieces):
+    """Split ``(number, text)`` pieces into lines, dropping blank ones as
+    :func:`~dateconverts.variants.split_lines` does; returns ``(lines, numbers)``.
+
+    A piece holding several lines (a quoted CSV cell, a multi-line
+    spreadsheet cell) numbers them from its own number on.
+    """
+    lines, numbers = [], []
+    for number, text in pieces:
+        for offset, line in enumerate(text.split("\n")):
+            line = line.strip()
+            if line:
+                lines.append(line)
+                numbers.append(number + offset)
+    return lines, numbers
+
+
+def _txt_lines(data):
+    return _numbered(enumerate(_decode(data).split("\n"), 1))
+
+
+def _csv_rows(data):
+    reader = csv.reader(io.StringIO(_decode(data), newline=""))
+    start = 1
+    for row in reader:
+        yield start, ",".join(row)
+        start = reader.line_num + 1
+
+
+def _csv_lines(data):
+    return _numbered(_csv_rows(data))
+
+
+def _xlsx_lines(data):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        # Rows are numbered as in the sheet: iteration starts at row 1
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        return _numbered((n, ",".join(str(v) for v in row if v is not None)) for n, row in enumerate(rows, 1))
+    finally:
+        workbook.close()
+
+
+def read_catalog_lines(source, name=None):
+    """Variant lines of a catalog file and where they are in it.
+
+    ``source`` is a path or an uploaded file (anything with ``getvalue()``);
+    the format is taken from ``name`` or the source's file name.  Returns
+    ``(lines, numbers)``: the non-empty lines and their 1-based line
+    numbers in the file (row numbers for ``.xlsx``), so reports point at
+    the original line even though blank lines are skipped.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        name = name or os.fspath(source)
+        with open(source, "rb") as f:
+            data = f.read()
+    else:
+        name = name or source.name
+        data = source.getvalue()
+
+    extension = os.path.splitext(name.lower())[1]
+    if extension == ".csv":
+        return _csv_lines(data)
+    if extension == ".xlsx":
+        return _xlsx_lines(data)
+    if extension == ".txt":
+        return _txt_lines(data)
+    raise ValueError(f"Unsupported catalog file {name!r}, expected one of {', '.join(CATALOG_EXTENSIONS)}")
+
+
+def _parse_chunk(lines, strict):
+    return [parse_line(line, strict) for line in lines]
+
+
+def parse_catalog_lines(lines, strict=False, workers=None, chunk_lines=CHUNK_LINES):
+    """Parse ``lines`` into ``(name, price, battery, range_km, bhp)`` tuples.
+
+    Large catalogs are split into chunks of ``chunk_lines`` and parsed on
+    the shared process pool by up to ``workers`` processes (default: the
+    pool's size); the result keeps the order of ``lines``.
+    """
+    workers = workers or process_workers()
+    if workers == 1 or len(lines) < max(PARALLEL_MIN_LINES, 2 * chunk_lines):
+        return _parse_chunk(lines, strict)
+
+    chunks = [lines[i:i + chunk_lines] for i in range(0, len(lines), chunk_lines)]
+    parsed = []
+    for chunk, error in run_tasks(partial(_parse_chunk, strict=strict), chunks, workers, processes=True):
+        if error is not None:
+            raise error
+        parsed.extend(chunk)
+    return parsed
+
+
+def line_errors(lines, parsed, numbers=None):
+    """Rows where the name or the price could not be extracted.
+
+    Returns a list of ``{"line", "problem", "text"}`` dicts.  ``line`` is
+    taken from ``numbers`` (see :func:`read_catalog_lines`), or counts the
+    lines from 1 when they are not given.
+    """
+    numbers = range(1, len(lines) + 1) if numbers is None else numbers
+    errors = []
+    for number, line, variant in zip(numbers, lines, parsed):
+        problems = [label for label, value in (("missing name", variant[0]), ("missing price", variant[1]))
+                    if not value]
+        if problems:
+            errors.append({"line": number, "problem": ", ".join(problems), "text": line})
+    return errors
+
+
+def write_error_report(out, errors):
+    """Write ``errors`` (see :func:`line_errors`) as CSV to the text file ``out``."""
+    writer = csv.DictWriter(out, fieldnames=ERROR_FIELDS)
+    writer.writeheader()
+    writer.writerows(errors)
+
+
+def render_error_report(errors):
+    """CSV text of ``errors`` for a download button."""
+    out = io.StringIO()
+    write_error_report(out, errors)
+    return out.getvalue()
+
+
+def model_filename(model, used):
+    """A safe, unique ``.html`` file name for ``model`` inside the ZIP."""
+    stem = _UNSAFE_FILENAME.sub("_", model).strip("._") or "variants"
+    filename, n = f"{stem}.html", 2
+    while filename in used:
+        filename, n = f"{stem}_{n}.html", n + 1
+    used.add(filename)
+    return filename
+
+
+def _member(archive, filename):
+    info = zipfile.ZipInfo(filename, date_time=time.localtime()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    return io.TextIOWrapper(archive.open(info, "w"), encoding="utf-8", newline="")
+
+
+def write_model_zip(out, parsed, words=MODEL_WORDS, errors=None):
+    """Write one HTML fragment per model into a ZIP on the binary file ``out``.
+
+    Each fragment is streamed into the archive as it is written.  When
+    ``errors`` is given it is added as ``errors.csv``.  Returns the number
+    of models.
+    """
+    groups = group_by_model(parsed, words)
+    used = set()
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for model, variants in groups.items():
+            with _member(archive, model_filename(model, used)) as member:
+                write_variant_block(member, variants)
+        if errors:
+            with _member(archive, "errors.csv") as member:
+                write_error_report(member, errors)
+    return len(groups)
+
+
+def model_zip_file(parsed, words=MODEL_WORDS, errors=None):
+    """Write the per-model ZIP to a temporary file; returns ``(file, models)``.
+
+    The file is a raw ``FileIO`` at offset 0, ready for ``st.download_button``.
+    """
+    raw = tempfile.TemporaryFile(buffering=0)
+    models = write_model_zip(raw, parsed, words, errors)
+    raw.seek(0)
+    return raw, models
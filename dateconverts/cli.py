@@ -0,0 +1,209 @@
+"""Command-line entry point for batch runs (``python -m dateconverts``).
+
+Examples::
+
+    python -m dateconverts run job.json "exports/*.csv" -o out/
+    python -m dateconverts run job.yaml exports/ -o out/ --workers 4
+    python -m dateconverts variants catalog.txt -o out/
+    python -m dateconverts variants catalogs/ -o out/ --by-model
+    python -m dateconverts variants catalog.txt -o out/ --strict
+
+``run`` applies a job spec (see :class:`dateconverts.pipeline.JobSpec`)
+to every input file in parallel with a process pool, writes one output
+per file and a ``run_summary.json``.  Inputs with the same file name in
+different directories get numbered outputs (``data_processed.csv``,
+``data_2_processed.csv``, ...; see :func:`output_stems`).
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dateconverts.export import EXPORT_FORMATS, write_export
+from dateconverts.instrument import Profiler
+from dateconverts.pipeline import load_spec, read_input, run_job
+
+INPUT_EXTENSIONS = (".csv", ".xlsx")
+
+
+def expand_inputs(patterns, extensions=INPUT_EXTENSIONS):
+    """Expand directories and glob patterns into a sorted list of files."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            candidates = glob.glob(pattern) or [pattern]
+        paths.extend(p for p in candidates if p.lower().endswith(extensions) and os.path.isfile(p))
+    return sorted(set(paths))
+
+
+def output_stems(paths):
+    """Output file stem of every input path, unique within the output directory.
+
+    Inputs with the same name (``a/data.csv`` and ``b/data.csv``, or
+    ``data.csv`` and ``data.xlsx``) get ``data``, ``data_2``, ... in the
+    order of ``paths``; names differing only in case count as the same.
+    """
+    stems, used = {}, set()
+    for path in paths:
+        base = os.path.splitext(os.path.basename(path))[0]
+        stem, n = base, 2
+        while stem.lower() in used:
+            stem, n = f"{base}_{n}", n + 1
+        used.add(stem.lower())
+        stems[path] = stem
+    return stems
+
+
+def output_path(input_path, out_dir, fmt, stem=None):
+    stem = stem or os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(out_dir, f"{stem}_processed.{EXPORT_FORMATS[fmt]['extension']}")
+
+
+def process_file(path, spec, out_dir, profile_log=None, trace_memory=False, workers=1, stem=None):
+    """Run ``spec`` on one file and write its output; returns a summary dict.
+
+    With ``profile_log`` the per-stage timings are appended to that file
+    as JSON lines and included in the summary.  ``workers`` > 1 processes
+    the file's columns and pairs concurrently.  ``stem`` names the output
+    files (default: the input's file name).
+    """
+    started = time.perf_counter()
+    result = {"input": path, "status": "ok"}
+    profiler = Profiler(enabled=profile_log is not None, trace_memory=trace_memory,
+                        log_path=profile_log, context={"input": path})
+    try:
+        with profiler.stage("read_input") as stage:
+            df = read_input(path, spec.sheet)
+            stage.rows = len(df)
+        result.update(run_job(df, spec, profiler, workers))
+        bucket_summary = result.pop("bucket_summary", None)
+        result["output"] = output_path(path, out_dir, spec.output_format, stem)
+        with profiler.stage(f"export_{spec.output_format}", len(df)):
+            write_export(df, spec.output_format, result["output"])
+        if result.get("bucket_columns"):
+            # Small per-bucket counts next to the full output
+            result["bucket_summary"] = output_path(path, out_dir, "csv", stem).replace("_processed.", "_bucket_summary.")
+            bucket_summary.to_csv(result["bucket_summary"], index=False)
+        if result["errors"]:
+            result["status"] = "partial"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+    if profiler.records:
+        result["stages"] = list(profiler.records)
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_batch(paths, spec, out_dir, workers=None, profile_log=None, trace_memory=False):
+    """Process ``paths`` with a pool of ``workers`` processes (default: all cores).
+
+    A single file gets the workers for its columns and pairs instead.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    # Named up front, so files with the same name can't overwrite each other
+    stems = output_stems(paths)
+    if len(paths) == 1:
+        return [process_file(paths[0], spec, out_dir, profile_log, trace_memory, workers or os.cpu_count() or 1)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths)))
+    if workers == 1:
+        return [process_file(path, spec, out_dir, profile_log, trace_memory, 1, stems[path]) for path in paths]
+    n = len(paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(process_file, paths, [spec] * n, [out_dir] * n, [profile_log] * n, [trace_memory] * n,
+                             [1] * n, [stems[path] for path in paths]))
+
+
+def _cmd_run(args):
+    spec = load_spec(args.spec)
+    if args.format:
+        spec.output_format = args.format
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("No CSV/XLSX input files found.", file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    results = run_batch(paths, spec, args.output, args.workers, args.profile, args.trace_memory)
+    summary = {
+        "spec": spec.to_dict(),
+        "files": len(results),
+        "failed": sum(r["status"] == "failed" for r in results),
+        "seconds": round(time.perf_counter() - started, 3),
+        "results": results,
+    }
+    summary_path = os.path.join(args.output, "run_summary.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, default=str)
+
+    for r in results:
+        print(f"[{r['status']}] {r['input']} ({r['seconds']}s)")
+    print(f"{summary['files']} file(s), {summary['failed']} failed, summary: {summary_path}")
+    return 1 if summary["failed"] else 0
+
+
+def _cmd_variants(args):
+    from dateconverts.catalog import (
+        CATALOG_EXTENSIONS, line_errors, parse_catalog_lines, read_catalog_lines, write_error_report, write_model_zip
+    )
+    from dateconverts.variants import write_variant_html
+
+    paths = expand_inputs(args.inputs, extensions=CATALOG_EXTENSIONS)
+    os.makedirs(args.output, exist_ok=True)
+    stems = output_stems(paths)
+    for path in paths:
+        lines, numbers = read_catalog_lines(path)
+        parsed = parse_catalog_lines(lines, strict=args.strict, workers=args.workers)
+        errors = line_errors(lines, parsed, numbers)
+        stem = os.path.join(args.output, stems[path])
+        if args.by_model:
+            out = f"{stem}_by_model.zip"
+            with open(out, "wb") as f:
+                write_model_zip(f, parsed, errors=errors)
+        else:
+            out = f"{stem}.html"
+            with open(out, "w", encoding="utf-8", newline="") as f:
+                write_variant_html(f, parsed)
+        message = f"{path}: {len(lines)} variants -> {out}"
+        if errors:
+            with open(f"{stem}_errors.csv", "w", encoding="utf-8", newline="") as f:
+                write_error_report(f, errors)
+            message += f" ({len(errors)} lines with errors -> {stem}_errors.csv)"
+        print(message)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="dateconverts", description="Batch date/hour processing.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="apply a job spec to CSV/XLSX files")
+    run.add_argument("spec", help="job spec (.json, .yaml or .yml)")
+    run.add_argument("inputs", nargs="+", help="input files, directories or glob patterns")
+    run.add_argument("-o", "--output", default="output", help="output directory (default: output)")
+    run.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    run.add_argument("-f", "--format", choices=list(EXPORT_FORMATS), help="override the spec's output_format")
+    run.add_argument("--profile", metavar="LOG", default=os.environ.get("DATECONVERTS_PROFILE_LOG"),
+                     help="append per-stage timings to LOG as JSON lines (default: $DATECONVERTS_PROFILE_LOG)")
+    run.add_argument("--trace-memory", action="store_true", help="also trace allocations per stage (slower)")
+    run.set_defaults(func=_cmd_run)
+
+    variants = sub.add_parser("variants", help="convert variant catalog files (.txt, .csv, .xlsx) to HTML")
+    variants.add_argument("inputs", nargs="+", help="input files, directories or glob patterns")
+    variants.add_argument("-o", "--output", default="output", help="output directory (default: output)")
+    variants.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    variants.add_argument("--by-model", action="store_true", help="write a ZIP with one HTML file per model")
+    variants.add_argument("--strict", action="store_true",
+                          help="variant_app.py rules: name before \"Rs.\", fields only after it")
+    variants.set_defaults(func=_cmd_variants)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
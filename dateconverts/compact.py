@@ -0,0 +1,114 @@
+"""Compact dtypes for uploaded frames.
+
+Uploads arrive with one Python object per text cell and 64-bit numbers.
+:func:`compact_frame` converts them to cheaper equivalents:
+
+* text columns with few distinct values (group / region / status
+  columns) become Categoricals;
+* other text columns become Arrow-backed strings (pyarrow installed),
+  keeping NaN as the missing value like the object columns they replace;
+* integer columns are downcast to the smallest integer type, float
+  columns to float32 only when every value survives the round trip.
+
+Values are unchanged, so exports and calculations give the same results.
+:func:`restore_frame` gives numeric columns their wide dtypes back before
+a typed export (Parquet), so the file has the dtypes the columns had
+before they were compacted.
+"""
+import numpy as np
+import pandas as pd
+
+CATEGORY_MAX_RATIO = 0.05   # at most 5 % distinct values ...
+CATEGORY_MAX_VALUES = 10_000  # ... and at most this many
+
+
+def arrow_string_dtype():
+    """Arrow-backed string dtype with NaN semantics, or None if unavailable."""
+    for args in (("pyarrow", np.nan), ("pyarrow_numpy",)):
+        try:
+            if len(args) == 2:
+                return pd.StringDtype(args[0], na_value=args[1])  # pandas >= 2.3
+            return pd.StringDtype(*args)                          # pandas 2.1 / 2.2
+        except (TypeError, ValueError, ImportError):
+            continue
+    return None
+
+
+def _is_text(series):
+    if series.dtype == object:
+        return pd.api.types.infer_dtype(series, skipna=True) == "string"
+    return pd.api.types.is_string_dtype(series.dtype)
+
+
+def _compact_text(series, string_dtype):
+    n_unique = series.nunique(dropna=True)
+    if n_unique <= CATEGORY_MAX_VALUES and n_unique <= CATEGORY_MAX_RATIO * len(series):
+        return series.astype("category")
+    if string_dtype is not None and series.dtype != string_dtype:
+        return series.astype(string_dtype)
+    return series
+
+
+def _compact_float(series):
+    values = series.to_numpy()
+    small = values.astype("float32")
+    if np.array_equal(small.astype(values.dtype), values, equal_nan=True):
+        return pd.Series(small, index=series.index, name=series.name)
+    return series
+
+
+def compact_series(series, string_dtype=None):
+    """Return ``series`` with the cheapest dtype that keeps every value."""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(dtype):
+        return series
+    if _is_text(series):
+        return _compact_text(series, string_dtype)
+    if pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+        return pd.to_numeric(series, downcast="integer")
+    if pd.api.types.is_float_dtype(dtype) and dtype == np.float64:
+        return _compact_float(series)
+    return series
+
+
+def compact_frame(df):
+    """Convert every column of ``df`` in place to a compact dtype; returns ``df``."""
+    string_dtype = arrow_string_dtype()
+    for col in df.columns:
+        series = df[col]
+        compact = compact_series(series, string_dtype)
+        if compact is not series:
+            df[col] = compact
+    return df
+
+
+def restore_series(series):
+    """Return a numeric ``series`` in its wide dtype (int64 / float64); others unchanged.
+
+    Numeric Categoricals become plain float columns.  Compaction only keeps exact values, so widening restores them.
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        if not pd.api.types.is_numeric_dtype(dtype.categories.dtype):
+            return series
+        return series.astype("float64")
+    if pd.api.types.is_bool_dtype(dtype) or not isinstance(dtype, np.dtype):
+        return series
+    if pd.api.types.is_signed_integer_dtype(dtype) and dtype != np.int64:
+        return series.astype("int64")
+    if pd.api.types.is_unsigned_integer_dtype(dtype) and dtype.itemsize < 8:
+        return series.astype("int64")
+    if pd.api.types.is_float_dtype(dtype) and dtype != np.float64:
+        return series.astype("float64")
+    return series
+
+
+def restore_frame(df):
+    """Shallow copy of ``df`` with every numeric column in its wide dtype."""
+    restored = df.copy(deep=False)
+    for col in restored.columns:
+        series = restored[col]
+        wide = restore_series(series)
+        if wide is not series:
+            restored[col] = wide
+    return restored
@@ -0,0 +1,300 @@
+"""Pre-aggregated summary cube of the derived columns.
+
+Users download the full converted frame mostly to pivot it: rows per date
+× hour slot, durations per group × bucket.  :func:`build_cube` computes
+those summaries once, in a single sort-based pass per measure, into a
+:class:`SummaryCube` that is a few thousand rows instead of millions:
+
+* ``cells`` - one row per ``(measure, date, slot, group)`` with ``count``,
+  ``sum``, ``min``, ``max`` and the requested percentiles (a measure
+  without values, like a split column in app.py, only counts rows);
+* ``histogram`` - per cell, the number of values in each fixed-width bin
+  (the bucket width), i.e. the group × duration bucket pivot.
+
+:meth:`SummaryCube.slice` filters and rolls the cells up along any of the
+dimensions without the raw rows.  Count, mean, min and max roll up
+exactly.  Percentiles are exact at full cell grain; rolled-up percentiles
+are interpolated from the merged histograms and so are accurate to
+within one bin width.
+"""
+import numpy as np
+import pandas as pd
+
+from dateconverts.buckets import DEFAULT_BUCKET_WIDTH
+from dateconverts.splitter import minute_of_day, slot_labels
+
+DATE_DIM = "Date"
+SLOT_DIM = "Hour_Slot"
+STAT_COLUMNS = ("count", "sum", "min", "max")
+
+
+def percentile_column(p):
+    return f"P{p:g}"
+
+
+def _codes(values):
+    """Integer codes (-1 = missing) and levels of one dimension, in level order.
+
+    Categorical levels are returned as a CategoricalIndex so the cells keep
+    the category order (e.g. hour slots in time order).
+    """
+    if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.array
+    if isinstance(values, pd.Categorical):
+        return values.codes.astype("int64"), pd.CategoricalIndex(values.categories, values.categories,
+                                                                 ordered=values.ordered)
+    codes, levels = pd.factorize(pd.Series(values), sort=True)
+    return codes.astype("int64"), levels
+
+
+def _cells_frame(measure, dims, levels, cell_keys):
+    """Decode mixed-radix cell keys back into one column per dimension."""
+    columns = {}
+    keys = cell_keys.copy()
+    for dim, lv in zip(reversed(dims), reversed(levels)):
+        columns[dim] = lv.take(keys % len(lv))
+        keys //= len(lv)
+    frame = pd.DataFrame({dim: columns[dim] for dim in dims})
+    frame.insert(0, "measure", pd.Categorical([measure] * len(frame)))
+    return frame
+
+
+def measure_cells(measure, dims, values=None, percentiles=(), bin_width=DEFAULT_BUCKET_WIDTH):
+    """Cells and histogram of one measure.
+
+    ``dims`` maps dimension name -> per-row labels (Series / Categorical);
+    ``values`` are the per-row numbers to summarize, or None to only count
+    rows.  Rows with a missing dimension label or value are left out.
+    Returns ``(cells, histogram)`` as in :class:`SummaryCube`.
+    """
+    names = list(dims)
+    key = None
+    levels = []
+    for name in names:
+        codes, lv = _codes(dims[name])
+        levels.append(lv)
+        valid = codes >= 0 if key is None else valid & (codes >= 0)
+        key = codes if key is None else key * len(lv) + codes
+    if values is not None:
+        v = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        valid &= ~np.isnan(v)
+        v = v[valid]
+    key = key[valid]
+
+    if values is None:
+        cell_keys, counts = np.unique(key, return_counts=True)
+        cells = _cells_frame(measure, names, levels, cell_keys)
+        cells["count"] = counts
+        for col in STAT_COLUMNS[1:]:
+            cells[col] = np.nan
+        return cells, None
+
+    # One sort by (cell, value): every statistic is then read off the
+    # cell boundaries of the sorted values
+    order = np.lexsort((v, key))
+    key, v = key[order], v[order]
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else np.array([], dtype="int64")
+    counts = np.diff(np.r_[starts, len(key)])
+    ends = starts + counts - 1
+
+    cells = _cells_frame(measure, names, levels, key[starts])
+    cells["count"] = counts
+    cells["sum"] = np.add.reduceat(v, starts) if len(starts) else np.array([], dtype="float64")
+    cells["min"] = v[starts]
+    cells["max"] = v[ends]
+    for p in percentiles:
+        # Linear interpolation, as pandas' quantile
+        pos = starts + (counts - 1) * (p / 100)
+        lo = np.floor(pos).astype("int64")
+        hi = np.minimum(lo + 1, ends)
+        cells[percentile_column(p)] = v[lo] + (v[hi] - v[lo]) * (pos - lo)
+
+    bins = np.floor(v / bin_width).astype("int64")
+    cell_index = np.repeat(np.arange(len(starts)), counts)
+    first_bin = bins.min() if len(bins) else 0
+    span = (bins.max() - first_bin + 1) if len(bins) else 1
+    pairs, bin_counts = np.unique(cell_index * span + (bins - first_bin), return_counts=True)
+    histogram = pd.DataFrame({"cell": pairs // span, "bin": pairs % span + first_bin, "count": bin_counts},
+                             dtype="int32")
+    return cells, histogram
+
+
+class SummaryCube:
+    """Summary statistics per ``(measure, *dims)`` cell plus per-cell value histograms."""
+
+    def __init__(self, cells, histogram, dims, percentiles, bin_width=DEFAULT_BUCKET_WIDTH, exact=True):
+        self.cells = cells
+        self.histogram = histogram  # cell (row of cells), bin, count; None if no measure has values
+        self.dims = list(dims)
+        self.percentiles = list(percentiles)
+        self.bin_width = bin_width
+        self.exact = exact          # stored cell percentiles are exact (not merged from parts)
+
+    def __len__(self):
+        return len(self.cells)
+
+    @property
+    def nbytes(self):
+        size = self.cells.memory_usage(index=True, deep=True).sum()
+        if self.histogram is not None:
+            size += self.histogram.memory_usage(index=True).sum()
+        return int(size)
+
+    @property
+    def measures(self):
+        return list(pd.unique(self.cells["measure"]))
+
+    def levels(self, dim):
+        """The distinct labels of ``dim`` (or ``"measure"``), in order."""
+        return list(self.cells[dim].drop_duplicates().sort_values())
+
+    def _filtered(self, filters):
+        cells = self.cells
+        for dim, keep in (filters or {}).items():
+            if keep:
+                cells = cells[cells[dim].isin(keep)]
+        return cells
+
+    def slice(self, by=None, filters=None, decimals=2):
+        """Statistics per ``measure`` and the ``by`` dimensions, over the cells matching ``filters``.
+
+        ``filters`` maps dimension -> labels to keep.  Dimensions not in
+        ``by`` are rolled up.
+        """
+        by = ["measure"] + [dim for dim in self.dims if dim in (by if by is not None else self.dims)]
+        cells = self._filtered(filters)
+        p_cols = [percentile_column(p) for p in self.percentiles]
+        if self.exact and len(by) == len(self.dims) + 1:
+            table = cells[by + list(STAT_COLUMNS) + p_cols].reset_index(drop=True)
+        else:
+            table = cells.groupby(by, observed=True, sort=True).agg(
+                count=("count", "sum"), sum=("sum", "sum"), min=("min", "min"), max=("max", "max")
+            ).reset_index()
+            for col, values in zip(p_cols, self._histogram_percentiles(cells, by, table)):
+                table[col] = values
+        table.insert(len(by) + 1, "mean", table["sum"] / table["count"].where(table["min"].notna()))
+        table = table.drop(columns="sum")
+        stats = ["mean", "min", "max"] + p_cols
+        if self.histogram is None:
+            # Row counts only
+            return table.drop(columns=stats)
+        table[stats] = table[stats].round(decimals)
+        return table
+
+    def _histogram_percentiles(self, cells, by, table):
+        """Percentiles of each ``table`` row interpolated from the merged cell histograms."""
+        results = [np.full(len(table), np.nan) for _ in self.percentiles]
+        if self.histogram is None or not self.percentiles or table.empty:
+            return results
+        row_of = cells[by].reset_index(names="cell").merge(table[by].reset_index(names="row"), on=by)
+        hist = self.histogram.merge(row_of[["cell", "row"]], on="cell")
+        merged = hist.groupby(["row", "bin"], sort=True)["count"].sum().reset_index()
+        bounds = table[["min", "max"]].to_numpy()
+        for row, group in merged.groupby("row", sort=False):
+            bins = group["bin"].to_numpy()
+            counts = group["count"].to_numpy()
+            cumulative = np.cumsum(counts)
+            for result, p in zip(results, self.percentiles):
+                rank = (cumulative[-1] - 1) * p / 100
+                i = np.searchsorted(cumulative, rank, side="right")
+                within = (rank - (cumulative[i] - counts[i]) + 0.5) / counts[i]
+                result[row] = np.clip((bins[i] + within) * self.bin_width, *bounds[row])
+        return results
+
+    def bucket_counts(self, by=None, filters=None):
+        """Value counts per bin (columns, labelled by the bin's lower edge) per ``measure`` and ``by``."""
+        by = ["measure"] + [dim for dim in self.dims if dim in (by if by is not None else self.dims)]
+        if self.histogram is None:
+            return pd.DataFrame(columns=by)
+        cells = self._filtered(filters)
+        hist = self.histogram.merge(cells[by].reset_index(names="cell"), on="cell")
+        hist["bucket"] = (hist["bin"] * self.bin_width).round(6)
+        table = hist.pivot_table(index=by, columns="bucket", values="count", aggfunc="sum", fill_value=0,
+                                 observed=True)
+        table.columns = [f"{edge:g}–{edge + self.bin_width:g}" for edge in table.columns]
+        return table.reset_index()
+
+    @classmethod
+    def concat(cls, cubes):
+        """Merge cubes of parts of the same data (e.g. the chunks of a streamed file).
+
+        Cells present in several parts are combined: counts, sums, minima and
+        maxima exactly, percentiles from the merged histograms from then on.
+        """
+        cubes = [cube for cube in cubes if cube is not None]
+        first = cubes[0]
+        if len(cubes) == 1:
+            return first
+        by = ["measure"] + first.dims
+        offset, cells, histograms = 0, [], []
+        for cube in cubes:
+            cells.append(cube.cells[by + list(STAT_COLUMNS)].reset_index(drop=True))
+            if cube.histogram is not None:
+                hist = cube.histogram.copy()
+                hist["cell"] += offset
+                histograms.append(hist)
+            offset += len(cube.cells)
+        parts = pd.concat(cells, ignore_index=True)
+        groups = parts.groupby(by, observed=True, sort=True, dropna=False)
+        merged = groups.agg(count=("count", "sum"), sum=("sum", "sum"), min=("min", "min"),
+                            max=("max", "max")).reset_index()
+        merged.loc[merged["min"].isna(), "sum"] = np.nan
+        histogram = None
+        if histograms:
+            cell_of = groups.ngroup().to_numpy()
+            histogram = pd.concat(histograms, ignore_index=True)
+            histogram["cell"] = cell_of[histogram["cell"].to_numpy()]
+            histogram = histogram.groupby(["cell", "bin"], sort=True)["count"].sum().reset_index()
+        cube = cls(merged, histogram, first.dims, first.percentiles, first.bin_width, exact=False)
+        for col, values in zip(map(percentile_column, cube.percentiles),
+                               cube._histogram_percentiles(merged, by, merged)):
+            merged[col] = values
+        return cube
+
+
+def build_cube(measures, percentiles=(), bin_width=DEFAULT_BUCKET_WIDTH):
+    """Build a :class:`SummaryCube` from ``{measure: (dims, values)}``.
+
+    Every measure must use the same dimension names (see :func:`measure_cells`).
+    """
+    cells, histograms, dims, offset = [], [], None, 0
+    for measure, (measure_dims, values) in measures.items():
+        dims = list(measure_dims) if dims is None else dims
+        if list(measure_dims) != dims:
+            raise ValueError(f"Measure {measure!r} has dimensions {list(measure_dims)}, expected {dims}")
+        part, histogram = measure_cells(measure, measure_dims, values, percentiles, bin_width)
+        if histogram is not None:
+            histogram["cell"] += offset
+            histograms.append(histogram)
+        cells.append(part)
+        offset += len(part)
+    if not cells:
+        raise ValueError("A summary cube needs at least one measure")
+    cells = pd.concat(cells, ignore_index=True)
+    cells["measure"] = cells["measure"].astype("category")
+    for col in map(percentile_column, percentiles):
+        if col not in cells:
+            cells[col] = np.nan
+    histogram = pd.concat(histograms, ignore_index=True) if histograms else None
+    return SummaryCube(cells, histogram, dims, percentiles, bin_width)
+
+
+def split_measures(df, columns, group_col=None):
+    """Row-count measures of app.py's split columns: one per column, by its ``_Date`` / ``_Hour_Slot``."""
+    measures = {}
+    for col in columns:
+        dims = {DATE_DIM: df[col + "_Date"], SLOT_DIM: df[col + "_Hour_Slot"]}
+        if group_col:
+            dims[group_col] = df[group_col]
+        measures[col] = (dims, None)
+    return measures
+
+
+def time_dims(parsed, slot_minutes=60):
+    """Date and hour slot dimensions of a parsed datetime column."""
+    minutes = minute_of_day(parsed)
+    slots = np.where(minutes >= 0, minutes // slot_minutes, -1)
+    return {
+        DATE_DIM: parsed.dt.normalize(),
+        SLOT_DIM: pd.Categorical.from_codes(slots, categories=slot_labels(slot_minutes), ordered=True),
+    }
@@ -0,0 +1,58 @@
+"""Vectorized duration helpers for start/end timestamp pairs.
+
+The apps report durations in an "hour.minute" (60-minute) format where
+``4.30`` means 4 hours 30 minutes.  Everything here works on whole
+arrays, so NaT rows simply come out as NaN.
+"""
+import numpy as np
+import pandas as pd
+
+# Output formats supported by compute_duration()
+DURATION_UNITS = ("hhmm", "hours", "minutes", "timedelta")
+
+
+def to_60min_format(hours):
+    """Convert decimal hours to the H.MM (60-minute) format.
+
+    Matches the original per-row ``convert_to_60min_format`` exactly:
+    hours are truncated toward zero, the remainder is rounded to whole
+    minutes (half-to-even) and the result is ``hrs + mins / 100`` rounded
+    to 2 decimals.  Missing values stay NaN.
+    """
+    values = np.asarray(hours, dtype="float64")
+    hrs = np.trunc(values)
+    mins = np.round((values - hrs) * 60)
+    # (hrs*100 + mins) / 100 is the correctly rounded 2-decimal value, which
+    # is what round(hrs + mins / 100, 2) produced; "+ 0.0" turns -0.0 into 0.0
+    result = (hrs * 100 + mins) / 100 + 0.0
+    if isinstance(hours, pd.Series):
+        return pd.Series(result, index=hours.index, name=hours.name)
+    return result
+
+
+def compute_duration(start_time, end_time, unit="hhmm"):
+    """Return ``end_time - start_time`` in the requested ``unit``.
+
+    ``start_time`` / ``end_time`` are datetime Series (already parsed).
+    ``unit`` is one of ``DURATION_UNITS``:
+
+    * ``"hhmm"``      - 60-minute format, e.g. 4.30 for 4h 30m
+    * ``"hours"``     - decimal hours
+    * ``"minutes"``   - total minutes
+    * ``"timedelta"`` - pandas timedelta
+    """
+    if unit not in DURATION_UNITS:
+        raise ValueError(f"Unknown duration unit {unit!r}, expected one of {DURATION_UNITS}")
+
+    delta = end_time - start_time
+    if unit == "timedelta":
+        return delta
+
+    seconds = delta.dt.total_seconds()
+    if unit == "minutes":
+        return seconds / 60
+
+    diff_hours = seconds / 3600
+    if unit == "hours":
+        return diff_hours
+    return to_60min_format(diff_hours)
@@ -0,0 +1,242 @@
+"""Lazy, cached exports of the processed frame (CSV, gzip CSV, XLSX, Parquet).
+
+Exports are only built when the user asks for one, written to a temp
+file, and cached against a version stamp of the frame: asking again for
+the same format of an unchanged frame reuses the file.  The apps assign a
+fresh stamp (:func:`new_version`) whenever the frame changes.  The
+files of all sessions share one size budget and are removed some time
+after their last use (see :class:`ExportCache`).
+
+XLSX is written with xlsxwriter's ``constant_memory`` mode, row by row,
+and frames longer than Excel's row limit are split across several sheets.
+
+Parquet is only offered when pyarrow is installed.  Its columns get
+back the dtypes they had before compaction (see
+:func:`dateconverts.compact.restore_frame`).
+
+Configuration (environment variables):
+
+* ``DATECONVERTS_EXPORT_MB`` - size budget of all export files (default 2048)
+* ``DATECONVERTS_EXPORT_TTL_MINUTES`` - time after its last use that an
+  export file is removed (default 60)
+"""
+import importlib.util
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from dateconverts.compact import restore_frame
+
+EXCEL_MAX_ROWS = 1_048_576  # rows per sheet, header included
+XLSX_CHUNK_ROWS = 50_000    # rows converted to Python objects at a time
+
+EXPORT_FORMATS = {
+    "csv": {"label": "CSV", "extension": "csv", "mime": "text/csv"},
+    "csv.gz": {"label": "CSV (gzip)", "extension": "csv.gz", "mime": "application/gzip"},
+    "xlsx": {
+        "label": "Excel",
+        "extension": "xlsx",
+        "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    },
+}
+if importlib.util.find_spec("pyarrow") is not None:
+    EXPORT_FORMATS["parquet"] = {"label": "Parquet", "extension": "parquet", "mime": "application/octet-stream"}
+
+
+def new_version():
+    """A fresh version stamp for a frame that has just changed."""
+    return uuid.uuid4().hex
+
+
+def _excel_ready(chunk):
+    """Convert a chunk to plain Python values xlsxwriter can write."""
+    chunk = chunk.copy()
+    for col in chunk.columns:
+        dtype = chunk[col].dtype
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            chunk[col] = chunk[col].dt.tz_localize(None)
+        elif isinstance(dtype, pd.CategoricalDtype):
+            chunk[col] = chunk[col].astype(object)
+    values = chunk.astype(object)
+    return values.where(chunk.notna(), None)
+
+
+def write_xlsx(df, path, sheet_name="Processed_Data"):
+    """Write ``df`` to ``path`` in constant memory; returns the sheet names.
+
+    Frames with more rows than one sheet can hold continue on
+    ``<sheet_name>_2``, ``<sheet_name>_3``, ... each with its own header.
+    """
+    import xlsxwriter
+
+    rows_per_sheet = EXCEL_MAX_ROWS - 1
+    sheets = []
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "nan_inf_to_errors": True})
+    try:
+        date_format = workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"})
+        header = [str(c) for c in df.columns]
+        n_sheets = max(1, -(-len(df) // rows_per_sheet))
+        for s in range(n_sheets):
+            name = sheet_name if s == 0 else f"{sheet_name}_{s + 1}"
+            worksheet = workbook.add_worksheet(name)
+            worksheet.write_row(0, 0, header)
+            sheets.append(name)
+
+            sheet_rows = df.iloc[s * rows_per_sheet:(s + 1) * rows_per_sheet]
+            row = 1
+            for start in range(0, len(sheet_rows), XLSX_CHUNK_ROWS):
+                chunk = _excel_ready(sheet_rows.iloc[start:start + XLSX_CHUNK_ROWS])
+                for values in chunk.itertuples(index=False, name=None):
+                    for c, value in enumerate(values):
+                        if value is None:
+                            continue
+                        if isinstance(value, pd.Timestamp):
+                            worksheet.write_datetime(row, c, value.to_pydatetime(), date_format)
+                        elif isinstance(value, (str, bool, int, float, np.number, np.bool_)):
+                            worksheet.write(row, c, value)
+                        else:
+                            worksheet.write(row, c, str(value))
+                    row += 1
+    finally:
+        workbook.close()
+    return sheets
+
+
+def write_parquet(df, path):
+    # Parquet keeps dtypes: write percentile columns as floats and
+    # downcast numbers at their original width
+    df = restore_frame(df)
+    try:
+        df.to_parquet(path, index=False)
+    except (TypeError, ValueError, OverflowError):
+        # pyarrow can't store object columns holding mixed types; write
+        # those as text instead
+        fixed = df.copy()
+        for col in fixed.columns[fixed.dtypes == object]:
+            fixed[col] = fixed[col].astype("string")
+        fixed.to_parquet(path, index=False)
+
+
+def write_export(df, fmt, path):
+    """Write ``df`` to ``path`` in export format ``fmt``."""
+    if fmt not in EXPORT_FORMATS:
+        if fmt == "parquet":
+            raise ValueError("Parquet export needs pyarrow (pip install pyarrow)")
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {list(EXPORT_FORMATS)}")
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "csv.gz":
+        df.to_csv(path, index=False, compression="gzip")
+    elif fmt == "xlsx":
+        write_xlsx(df, path)
+    else:
+        write_parquet(df, path)
+
+
+def export_bytes(df, fmt):
+    """``df`` in export format ``fmt`` as bytes, for small frames such as summaries."""
+    fd, path = tempfile.mkstemp(suffix="." + EXPORT_FORMATS[fmt]["extension"])
+    os.close(fd)
+    try:
+        write_export(df, fmt, path)
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+class ExportCache:
+    """Temp-file exports keyed by ``(version, format)``, removed by age and total size.
+
+    An export counts as used when it is built and each time it is looked
+    up (:meth:`get`).  Exports unused for ``ttl_seconds`` are removed, then
+    the least recently used ones until the files total at most
+    ``max_bytes``.  The export being built or looked up is never removed,
+    and no count limit applies, so other sessions exporting does not
+    evict a file its session is about to download.
+    """
+
+    def __init__(self, max_bytes=2048 * 1024 * 1024, ttl_seconds=60 * 60, directory=None, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.directory = directory or tempfile.mkdtemp(prefix="dateconverts_exports_")
+        self._clock = clock
+        self._entries = OrderedDict()  # (version, fmt) -> [path, nbytes, last_used], least recently used first
+        self._total = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total(self):
+        """Bytes held by all export files."""
+        return self._total
+
+    def get(self, version, fmt):
+        key = (version, fmt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not os.path.exists(entry[0]):
+                self._forget(key)
+                return None
+            entry[2] = self._clock()
+            self._entries.move_to_end(key)
+            self._cleanup(keep=key)
+            return entry[0]
+
+    def export(self, df, version, fmt):
+        """Return the export file for this frame version, building it if needed."""
+        path = self.get(version, fmt)
+        if path is not None:
+            return path
+
+        extension = EXPORT_FORMATS[fmt]["extension"]
+        path = os.path.join(self.directory, f"{version}.{extension}")
+        tmp_path = f"{path}.tmp"
+        try:
+            write_export(df, fmt, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        key = (version, fmt)
+        with self._lock:
+            if key in self._entries:
+                self._forget(key)
+            self._entries[key] = [path, os.path.getsize(path), self._clock()]
+            self._total += self._entries[key][1]
+            self._cleanup(keep=key)
+        return path
+
+    def _forget(self, key):
+        path, nbytes, _ = self._entries.pop(key)
+        self._total -= nbytes
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _cleanup(self, keep):
+        expired_before = self._clock() - self.ttl_seconds
+        for key in [k for k, (_, _, used) in self._entries.items() if k != keep and used < expired_before]:
+            self._forget(key)
+        for key in [k for k in self._entries if k != keep]:
+            if self._total <= self.max_bytes:
+                break
+            self._forget(key)
+
+
+def _default_exports_from_env():
+    return ExportCache(
+        max_bytes=int(os.environ.get("DATECONVERTS_EXPORT_MB", "2048")) * 1024 * 1024,
+        ttl_seconds=float(os.environ.get("DATECONVERTS_EXPORT_TTL_MINUTES", "60")) * 60,
+    )
+
+
+# Shared by every session of the server process
+default_exports = _default_exports_from_env()
@@ -0,0 +1,559 @@
+"""Upload ingestion with a content-hash keyed frame cache.
+
+Streamlit re-runs the whole script on every widget interaction, so the
+uploaded file used to be parsed again on every click.  Here each upload
+is keyed by a hash of its bytes (plus the sheet name) and parsed once;
+later reruns get the cached frame back.
+
+The cache is bounded by the in-memory size of the frames and evicts the
+least recently used entry first.  When a spill directory is configured,
+evicted frames are written to Parquet/Feather and reloaded from there
+instead of re-parsing the original upload; the spill files have their
+own size budget and the least recently used ones are removed first.
+The small per-upload lookups (digests, sheet names, headers, previews)
+are kept for the ``MAX_UPLOADS`` most recent uploads.
+
+Wide uploads can be loaded in two phases: :func:`upload_columns` reads
+the column names, then :func:`load_columns` / :func:`project_upload`
+read just the columns the user picked (each column cached on its own),
+and :func:`with_all_columns` joins the remaining columns back for the
+export.
+
+Parsed columns are converted to compact dtypes (see
+:mod:`dateconverts.compact`) before they are cached.
+
+Configuration (environment variables):
+
+* ``DATECONVERTS_CACHE_MB``   - memory budget for cached frames (default 1024)
+* ``DATECONVERTS_SPILL_DIR``  - directory for spilled frames (default: no spill)
+* ``DATECONVERTS_SPILL_FORMAT`` - ``parquet`` (default) or ``feather``
+* ``DATECONVERTS_SPILL_MB``   - size budget for the spill files (default 4096)
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from dateconverts.compact import compact_frame
+
+SPILL_FORMATS = ("parquet", "feather")
+MAX_UPLOADS = 256  # uploads whose digest / sheet names / header / previews are remembered
+
+
+def frame_nbytes(df):
+    """Approximate in-memory size of ``df`` in bytes."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class LRUDict:
+    """Thread-safe mapping that keeps only the ``max_entries`` most recently used keys."""
+
+    def __init__(self, max_entries=MAX_UPLOADS):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __getitem__(self, key):
+        with self._lock:
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class FrameCache:
+    """Thread-safe LRU cache of DataFrames bounded by memory size."""
+
+    def __init__(self, max_bytes=1024 * 1024 * 1024, spill_dir=None, spill_format="parquet",
+                 max_spill_bytes=4096 * 1024 * 1024):
+        if spill_format not in SPILL_FORMATS:
+            raise ValueError(f"Unknown spill format {spill_format!r}, expected one of {SPILL_FORMATS}")
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.spill_format = spill_format
+        self.max_spill_bytes = max_spill_bytes
+        self._frames = OrderedDict()  # key -> (frame, nbytes)
+        self._total = 0
+        self._spilled = OrderedDict()  # key -> file size, least recently used first
+        self._spill_total = 0
+        self._lock = threading.Lock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            self._scan_spill_dir()
+
+    @property
+    def nbytes(self):
+        return self._total
+
+    @property
+    def spill_nbytes(self):
+        return self._spill_total
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._frames or self._spill_path_if_exists(key) is not None
+
+    def get(self, key):
+        """Return the cached frame for ``key`` or ``None``."""
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is not None:
+                self._frames.move_to_end(key)
+                return entry[0]
+            path = self._spill_path_if_exists(key)
+            if path is not None:
+                self._spilled.move_to_end(key)
+        if path is None:
+            return None
+        df = self._read_spill(path)
+        if df is not None:
+            self.put(key, df)
+        return df
+
+    def put(self, key, df):
+        """Store ``df`` under ``key``, evicting old entries when over budget."""
+        nbytes = frame_nbytes(df)
+        with self._lock:
+            old = self._frames.pop(key, None)
+            if old is not None:
+                self._total -= old[1]
+            self._frames[key] = (df, nbytes)
+            self._total += nbytes
+            evicted = self._evict()
+        if self.spill_dir:
+            for old_key, old_df in evicted:
+                self._write_spill(old_key, old_df)
+        return [old_key for old_key, _ in evicted]
+
+    def invalidate(self, key):
+        """Forget ``key``, in memory and on disk."""
+        with self._lock:
+            old = self._frames.pop(key, None)
+            if old is not None:
+                self._total -= old[1]
+            if key in self._spilled:
+                self._remove_spill(key)
+
+    def clear(self):
+        """Forget every frame, removing the spill files as well."""
+        with self._lock:
+            self._frames.clear()
+            self._total = 0
+            for key in list(self._spilled):
+                self._remove_spill(key)
+
+    def _evict(self):
+        # Always keep the newest entry, even if it alone is over budget
+        evicted = []
+        while self._total > self.max_bytes and len(self._frames) > 1:
+            key, (df, nbytes) = self._frames.popitem(last=False)
+            self._total -= nbytes
+            evicted.append((key, df))
+        return evicted
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, f"{key}.{self.spill_format}")
+
+    def _spill_path_if_exists(self, key):
+        if not self.spill_dir or key not in self._spilled:
+            return None
+        path = self._spill_path(key)
+        return path if os.path.exists(path) else None
+
+    def _scan_spill_dir(self):
+        # Keys are content hashes, so files from an earlier run are still
+        # valid; they are adopted, oldest first
+        suffix = "." + self.spill_format
+        found = []
+        for entry in os.scandir(self.spill_dir):
+            if entry.is_file() and entry.name.endswith(suffix):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[:-len(suffix)], stat.st_size))
+        with self._lock:
+            for _, key, size in sorted(found):
+                self._spilled[key] = size
+                self._spill_total += size
+            self._evict_spill()
+
+    def _remove_spill(self, key):
+        self._spill_total -= self._spilled.pop(key)
+        try:
+            os.remove(self._spill_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict_spill(self):
+        # Unlike frames in memory, the newest file may go too if it alone is over budget
+        while self._spill_total > self.max_spill_bytes and self._spilled:
+            self._remove_spill(next(iter(self._spilled)))
+
+    def _write_spill(self, key, df):
+        with self._lock:
+            if key in self._spilled:
+                self._spilled.move_to_end(key)
+                return
+        path = self._spill_path(key)
+        tmp_path = path + ".tmp"
+        try:
+            if self.spill_format == "parquet":
+                df.to_parquet(tmp_path, index=False)
+            else:
+                df.reset_index(drop=True).to_feather(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            # Spilling is best effort: mixed-type object columns or a missing
+            # pyarrow install simply mean the frame stays memory-only
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self._lock:
+            size = os.path.getsize(path)
+            self._spill_total += size - self._spilled.pop(key, 0)
+            self._spilled[key] = size
+            self._evict_spill()
+
+    def _read_spill(self, path):
+        try:
+            if self.spill_format == "parquet":
+                return pd.read_parquet(path)
+            return pd.read_feather(path)
+        except Exception:
+            return None
+
+
+def _default_cache_from_env():
+    max_mb = int(os.environ.get("DATECONVERTS_CACHE_MB", "1024"))
+    return FrameCache(
+        max_bytes=max_mb * 1024 * 1024,
+        spill_dir=os.environ.get("DATECONVERTS_SPILL_DIR") or None,
+        spill_format=os.environ.get("DATECONVERTS_SPILL_FORMAT", "parquet"),
+        max_spill_bytes=int(os.environ.get("DATECONVERTS_SPILL_MB", "4096")) * 1024 * 1024,
+    )
+
+
+# Module globals survive Streamlit reruns, so this cache is shared by every
+# rerun (and every session) of the server process
+default_cache = _default_cache_from_env()
+
+# Hashing a large upload is the only per-rerun cost left, so digests are
+# remembered per uploaded file id.  These lookups are tiny next to the
+# frames, so they are bounded by count rather than by size
+_digests = LRUDict()
+_sheet_names = LRUDict()
+_headers = LRUDict()
+_previews = LRUDict()
+
+
+def upload_digest(uploaded_file):
+    """Return a content hash of an uploaded file (Streamlit UploadedFile or file-like)."""
+    file_id = getattr(uploaded_file, "file_id", None)
+    digest = None if file_id is None else _digests.get(file_id)
+    if digest is not None:
+        return digest
+    data = uploaded_file.getvalue()
+    digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+    if file_id is not None:
+        _digests[file_id] = digest
+    return digest
+
+
+def upload_key(uploaded_file, sheet_name=None):
+    """Cache key for an upload: content hash plus the selected sheet."""
+    digest = upload_digest(uploaded_file)
+    if sheet_name is None:
+        return digest
+    sheet = hashlib.blake2b(str(sheet_name).encode("utf-8"), digest_size=6).hexdigest()
+    return f"{digest}-{sheet}"
+
+
+def is_csv(uploaded_file):
+    return uploaded_file.name.lower().endswith(".csv")
+
+
+def upload_sheet_names(uploaded_file):
+    """Sheet names of an uploaded workbook, read once per upload."""
+    digest = upload_digest(uploaded_file)
+    names = _sheet_names.get(digest)
+    if names is None:
+        with pd.ExcelFile(BytesIO(uploaded_file.getvalue())) as xls:
+            names = _sheet_names[digest] = list(xls.sheet_names)
+    return names
+
+
+def parse_upload(uploaded_file, sheet_name=None):
+    """Parse an uploaded CSV/XLSX into a compact DataFrame (no caching)."""
+    data = BytesIO(uploaded_file.getvalue())
+    if is_csv(uploaded_file):
+        return compact_frame(pd.read_csv(data))
+    return compact_frame(pd.read_excel(data, sheet_name=0 if sheet_name is None else sheet_name))
+
+
+def load_upload(uploaded_file, sheet_name=None, cache=None):
+    """Return the parsed frame for an upload, parsing it only on first use.
+
+    The returned frame is a shallow copy of the cached one, so callers may
+    add or drop columns without corrupting the cache.
+    """
+    cache = default_cache if cache is None else cache
+    key = upload_key(uploaded_file, sheet_name)
+    df = cache.get(key)
+    if df is None:
+        df = parse_upload(uploaded_file, sheet_name)
+        cache.put(key, df)
+    return df.copy(deep=False)
+
+
+def _sheet_arg(sheet_name):
+    return 0 if sheet_name is None else sheet_name
+
+
+def upload_columns(uploaded_file, sheet_name=None):
+    """Column names of an upload, read from its header row only (phase 1).
+
+    Names are the ones ``read_csv`` / ``read_excel`` would give the full
+    frame (``Unnamed: 3``, ``dup.1``, ...).  For workbooks the width comes
+    from the sheet's stored dimension (see :func:`_xlsx_header`); the first
+    projection corrects the names if the rows turn out wider or narrower.
+    """
+    key = upload_key(uploaded_file, sheet_name)
+    header = _headers.get(key)
+    if header is None:
+        data = BytesIO(uploaded_file.getvalue())
+        if is_csv(uploaded_file):
+            header = list(pd.read_csv(data, nrows=0).columns)
+        else:
+            header = _xlsx_header(data, sheet_name)
+        _headers[key] = header
+    return header
+
+
+def upload_preview(uploaded_file, sheet_name=None, nrows=5):
+    """The first ``nrows`` rows of an upload, without reading the rest."""
+    key = (upload_key(uploaded_file, sheet_name), nrows)
+    preview = _previews.get(key)
+    if preview is None:
+        data = BytesIO(uploaded_file.getvalue())
+        if is_csv(uploaded_file):
+            preview = pd.read_csv(data, nrows=nrows)
+        else:
+            preview = pd.read_excel(data, sheet_name=_sheet_arg(sheet_name), nrows=nrows)
+        _previews[key] = preview
+    return preview
+
+
+@contextmanager
+def _xlsx_sheet(data, sheet_name):
+    """Yield a read-only sheet and the column count of its stored dimension."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(data, read_only=True, data_only=True, keep_links=False)
+    try:
+        if sheet_name is None:
+            sheet = workbook.worksheets[0]
+        elif isinstance(sheet_name, int):
+            sheet = workbook.worksheets[sheet_name]
+        else:
+            sheet = workbook[sheet_name]
+        stored_width = sheet.max_column  # None for an unsized sheet
+        # As read_excel does: the stored dimensions may be wrong, so they
+        # do not bound the rows that are read
+        sheet.reset_dimensions()
+        yield sheet, stored_width
+    finally:
+        workbook.close()
+
+
+def _is_empty(value):
+    return value is None or value == ""
+
+
+def _cell_value(value):
+    """A cell value (``values_only``) as ``read_excel``'s openpyxl reader converts it.
+
+    Error cells come through as their code (``#DIV/0!``); openpyxl stores
+    any text equal to an error code as an error, so the codes map to NaN.
+    """
+    from openpyxl.cell.cell import ERROR_CODES
+
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else value
+    if isinstance(value, str) and value in ERROR_CODES:
+        return np.nan
+    return value
+
+
+def _row_width(values):
+    """Width of a row of values without its trailing empty cells."""
+    width = len(values)
+    while width and _is_empty(values[width - 1]):
+        width -= 1
+    return width
+
+
+def _header_names(values, width):
+    """``read_excel``'s column names for a header row padded to ``width``."""
+    if not width:
+        return []  # read_excel gives an empty frame
+    values = (list(values) + [""] * width)[:width]
+    return list(TextParser([values], header=0, skip_blank_lines=False).read().columns)
+
+
+def _xlsx_header(data, sheet_name):
+    """Column names ``read_excel`` gives a sheet, reading only its first row.
+
+    ``read_excel`` pads every row to the widest one, so a header shorter
+    than the data gets ``Unnamed: n`` names.  The width is taken from the
+    sheet's stored dimension; only an unsized sheet is scanned for it.
+    """
+    with _xlsx_sheet(data, sheet_name) as (sheet, stored_width):
+        header = [_cell_value(v) for v in next(sheet.iter_rows(max_row=1, values_only=True), ())]
+        width = _row_width(header)
+        if stored_width is None:
+            for values in sheet.iter_rows(min_row=2, values_only=True):
+                width = max(width, _row_width(values))
+        else:
+            width = max(width, stored_width)
+    return _header_names(header, width)
+
+
+def _read_xlsx_columns(data, sheet_name, positions, names):
+    """Frame of the columns at ``positions`` (0-based) below the header row.
+
+    Returns the frame and the sheet's exact column names, found in the
+    same pass.  ``read_excel(usecols=...)`` still converts and stores every
+    cell of every row; here only the selected cells are kept, so memory
+    scales with the selected columns.  The kept rows go through the same
+    ``TextParser`` call as in ``read_excel`` (blank rows kept, default
+    missing values such as ``NA`` / ``N/A`` parsed as NaN, types inferred),
+    so the columns come out as they would from the full read.
+    """
+    rows = []
+    last_row = 0  # rows after the last non-empty one are dropped, like read_excel does
+    with _xlsx_sheet(data, sheet_name) as (sheet, _):
+        values = sheet.iter_rows(values_only=True)
+        header = [_cell_value(v) for v in next(values, ())]
+        width = _row_width(header)
+        for row in values:
+            row_width = _row_width(row)
+            rows.append([_cell_value(row[p]) if p < len(row) else "" for p in positions])
+            if row_width:
+                last_row = len(rows)
+                width = max(width, row_width)
+    del rows[last_row:]
+    header = _header_names(header, width)
+    if not rows:
+        return pd.DataFrame({name: pd.Series(dtype=object) for name in names}), header  # header only
+    return TextParser(rows, header=None, names=list(names), skip_blank_lines=False).read(), header
+
+
+def read_columns(uploaded_file, columns, sheet_name=None):
+    """Read only ``columns`` of an upload, with compact dtypes (phase 2, no caching)."""
+    header = upload_columns(uploaded_file, sheet_name)
+    missing = [c for c in columns if c not in header]
+    if missing:
+        raise KeyError(f"Columns not in the upload: {', '.join(map(str, missing))}")
+    positions = [header.index(c) for c in columns]
+    data = BytesIO(uploaded_file.getvalue())
+    if is_csv(uploaded_file):
+        df = pd.read_csv(data, usecols=positions)
+        df.columns = [header[p] for p in sorted(positions)]
+        return compact_frame(df[list(columns)])
+    df, exact_header = _read_xlsx_columns(data, sheet_name, positions, columns)
+    # The stored dimension only approximates the width; keep the exact names
+    _headers[upload_key(uploaded_file, sheet_name)] = exact_header
+    return compact_frame(df)
+
+
+def _column_key(source_key, column):
+    digest = hashlib.blake2b(str(column).encode("utf-8"), digest_size=8).hexdigest()
+    return f"{source_key}-col-{digest}"
+
+
+def load_columns(uploaded_file, columns, sheet_name=None, cache=None):
+    """Frame with only ``columns`` of an upload, each column parsed once.
+
+    Columns are cached one by one, so choosing another column later only
+    reads that column.  If the whole upload is already cached (see
+    :func:`load_upload`), the columns are taken from it instead.
+    """
+    cache = default_cache if cache is None else cache
+    columns = list(dict.fromkeys(columns))
+    source_key = upload_key(uploaded_file, sheet_name)
+    frames = {c: cache.get(_column_key(source_key, c)) for c in columns}
+    missing = [c for c, frame in frames.items() if frame is None]
+    full = cache.get(source_key) if missing else None
+    if full is not None:
+        # The whole upload was parsed by another page (e.g. the splitter)
+        for c in missing:
+            frames[c] = full[[c]]
+    elif missing:
+        loaded = read_columns(uploaded_file, missing, sheet_name)
+        for c in missing:
+            frames[c] = loaded[[c]]
+            cache.put(_column_key(source_key, c), frames[c])
+    if not columns:
+        return pd.DataFrame()
+    return pd.concat([frames[c] for c in columns], axis=1)
+
+
+def project_upload(uploaded_file, columns, sheet_name=None, previous=None, cache=None):
+    """Add the source ``columns`` missing from ``previous`` (loading only those).
+
+    ``previous`` is the frame from an earlier step with computed columns;
+    they are kept.  Names that are not columns of the upload (e.g. computed
+    ones) are ignored.
+    """
+    header = upload_columns(uploaded_file, sheet_name)
+    have = set() if previous is None else set(previous.columns)
+    missing = [c for c in dict.fromkeys(columns) if c in header and c not in have]
+    if previous is None:
+        return load_columns(uploaded_file, missing, sheet_name, cache)
+    if not missing:
+        return previous
+    loaded = load_columns(uploaded_file, missing, sheet_name, cache)
+    df = previous.copy(deep=False)
+    for c in missing:
+        df[c] = loaded[c]
+    return df
+
+
+def with_all_columns(uploaded_file, df, sheet_name=None, cache=None):
+    """The full upload with the computed columns of ``df`` appended (for export)."""
+    full = load_upload(uploaded_file, sheet_name, cache)
+    if df is None:
+        return full
+    for c in df.columns:
+        if c not in full.columns:
+            full[c] = df[c]
+    return full
@@ -0,0 +1,175 @@
+"""Per-stage timing and memory instrumentation.
+
+Wrap each processing step in ``profiler.stage(...)``::
+
+    with profiler.stage("read_upload") as stage:
+        df = load_upload(uploaded_file)
+        stage.rows = len(df)
+
+Every stage records its wall time, rows processed, rows/sec, the process
+RSS after the stage and how much it grew, and the process peak RSS.  With
+``trace_memory=True`` the peak of Python/NumPy allocations during the
+stage is recorded too (via ``tracemalloc``, which slows the stage down).
+
+Stages may be nested; each records its own time, the outer one including
+the inner ones, and the inner record comes first.  A disabled profiler
+hands out one shared no-op stage, so instrumented code costs a method
+call per stage when profiling is off.
+
+Records are kept in memory (for the apps' sidebar panel and JSON
+download) and, with ``log_path``, appended to that file as JSON lines for
+headless runs.
+
+Configuration (environment variables):
+
+* ``DATECONVERTS_PROFILE_LOG`` - enable profiling in :func:`profiler_from_env`
+  and append the records to this file
+* ``DATECONVERTS_PROFILE_TRACEMALLOC`` - set to ``1`` to also trace allocations
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+MAX_RECORDS = 500
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None if unknown."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes, or None if unknown."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _mb(n_bytes):
+    return None if n_bytes is None else round(n_bytes / 2**20, 2)
+
+
+class _NullStage:
+    """Stage handed out by a disabled profiler; records nothing."""
+
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    def __init__(self, profiler, name, rows):
+        self.profiler = profiler
+        self.name = name
+        self.rows = rows
+        self._traced = False
+
+    def __enter__(self):
+        self._rss = current_rss()
+        # tracemalloc is process-wide: only trace if nobody else is
+        if self.profiler.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._traced = True
+        self._started = self.profiler.clock()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = self.profiler.clock() - self._started
+        traced_peak = None
+        if self._traced:
+            _, traced_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        rss = current_rss()
+        record = {
+            "stage": self.name,
+            "status": "ok" if exc_type is None else "error",
+            "seconds": round(seconds, 4),
+            "rows": self.rows,
+            "rows_per_sec": round(self.rows / seconds) if self.rows and seconds > 0 else None,
+            "rss_mb": _mb(rss),
+            "rss_delta_mb": _mb(rss - self._rss) if rss is not None and self._rss is not None else None,
+            "peak_rss_mb": _mb(peak_rss()),
+            "traced_peak_mb": _mb(traced_peak),
+            "started_at": round(time.time() - seconds, 3),
+        }
+        self.profiler.add(record)
+        return False
+
+
+class Profiler:
+    """Collects one record per instrumented stage."""
+
+    def __init__(self, enabled=True, trace_memory=False, log_path=None, max_records=MAX_RECORDS, context=None,
+                 clock=time.perf_counter):
+        self.enabled = enabled
+        self.clock = clock  # seconds, monotonic
+        self.trace_memory = trace_memory
+        self.log_path = log_path
+        self.context = context or {}  # extra fields added to every record, e.g. the input file
+        self.records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def stage(self, name, rows=None):
+        """Context manager measuring one stage; set ``.rows`` on it if not known up front."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, rows)
+
+    def add(self, record):
+        if self.context:
+            record = {**self.context, **record}
+        with self._lock:
+            self.records.append(record)
+            if self.log_path:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+        logger.debug("stage %(stage)s: %(seconds).3fs, %(rows)s rows", record)
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+
+    def to_json(self):
+        """All records as a JSON document (for downloads)."""
+        with self._lock:
+            return json.dumps(list(self.records), indent=2)
+
+
+def profiler_from_env():
+    """A profiler configured from ``DATECONVERTS_PROFILE_*``; disabled if unset."""
+    log_path = os.environ.get("DATECONVERTS_PROFILE_LOG") or None
+    return Profiler(
+        enabled=log_path is not None,
+        trace_memory=os.environ.get("DATECONVERTS_PROFILE_TRACEMALLOC") == "1",
+        log_path=log_path,
+    )
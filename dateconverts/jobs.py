@@ -0,0 +1,195 @@
+"""Background jobs for long calculations.
+
+A Streamlit script run blocks until the calculation it starts is done,
+and any widget change while it runs starts the run again.  Here the
+calculation is submitted to a small local thread pool instead: the
+script returns immediately, later reruns show the job's progress (and a
+cancel button), and the result is kept on the job until the session
+picks it up.
+
+The pool runs threads rather than processes so jobs share the upload
+caches and frames of the server process; the work inside a job still
+fans out to :mod:`dateconverts.scheduler` pools.
+
+A job function receives its :class:`Job` as first argument.  It reports
+progress with :meth:`Job.report` and raises :class:`JobCancelled` once
+:attr:`Job.cancel_requested` is set (see
+:func:`dateconverts.pipeline.calculate_hours_job`, which passes both as
+callbacks).  Cancellation is cooperative: it takes effect at the next
+stage or finished column / pair.
+
+Each session has at most one job: submitting while one is running
+returns the running job instead of starting a duplicate.
+
+With a ``store`` (:class:`~dateconverts.sessions.SessionStore`), a
+finished job's result is kept in the store until it is taken, so it
+counts against the sessions' memory cap.  A result evicted from there is
+reported by :meth:`JobRunner.take` as a failed job.
+
+Configuration (environment variables):
+
+* ``DATECONVERTS_JOB_WORKERS`` - jobs running at the same time (default 2)
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from dateconverts.sessions import default_sessions, result_nbytes
+
+# Finished jobs whose session never came back are dropped after this long
+FINISHED_JOB_TTL = 30 * 60
+
+RUNNING = ("queued", "running")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function once the job has been cancelled."""
+
+
+class ResultEvicted(Exception):
+    """A finished job's result was evicted to keep the sessions under the memory cap."""
+
+
+class Job:
+    """One background calculation and its progress."""
+
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key              # what was asked for, to tell a rerun of the same job from a new one
+        self.status = "queued"      # queued, running, done, failed, cancelled
+        self.stage = None
+        self.rows_done = 0
+        self.rows_total = 0
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self._cancel = threading.Event()
+
+    @property
+    def running(self):
+        return self.status in RUNNING
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def report(self, stage, rows, done, total):
+        """Progress callback: ``done`` of ``total`` items (columns, pairs) of ``stage`` finished."""
+        self.stage = stage
+        self.rows_total = rows or 0
+        self.rows_done = self.rows_total * done // total if total else self.rows_total
+
+    @property
+    def fraction(self):
+        return self.rows_done / self.rows_total if self.rows_total else 0.0
+
+    def describe(self):
+        if self.status == "queued":
+            return "Waiting for a free worker..."
+        text = f"{self.stage or 'starting'}: {self.rows_done:,} / {self.rows_total:,} rows"
+        return f"{text} (cancelling...)" if self.cancel_requested else text
+
+
+class JobRunner:
+    """Runs jobs on a thread pool, at most one per session token."""
+
+    def __init__(self, max_workers=2, finished_ttl=FINISHED_JOB_TTL, store=None):
+        self.finished_ttl = finished_ttl
+        self.store = store
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dateconverts-job")
+        self._jobs = {}  # session token -> Job
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        """The session's job (running or finished but not yet taken), or None."""
+        with self._lock:
+            self._prune()
+            return self._jobs.get(token)
+
+    def submit(self, token, key, fn, *args, **kwargs):
+        """Start ``fn(job, *args, **kwargs)`` for the session; returns its :class:`Job`.
+
+        If the session already has a running job, that job is returned
+        and nothing new is started (compare ``job.key`` with ``key``).
+        """
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(token)
+            if job is not None and job.running:
+                return job
+            job = Job(key)
+            self._jobs[token] = job
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def take(self, token):
+        """Remove and return the session's job if it has finished, else None."""
+        with self._lock:
+            job = self._jobs.get(token)
+            if job is None or job.running:
+                return None
+            self._jobs.pop(token)
+        if self.store is not None and job.status == "done":
+            job.result = self.store.get(job.id)
+            self.store.drop(job.id)
+            if self.store.was_evicted(job.id):
+                job.status = "failed"
+                job.error = ResultEvicted("the result was released to free server memory, please calculate again")
+        return job
+
+    def cancel(self, token):
+        """Cancel the session's job and forget it (its result is not wanted)."""
+        with self._lock:
+            job = self._jobs.pop(token, None)
+        if job is not None:
+            job.cancel()
+            self._release(job)
+
+    def _release(self, job):
+        if self.store is not None:
+            self.store.drop(job.id)
+            self.store.was_evicted(job.id)
+
+    def _prune(self):
+        now = time.time()
+        for token, job in list(self._jobs.items()):
+            if not job.running and now - job.finished_at > self.finished_ttl:
+                del self._jobs[token]
+                self._release(job)
+
+    def _run(self, job, fn, args, kwargs):
+        status = "cancelled"
+        if not job.cancel_requested:
+            job.status = "running"
+            try:
+                result = fn(job, *args, **kwargs)
+                if self.store is None:
+                    job.result = result
+                else:
+                    # Stored before the job shows as done, so take() finds it
+                    self.store.put(job.id, result, result_nbytes(result))
+                    if job.cancel_requested:
+                        self._release(job)  # cancelled while finishing: nobody takes it
+                status = "done"
+            except JobCancelled:
+                pass
+            except Exception as e:
+                job.error = e
+                status = "failed"
+        job.finished_at = time.time()
+        job.status = status
+
+
+def _default_jobs_from_env():
+    return JobRunner(max_workers=int(os.environ.get("DATECONVERTS_JOB_WORKERS", "2")), store=default_sessions)
+
+
+# Module globals survive Streamlit reruns and are shared by every session
+# of the server process
+default_jobs = _default_jobs_from_env()
@@ -0,0 +1,427 @@
+"""Datetime column parsing with format inference and unique-value memoization.
+
+``pd.to_datetime(col, errors="coerce")`` without a format falls back to
+slow per-element parsing for locale-style strings such as
+``"17/10/2026 14:05"``.  Here every column is parsed as follows:
+
+1. the column is factorized so each distinct string is parsed only once
+   (timestamp logs repeat heavily);
+2. a sample of the distinct strings is used to infer and validate one
+   explicit format (ISO 8601, day-first or month-first, with or without
+   seconds / AM-PM);
+3. the distinct strings are parsed with that exact format in a single
+   vectorized call, and only the strings that don't match fall back to
+   flexible parsing;
+4. the parsed values are mapped back onto the rows.
+
+Numeric columns are read as Unix epochs (seconds, milliseconds,
+microseconds, nanoseconds) or Excel serial dates instead of being taken
+as nanoseconds since 1970: the first interpretation that puts
+``MIN_MATCH_RATIO`` of the values between ``AUTO_NUMERIC_MIN_DATE`` and
+``NUMERIC_MAX_DATE`` is used (:func:`infer_numeric_format`) and applied
+with one vectorized integer step.  Small numbers (durations, IDs, counts)
+fall outside every one of these ranges and are not guessed to be dates.
+A format that is asked for reads values from ``NUMERIC_MIN_DATE`` on.
+Excel's 1904 date system can't be told apart from the 1900 one by the
+values, so it is only used when asked for.  Like parsed strings, the
+results are naive timestamps (epochs in UTC).
+
+Each call returns a :class:`ParseReport` describing what happened.
+"""
+import warnings
+from dataclasses import dataclass
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from dateconverts.scheduler import run_tasks
+
+# Minimum share of sampled values a format must match to be used
+MIN_MATCH_RATIO = 0.9
+SAMPLE_SIZE = 1000
+# Distinct text values (over all columns parsed together) below which they
+# are parsed in process.  A round trip to a started pool costs ~10 ms plus
+# ~0.3 us per value against ~3 us to parse one, so from here two cores
+# save several times what the pool costs
+PROCESS_MIN_VALUES = 50_000
+
+_DAY_FIRST_DATES = ("%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%d/%m/%y")
+_MONTH_FIRST_DATES = ("%m/%d/%Y", "%m-%d-%Y", "%m.%d.%Y", "%m/%d/%y")
+_YEAR_FIRST_DATES = ("%Y/%m/%d",)
+_TIMES = ("", " %H:%M", " %H:%M:%S", " %H:%M:%S.%f", " %I:%M %p", " %I:%M:%S %p")
+
+# Numeric timestamp formats: name -> (unit, origin, label).  Excel's 1900
+# system counts serial 1 as 1900-01-01 but also has the phantom 1900-02-29,
+# so the origin below is right from serial 61 (1900-03-01) on
+NUMERIC_FORMATS = {
+    "excel-1900": ("D", pd.Timestamp("1899-12-30"), "Excel serial date (1900 system)"),
+    "epoch-s": ("s", pd.Timestamp("1970-01-01"), "Unix epoch (seconds)"),
+    "epoch-ms": ("ms", pd.Timestamp("1970-01-01"), "Unix epoch (milliseconds)"),
+    "epoch-us": ("us", pd.Timestamp("1970-01-01"), "Unix epoch (microseconds)"),
+    "epoch-ns": ("ns", pd.Timestamp("1970-01-01"), "Unix epoch (nanoseconds)"),
+    "excel-1904": ("D", pd.Timestamp("1904-01-01"), "Excel serial date (1904 system)"),
+}
+_AUTO_NUMERIC_FORMATS = ("excel-1900", "epoch-s", "epoch-ms", "epoch-us", "epoch-ns")
+NUMERIC_MIN_DATE = pd.Timestamp("1900-01-01")
+NUMERIC_MAX_DATE = pd.Timestamp("2100-01-01")
+# Inferred formats only read this range.  From 1971 on the automatic
+# formats' ranges don't overlap (Excel serials 25934-73050, epoch seconds
+# from 3.2e7, ...), and small numbers match none of them
+AUTO_NUMERIC_MIN_DATE = pd.Timestamp("1971-01-01")
+_UNIT_NS = {"D": 86_400 * 10**9, "s": 10**9, "ms": 10**6, "us": 10**3, "ns": 1}
+# Fractions are rounded to this many ns: Excel keeps milliseconds
+_RESOLUTION_NS = {"D": 10**6, "s": 10**3, "ms": 10**3, "us": 1, "ns": 1}
+
+
+def candidate_formats(dayfirst=False):
+    """Formats tried during inference, in order of preference.
+
+    Ambiguous values such as ``05/06/2026`` match both day-first and
+    month-first formats; the earlier one wins.  By default month-first is
+    preferred, which is what ``pd.to_datetime`` does without a format.
+    """
+    ambiguous = (_DAY_FIRST_DATES + _MONTH_FIRST_DATES) if dayfirst else (_MONTH_FIRST_DATES + _DAY_FIRST_DATES)
+    formats = ["ISO8601"]
+    for date_fmt in _YEAR_FIRST_DATES + ambiguous:
+        formats.extend(date_fmt + time_fmt for time_fmt in _TIMES)
+    return formats
+
+
+@dataclass
+class ParseReport:
+    """Outcome of parsing one column."""
+
+    column: object
+    format: object = None      # inferred format, None when nothing matched
+    rows: int = 0              # total rows
+    unique_values: int = 0     # distinct non-null values actually parsed
+    matched_rows: int = 0      # rows parsed by the inferred format
+    fallback_rows: int = 0     # rows parsed by the flexible fallback
+    failed_rows: int = 0       # non-null rows that ended up NaT
+
+    def add(self, other):
+        """Accumulate the counts of ``other`` (e.g. the next chunk of a column)."""
+        self.format = self.format or other.format
+        self.rows += other.rows
+        self.unique_values += other.unique_values
+        self.matched_rows += other.matched_rows
+        self.fallback_rows += other.fallback_rows
+        self.failed_rows += other.failed_rows
+        return self
+
+    def as_dict(self):
+        return {
+            "column": self.column,
+            "format": self.format,
+            "rows": self.rows,
+            "unique_values": self.unique_values,
+            "matched_rows": self.matched_rows,
+            "fallback_rows": self.fallback_rows,
+            "failed_rows": self.failed_rows,
+        }
+
+
+def _to_datetime(values, **kwargs):
+    with warnings.catch_warnings():
+        # "Could not infer format" warnings are expected for the fallback
+        warnings.simplefilter("ignore", UserWarning)
+        return pd.to_datetime(values, errors="coerce", **kwargs)
+
+
+def _sample(values, sample_size):
+    if len(values) <= sample_size:
+        return values
+    # Evenly spaced sample so both ends of the column are represented
+    idx = np.linspace(0, len(values) - 1, sample_size).astype(int)
+    return values[idx]
+
+
+def infer_datetime_format(values, dayfirst=False, sample_size=SAMPLE_SIZE, min_match=MIN_MATCH_RATIO):
+    """Infer one explicit format for an array of strings.
+
+    Returns the candidate matching the largest share of sampled values, or
+    ``None`` when no candidate matches at least ``min_match`` of them.
+    """
+    sample = pd.Index(_sample(np.asarray(values, dtype=object), sample_size))
+    sample = sample[[isinstance(v, str) for v in sample]].str.strip()
+    if len(sample) == 0:
+        return None
+
+    best_fmt, best_ratio = None, 0.0
+    for fmt in candidate_formats(dayfirst):
+        ratio = _to_datetime(sample, format=fmt).notna().mean()
+        if ratio > best_ratio:
+            best_fmt, best_ratio = fmt, ratio
+            if ratio == 1.0:
+                break
+    return best_fmt if best_ratio >= min_match else None
+
+
+def numeric_format_label(fmt):
+    """Readable name of a numeric format ("epoch-ms" -> "Unix epoch (milliseconds)")."""
+    return NUMERIC_FORMATS[fmt][2] if fmt in NUMERIC_FORMATS else fmt
+
+
+def _numeric_bounds(fmt, min_date=NUMERIC_MIN_DATE):
+    unit, origin, _ = NUMERIC_FORMATS[fmt]
+    step = pd.Timedelta(1, unit=unit)
+    return (min_date - origin) / step, (NUMERIC_MAX_DATE - origin) / step
+
+
+def infer_numeric_format(values, sample_size=SAMPLE_SIZE, min_match=MIN_MATCH_RATIO):
+    """Infer how numeric timestamps are encoded, from their value range.
+
+    Returns the first of the automatic :data:`NUMERIC_FORMATS` that maps
+    at least ``min_match`` of the sampled values between
+    ``AUTO_NUMERIC_MIN_DATE`` and ``NUMERIC_MAX_DATE``, or ``None``.
+    """
+    sample = _sample(np.asarray(values, dtype="float64"), sample_size)
+    sample = sample[np.isfinite(sample)]
+    if len(sample) == 0:
+        return None
+    for fmt in _AUTO_NUMERIC_FORMATS:
+        lo, hi = _numeric_bounds(fmt, AUTO_NUMERIC_MIN_DATE)
+        if ((sample >= lo) & (sample < hi)).mean() >= min_match:
+            return fmt
+    return None
+
+
+def _numeric_to_datetime(series, fmt, min_date=NUMERIC_MIN_DATE):
+    """Convert numbers to datetimes; values outside ``min_date`` - ``NUMERIC_MAX_DATE`` become NaT."""
+    unit, origin, _ = NUMERIC_FORMATS[fmt]
+    lo, hi = _numeric_bounds(fmt, min_date)
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    ok = (values >= lo) & (values < hi)  # NaN compares False
+    ns = np.full(len(values), np.iinfo("int64").min, dtype="int64")  # NaT
+    factor = _UNIT_NS[unit]
+    if pd.api.types.is_integer_dtype(series.dtype) and not series.hasnans:
+        # Exact integer arithmetic (float64 can't hold nanosecond epochs)
+        ns[ok] = series.to_numpy(dtype="int64")[ok] * factor
+    else:
+        whole = np.trunc(values[ok])
+        resolution = _RESOLUTION_NS[unit]
+        fraction = np.round((values[ok] - whole) * (factor // resolution)).astype("int64") * resolution
+        ns[ok] = whole.astype("int64") * factor + fraction
+    ns[ok] += origin.value
+    return pd.Series(ns.view("datetime64[ns]"), index=series.index, name=series.name), ok
+
+
+def _parse_numeric(series, fmt, report):
+    min_date = NUMERIC_MIN_DATE
+    if fmt not in NUMERIC_FORMATS:
+        fmt = infer_numeric_format(series.to_numpy(dtype="float64", na_value=np.nan))
+        # The few values outside the inferred range are not dates either
+        min_date = AUTO_NUMERIC_MIN_DATE
+    if fmt is None:
+        # Not a recognisable timestamp range: keep pandas' own interpretation
+        parsed = _to_datetime(series)
+        report.fallback_rows = int(parsed.notna().sum())
+        report.failed_rows = int((series.notna() & parsed.isna()).sum())
+        return parsed, report
+    parsed, ok = _numeric_to_datetime(series, fmt, min_date)
+    report.format = fmt
+    report.matched_rows = int(ok.sum())
+    report.failed_rows = int(series.notna().sum()) - report.matched_rows
+    return parsed, report
+
+
+def parse_datetime(series, fmt=None, dayfirst=False, numeric_format=None):
+    """Parse ``series`` to datetimes; returns ``(parsed, ParseReport)``.
+
+    Invalid values become NaT, like ``pd.to_datetime(errors="coerce")``.
+    ``fmt`` skips inference and forces a specific format.  For numeric
+    columns ``numeric_format`` (a :data:`NUMERIC_FORMATS` key) forces the
+    interpretation, otherwise it is inferred from the values.
+    """
+    report = ParseReport(column=series.name, rows=len(series))
+
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        report.matched_rows = int(series.notna().sum())
+        return series, report
+    if fmt in NUMERIC_FORMATS and not pd.api.types.is_numeric_dtype(series.dtype):
+        # e.g. a later chunk of an epoch column that has a stray text value
+        parsed, report = parse_datetime(pd.to_numeric(series, errors="coerce"), fmt, dayfirst, numeric_format)
+        report.failed_rows = int(series.notna().sum()) - report.matched_rows
+        return parsed, report
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return _parse_numeric(series, fmt if fmt in NUMERIC_FORMATS else numeric_format, report)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        if categories.dtype != object and not pd.api.types.is_string_dtype(categories.dtype):
+            return parse_datetime(series.astype(categories.dtype), fmt, dayfirst, numeric_format)
+        # Text categories are already the unique values: parse those once
+        codes, uniques = series.cat.codes.to_numpy(), categories
+    elif series.dtype != object and not pd.api.types.is_string_dtype(series.dtype):
+        parsed = _to_datetime(series)
+        report.fallback_rows = int(parsed.notna().sum())
+        report.failed_rows = int((series.notna() & parsed.isna()).sum())
+        return parsed, report
+    else:
+        codes, uniques = pd.factorize(series)
+
+    report.unique_values = len(uniques)
+    return _expand_uniques(series, codes, _parse_uniques(uniques, fmt, dayfirst), report)
+
+
+def _parse_uniques(uniques, fmt=None, dayfirst=False):
+    """Parse the distinct values of a text column.
+
+    Returns ``(parsed, matched, fmt)``: the parsed values, which of them
+    the format ``fmt`` (inferred when None) matched, and that format.
+    """
+    uniques = pd.Index(uniques)
+    is_str = np.fromiter((isinstance(v, str) for v in uniques), dtype=bool, count=len(uniques))
+    if is_str.any():
+        uniques = uniques.where(~is_str, uniques.astype(str).str.strip())
+
+    if fmt is None:
+        fmt = infer_datetime_format(uniques[is_str].to_numpy(), dayfirst=dayfirst)
+
+    if fmt is not None:
+        parsed = pd.Series(_to_datetime(uniques, format=fmt))
+        unmatched = parsed.isna().to_numpy()
+    else:
+        parsed = pd.Series(pd.NaT, index=range(len(uniques)), dtype="datetime64[ns]")
+        unmatched = np.ones(len(uniques), dtype=bool)
+
+    if unmatched.any():
+        # Values not matching the inferred format are parsed one by one
+        fallback = pd.Series(_to_datetime(uniques[unmatched], format="mixed", dayfirst=dayfirst))
+        try:
+            parsed[unmatched] = fallback.to_numpy() if fallback.dt.tz is None else fallback
+        except (TypeError, ValueError):
+            # e.g. tz-aware fallback values in an otherwise naive column
+            pass
+    return parsed, ~unmatched, fmt
+
+
+def _expand_uniques(series, codes, parsed_uniques, report):
+    """Map parsed distinct values back onto the rows of ``series``."""
+    parsed, matched_uniques, report.format = parsed_uniques
+    counts = np.bincount(codes[codes >= 0], minlength=len(parsed))
+    ok = parsed.notna().to_numpy()
+    report.matched_rows = int(counts[matched_uniques].sum())
+    report.fallback_rows = int(counts[~matched_uniques & ok].sum())
+    report.failed_rows = int(counts[~ok].sum())
+
+    result = pd.Series(parsed.array.take(codes, allow_fill=True), index=series.index, name=series.name)
+    return result, report
+
+
+def _is_text(series):
+    return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+
+def _parse_job(job, dayfirst=False, numeric_format=None):
+    series, fmt = job
+    return parse_datetime(series, fmt, dayfirst, numeric_format)
+
+
+def _parse_uniques_job(job, dayfirst=False):
+    uniques, fmt = job
+    return _parse_uniques(uniques, fmt, dayfirst)
+
+
+def _parse_text_columns(df, columns, formats, dayfirst, workers, progress):
+    """Parse text columns, sending only their distinct values to the pool.
+
+    Each column is factorized here; the workers parse the distinct
+    strings and the rows are filled in here again.  Processes are only
+    used when there are at least :data:`PROCESS_MIN_VALUES` distinct
+    values in all.
+    """
+    factorized = [pd.factorize(df[col]) for col in columns]
+    if sum(len(uniques) for _, uniques in factorized) < PROCESS_MIN_VALUES:
+        workers = 1
+    outcomes = run_tasks(partial(_parse_uniques_job, dayfirst=dayfirst),
+                         [(uniques, formats.get(col)) for col, (_, uniques) in zip(columns, factorized)],
+                         workers, processes=True, progress=progress)
+    results = []
+    for col, (codes, uniques), (parsed_uniques, error) in zip(columns, factorized, outcomes):
+        if error is not None:
+            results.append((None, error))
+            continue
+        report = ParseReport(column=col, rows=len(df), unique_values=len(uniques))
+        results.append((_expand_uniques(df[col], codes, parsed_uniques, report), None))
+    return results
+
+
+def parse_columns(df, columns, formats=None, dayfirst=False, numeric_format=None, workers=1, progress=None):
+    """Parse several columns of ``df`` concurrently.
+
+    The distinct values of text columns are parsed on the shared process
+    pool (see :mod:`dateconverts.scheduler`) when there are enough of
+    them, the other columns (numeric, categorical, already datetime) on
+    threads.  ``formats`` optionally maps columns to a known format.
+    ``progress(done, total)`` is called as columns finish.  Returns
+    ``{col: ((parsed, report), error)}`` with one of the two None.
+    """
+    formats = formats or {}
+    columns = list(dict.fromkeys(columns))
+    missing = {col: KeyError(col) for col in columns if col not in df.columns}
+    present = [col for col in columns if col not in missing]
+    text = [col for col in present if _is_text(df[col]) and formats.get(col) not in NUMERIC_FORMATS]
+    others = [col for col in present if col not in text]
+    parse = partial(_parse_job, dayfirst=dayfirst, numeric_format=numeric_format)
+
+    results = {col: (None, error) for col, error in missing.items()}
+
+    def report_progress(done, _):
+        progress(done, len(present))
+
+    def report_more_progress(done, _):
+        progress(len(text) + done, len(present))
+
+    results.update(zip(text, _parse_text_columns(df, text, formats, dayfirst, workers,
+                                                 None if progress is None else report_progress)))
+    outcomes = run_tasks(parse, [(df[col], formats.get(col)) for col in others], workers, False,
+                         None if progress is None else report_more_progress)
+    results.update(zip(others, outcomes))
+    return {col: results[col] for col in columns}
+
+
+class ParsedColumns:
+    """Parse-once view over the datetime columns of a frame.
+
+    ``parsed[col]`` parses ``df[col]`` the first time it is requested and
+    returns the memoized result afterwards, so a column used in several
+    start/end pairs is only parsed once.
+    """
+
+    def __init__(self, df, dayfirst=False, numeric_format=None):
+        self.df = df
+        self.dayfirst = dayfirst
+        self.numeric_format = numeric_format
+        self._parsed = {}
+        self._reports = {}
+
+    def __getitem__(self, col):
+        if col not in self._parsed:
+            parsed, report = parse_datetime(self.df[col], dayfirst=self.dayfirst,
+                                            numeric_format=self.numeric_format)
+            self._parsed[col] = parsed
+            self._reports[col] = report
+        return self._parsed[col]
+
+    def parse(self, columns, workers=1, progress=None):
+        """Parse ``columns`` up front (e.g. to time parsing on its own).
+
+        With ``workers`` > 1 the columns are parsed concurrently (see
+        :func:`parse_columns`, also for ``progress``).  Columns that fail
+        are skipped here; ``parsed[col]`` raises again when they are used.
+        """
+        todo = [col for col in dict.fromkeys(columns) if col not in self._parsed]
+        results = parse_columns(self.df, todo, dayfirst=self.dayfirst, numeric_format=self.numeric_format,
+                                workers=workers, progress=progress)
+        for col, (result, error) in results.items():
+            if error is None:
+                self._parsed[col], self._reports[col] = result
+
+    @property
+    def reports(self):
+        return list(self._reports.values())
+
+    def report_frame(self):
+        """Parse reports as a DataFrame, one row per parsed column."""
+        return pd.DataFrame([r.as_dict() for r in self.reports])
@@ -0,0 +1,86 @@
+"""Single-pass percentile columns for the ``_Hr`` duration columns.
+
+All requested percentiles are computed in one ``quantile([...])`` call
+(grouped or not) and written back as ``{col}_P{p}`` columns.  Grouped
+values are broadcast onto the rows by position instead of a
+``pd.merge``, so the frame keeps its row order, index and columns.
+"""
+import numpy as np
+
+MIN_PERCENTILE = 1
+MAX_PERCENTILE = 99.9
+DEFAULT_PERCENTILES = (90, 95)
+
+
+def percentile_label(p):
+    """Column suffix for percentile ``p``: 90 -> "P90", 99.5 -> "P99.5"."""
+    return f"P{float(p):g}"
+
+
+def parse_percentiles(text):
+    """Parse a comma separated list such as ``"90, 95, 99.5"``.
+
+    Raises ``ValueError`` for non-numbers or values outside
+    ``MIN_PERCENTILE``..``MAX_PERCENTILE``.  Duplicates are dropped and the
+    original order is kept.
+    """
+    percentiles = []
+    for part in str(text).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            p = float(part)
+        except ValueError:
+            raise ValueError(f"'{part}' is not a number") from None
+        if not MIN_PERCENTILE <= p <= MAX_PERCENTILE:
+            raise ValueError(f"Percentile {part} is outside {MIN_PERCENTILE}-{MAX_PERCENTILE}")
+        p = int(p) if p.is_integer() else p
+        if p not in percentiles:
+            percentiles.append(p)
+    return percentiles
+
+
+def percentile_table(df, hr_columns, percentiles, group_col=None, decimals=2):
+    """Compute every percentile of every column in one pass.
+
+    Returns a DataFrame with one row per group (a single row when
+    ``group_col`` is None) and ``{col}_P{p}`` columns, rounded to
+    ``decimals``.
+    """
+    quantiles = [p / 100 for p in percentiles]
+    if group_col:
+        table = df.groupby(group_col)[hr_columns].quantile(quantiles).unstack()
+    else:
+        table = df[hr_columns].quantile(quantiles).unstack().to_frame().T
+    # Same column order as before: all columns for the first percentile,
+    # then all columns for the next one, ...
+    table = table[[(col, q) for q in quantiles for col in hr_columns]]
+    labels = {q: percentile_label(p) for q, p in zip(quantiles, percentiles)}
+    table.columns = [f"{col}_{labels[q]}" for col, q in table.columns]
+    return table.round(decimals)
+
+
+def broadcast_column(values, positions):
+    """Float64 column with ``values[positions]`` per row (NaN for position -1)."""
+    # The appended NaN is what position -1 takes
+    return np.append(np.asarray(values, dtype="float64"), np.nan).take(positions)
+
+
+def add_percentile_columns(df, hr_columns, percentiles, group_col=None, decimals=2):
+    """Add ``{col}_P{p}`` columns to ``df`` in place and return their names.
+
+    With ``group_col`` each row gets its group's percentile (NaN for rows
+    whose group is missing); without it every row gets the overall value.
+    """
+    if not percentiles or not hr_columns:
+        return []
+    table = percentile_table(df, hr_columns, percentiles, group_col, decimals)
+    if group_col:
+        positions = table.index.get_indexer(df[group_col])
+    else:
+        positions = np.zeros(len(df), dtype="intp")
+    values = table.to_numpy(dtype="float64")
+    for i, name in enumerate(table.columns):
+        df[name] = broadcast_column(values[:, i], positions)
+    return list(table.columns)
@@ -0,0 +1,315 @@
+"""Headless processing pipeline shared by the Streamlit apps and the CLI.
+
+A :class:`JobSpec` describes what to do with one input frame:
+
+* split datetime columns into ``_Date`` / ``_Time`` / ``_Hour_Slot``
+  (app.py);
+* compute ``_Hr`` durations for start/end column pairs, percentiles per
+  group and duration buckets (app1.py / app2.py).
+
+:func:`calculate_hours` is the calculate step of app1.py / app2.py (run
+as a background job by :func:`calculate_hours_job`, see
+:mod:`dateconverts.jobs`); :func:`run_job` applies a spec to a frame with
+it, so batch results match the interactive ones.
+"""
+import json
+from dataclasses import dataclass, field, fields
+
+import pandas as pd
+
+from dateconverts.buckets import DEFAULT_BUCKET_WIDTH, add_bucket_column, bucket_histogram
+from dateconverts.compact import compact_frame
+from dateconverts.cube import build_cube, time_dims
+from dateconverts.durations import compute_duration
+from dateconverts.export import EXPORT_FORMATS
+from dateconverts.instrument import Profiler
+from dateconverts.jobs import JobCancelled
+from dateconverts.parsing import NUMERIC_FORMATS, ParsedColumns
+from dateconverts.percentiles import DEFAULT_PERCENTILES, add_percentile_columns
+from dateconverts.scheduler import run_tasks, workers_for
+from dateconverts.sketches import add_approx_percentile_columns, fold_and_save
+from dateconverts.splitter import split_datetime_columns
+
+
+@dataclass
+class JobSpec:
+    """What to compute for each input file."""
+
+    split_columns: list = field(default_factory=list)
+    slot_minutes: int = 60
+    remove_original: bool = False
+    pairs: list = field(default_factory=list)          # [(start_col, end_col), ...]
+    percentiles: list = field(default_factory=lambda: list(DEFAULT_PERCENTILES))
+    group_col: str = None
+    bucket: bool = False
+    bucket_width: float = DEFAULT_BUCKET_WIDTH
+    bucket_cap: float = None                           # hours; larger values go to one overflow bucket
+    numeric_format: str = None                         # epoch/Excel serial encoding of numeric columns, inferred by default
+    sheet: object = None                               # XLSX sheet name/index, first sheet by default
+    output_format: str = "csv"
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown job spec keys: {', '.join(sorted(unknown))}")
+        spec = cls(**data)
+        spec.pairs = [tuple(pair) for pair in spec.pairs]
+        for pair in spec.pairs:
+            if len(pair) != 2:
+                raise ValueError(f"Each pair needs a start and an end column, got {list(pair)}")
+        if spec.numeric_format is not None and spec.numeric_format not in NUMERIC_FORMATS:
+            raise ValueError(f"Unknown numeric_format {spec.numeric_format!r}, "
+                             f"expected one of {', '.join(NUMERIC_FORMATS)}")
+        if spec.output_format not in EXPORT_FORMATS:
+            hint = " (Parquet needs pyarrow)" if spec.output_format == "parquet" else ""
+            raise ValueError(f"Unknown output_format {spec.output_format!r}, "
+                             f"expected one of {', '.join(EXPORT_FORMATS)}{hint}")
+        return spec
+
+    def to_dict(self):
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+def load_spec(path):
+    """Load a :class:`JobSpec` from a JSON or YAML file."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if path.lower().endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("PyYAML is needed for YAML job specs (pip install pyyaml)") from None
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    return JobSpec.from_dict(data or {})
+
+
+def read_input(path, sheet=None):
+    """Read a CSV or XLSX input file with compact dtypes."""
+    if path.lower().endswith(".csv"):
+        return compact_frame(pd.read_csv(path))
+    return compact_frame(pd.read_excel(path, sheet_name=0 if sheet is None else sheet))
+
+
+def hour_column_name(start_col, end_col):
+    return f"{start_col}_to_{end_col}_Hr"
+
+
+def add_hour_columns(df, pairs, parsed_cols=None, unit="hhmm", workers=1, progress=None):
+    """Add one ``_Hr`` column per ``(start_col, end_col)`` pair.
+
+    Returns ``(hr_columns, errors)`` where ``errors`` lists
+    ``(start_col, end_col, exception)`` for pairs that failed; the other
+    pairs are still computed.
+
+    With ``workers`` > 1 the source columns are parsed concurrently (each
+    once, however many pairs use it) and the durations are computed on a
+    thread pool; the columns are still added in pair order.
+    ``progress(done, total)`` is called as pairs finish.
+    """
+    parsed_cols = ParsedColumns(df) if parsed_cols is None else parsed_cols
+    parsed_cols.parse((col for pair in pairs for col in pair), workers)
+
+    def duration(pair):
+        start_col, end_col = pair
+        return compute_duration(parsed_cols[start_col], parsed_cols[end_col], unit=unit)
+
+    hr_columns, errors = [], []
+    for (start_col, end_col), (values, error) in zip(pairs, run_tasks(duration, pairs, workers, progress=progress)):
+        if error is not None:
+            errors.append((start_col, end_col, error))
+            continue
+        try:
+            hr_col = hour_column_name(start_col, end_col)
+            df[hr_col] = values
+            hr_columns.append(hr_col)
+        except Exception as e:
+            errors.append((start_col, end_col, e))
+    return hr_columns, errors
+
+
+class _Progress:
+    """Stage and item progress of :func:`calculate_hours`, checking for cancellation."""
+
+    def __init__(self, progress=None, cancelled=None):
+        self.progress = progress
+        self.cancelled = cancelled
+        self.stage = None
+        self.rows = 0
+
+    def check(self):
+        if self.cancelled is not None and self.cancelled():
+            raise JobCancelled()
+
+    def start_stage(self, stage, rows=0):
+        self.check()
+        self.stage, self.rows = stage, rows
+        if self.progress is not None:
+            self.progress(stage, rows, 0, 1)
+
+    def advance(self, done, total):
+        if self.progress is not None:
+            self.progress(self.stage, self.rows, done, total)
+        self.check()
+
+
+def calculate_hours(df, pairs, percentiles, group_col=None, numeric_format=None, load=None, sketches=None,
+                    bucket=None, cube_slot_minutes=None, profiler=None, workers=None, progress=None,
+                    cancelled=None, copy=True):
+    """Hour columns, percentiles, buckets and summary cube for ``pairs``.
+
+    This is the calculate step of app1.py / app2.py (run as a background
+    job by :func:`calculate_hours_job`) and of :func:`run_job`.
+    ``load`` optionally returns the frame to work on (e.g. the chosen
+    upload columns next to ``df``); ``sketches`` is a dict with
+    ``directory``, ``alpha`` and ``source`` for approximate percentiles;
+    ``bucket`` is ``(width, cap)`` to also add bucket columns;
+    ``cube_slot_minutes`` builds a :class:`~dateconverts.cube.SummaryCube`
+    of the hour columns by date and hour slot of their start column (and
+    by group).  ``workers`` defaults to every core for large frames.
+
+    ``progress(stage, rows, done, total)`` is called when a stage over
+    ``rows`` rows starts (``done`` 0) and as its columns / pairs finish.
+    ``cancelled()`` is checked at the same points; once it returns True
+    :class:`~dateconverts.jobs.JobCancelled` is raised.
+
+    The columns are added to a shallow copy of the frame, so the
+    session's frame is untouched until the result is taken
+    (``copy=False`` adds them to ``df`` itself).  Returns a dict with the
+    frame (``df``) and what the apps report.
+    """
+    profiler = profiler or Profiler(enabled=False)
+    job = _Progress(progress, cancelled)
+    if load is not None:
+        job.start_stage("read_columns")
+        with profiler.stage("read_columns") as stage:
+            df = load()
+            stage.rows = len(df)
+    if copy:
+        df = df.copy(deep=False)
+    rows = len(df)
+    workers = workers_for(rows, workers)
+    result = {"df": df, "percentiles": percentiles}
+
+    # Each source column is parsed once, even if used by several pairs
+    job.start_stage("parse_datetime", rows)
+    parsed_cols = ParsedColumns(df, numeric_format=numeric_format)
+    with profiler.stage("parse_datetime", rows):
+        parsed_cols.parse((col for pair in pairs for col in pair), workers, progress=job.advance)
+    job.start_stage("durations", rows)
+    with profiler.stage("durations", rows):
+        hr_columns, pair_errors = add_hour_columns(df, pairs, parsed_cols, workers=workers, progress=job.advance)
+    result.update(hr_columns=hr_columns, pair_errors=pair_errors, parse_reports=parsed_cols.reports)
+    if not hr_columns:
+        return result
+
+    if sketches:
+        job.start_stage("percentile_sketches", rows)
+        try:
+            with profiler.stage("percentile_sketches", rows):
+                stores = fold_and_save(df, hr_columns, sketches["directory"], group_col, sketches["alpha"],
+                                       source=sketches["source"])
+                result["percentile_columns"] = add_approx_percentile_columns(df, stores, percentiles, group_col)
+        except (OSError, ValueError) as e:
+            result["sketch_error"] = e
+    else:
+        # All percentiles for all hour columns in one grouped pass
+        job.start_stage("percentiles", rows)
+        with profiler.stage("percentiles", rows):
+            result["percentile_columns"] = add_percentile_columns(df, hr_columns, percentiles, group_col)
+    job.advance(1, 1)
+
+    if bucket is not None:
+        width, cap = bucket
+        bucket_columns, bucket_errors, empty_columns = [], [], []
+        job.start_stage("buckets", rows)
+        with profiler.stage("buckets", rows):
+            for done, col in enumerate(hr_columns, 1):
+                try:
+                    bucket_col = add_bucket_column(df, col, width, cap)
+                    if bucket_col is None:
+                        empty_columns.append(col)
+                    else:
+                        bucket_columns.append(bucket_col)
+                except Exception as e:
+                    bucket_errors.append((col, e))
+                job.advance(done, len(hr_columns))
+        # Compact counts per bucket (and group), downloadable instead of every row
+        job.start_stage("bucket_histogram", rows)
+        with profiler.stage("bucket_histogram", rows):
+            result["bucket_summary"] = bucket_histogram(df, bucket_columns, group_col)
+        job.advance(1, 1)
+        result.update(bucket_width=width, bucket_columns=bucket_columns, bucket_errors=bucket_errors,
+                      empty_columns=empty_columns)
+
+    if cube_slot_minutes:
+        job.start_stage("summary_cube", rows)
+        with profiler.stage("summary_cube", rows):
+            result["cube"] = build_cube(hour_measures(df, pairs, hr_columns, parsed_cols, group_col,
+                                                      cube_slot_minutes),
+                                        percentiles, bucket[0] if bucket else DEFAULT_BUCKET_WIDTH)
+        job.advance(1, 1)
+    return result
+
+
+def calculate_hours_job(job, *args, **kwargs):
+    """:func:`calculate_hours` as a background job of :mod:`dateconverts.jobs`."""
+    return calculate_hours(*args, progress=job.report, cancelled=lambda: job.cancel_requested, **kwargs)
+
+
+def hour_measures(df, pairs, hr_columns, parsed_cols, group_col=None, slot_minutes=60):
+    """Summary cube measures of the hour columns, by date / hour slot of their start column."""
+    measures = {}
+    for start_col, end_col in pairs:
+        hr_col = hour_column_name(start_col, end_col)
+        if hr_col in hr_columns:
+            dims = time_dims(parsed_cols[start_col], slot_minutes)
+            if group_col:
+                dims[group_col] = df[group_col]
+            measures[hr_col] = (dims, df[hr_col])
+    return measures
+
+
+def run_job(df, spec, profiler=None, workers=1):
+    """Apply ``spec`` to ``df`` in place; returns a summary dict.
+
+    Each stage is timed with ``profiler`` (see :mod:`dateconverts.instrument`)
+    when one is given.  ``workers`` > 1 processes the columns and pairs of
+    each stage concurrently (see :mod:`dateconverts.scheduler`).  The
+    pairs go through :func:`calculate_hours`, like in the apps; with
+    buckets the summary has the per-bucket counts as ``bucket_summary``.
+    """
+    profiler = profiler or Profiler(enabled=False)
+    rows = len(df)
+    workers = workers_for(rows, workers)
+    summary = {"rows": rows, "errors": [], "warnings": []}
+
+    if spec.split_columns:
+        with profiler.stage("split_columns", rows):
+            reports = split_datetime_columns(df, spec.split_columns, spec.remove_original,
+                                             slot_minutes=spec.slot_minutes, numeric_format=spec.numeric_format,
+                                             workers=workers)
+        summary["split_reports"] = [r.as_dict() for r in reports.values()]
+
+    if spec.pairs:
+        bucket = (spec.bucket_width, spec.bucket_cap) if spec.bucket else None
+        result = calculate_hours(df, spec.pairs, spec.percentiles, spec.group_col, spec.numeric_format,
+                                 bucket=bucket, profiler=profiler, workers=workers, copy=False)
+        summary["hr_columns"] = result["hr_columns"]
+        summary["parse_reports"] = [r.as_dict() for r in result["parse_reports"]]
+        summary["errors"].extend(f"Error calculating {s} → {e}: {exc}" for s, e, exc in result["pair_errors"])
+
+        if result["hr_columns"]:
+            summary["percentile_columns"] = result["percentile_columns"]
+            if bucket is not None:
+                summary["errors"].extend(f"Error bucketing column {col}: {e}" for col, e in result["bucket_errors"])
+                summary["warnings"].extend(f"Column {col} has no numeric values." for col in result["empty_columns"])
+                summary["bucket_columns"] = result["bucket_columns"]
+                summary["bucket_summary"] = result["bucket_summary"]
+        else:
+            summary["warnings"].append("No valid hour columns found to calculate percentiles.")
+
+    return summary
@@ -0,0 +1,153 @@
+"""Run independent per-column / per-pair work concurrently.
+
+The apps parse several datetime columns and derive several ``_Hr`` /
+split columns, each over the full frame and independent of the others.
+:func:`run_tasks` runs such work on a pool:
+
+* threads for vectorized NumPy/pandas work (durations, split columns,
+  numeric timestamps), which releases the GIL and shares the frame
+  without copying it;
+* processes for parsing text, which holds the GIL.  Callers send the
+  least they can (the parser sends each column's distinct strings, not
+  the column) and only use processes for work large enough to pay for
+  the round trip (see :data:`dateconverts.parsing.PROCESS_MIN_VALUES`).
+
+The process pool is created once and kept for the life of the process
+(:func:`process_pool`).  Its workers are started with ``forkserver``
+(``spawn`` where that is missing), never ``fork``: the Streamlit server
+and the job runner are multithreaded, and a forked child can inherit a
+lock held by another thread and hang.  At most ``workers`` items are in
+flight at a time, and never more than the pool has processes.
+
+Results come back in input order, each as ``(result, error)``, so one
+failing column or pair doesn't stop the others and callers can report
+every failure like they did in their sequential loops.
+
+Configuration (environment variables):
+
+* ``DATECONVERTS_PROCESS_WORKERS`` - processes in the shared pool
+  (default: all cores)
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+PARALLEL_MIN_ROWS = 100_000  # below this, starting a pool costs more than it saves
+# Imported by the fork server once, so workers start without importing them
+PRELOAD_MODULES = ["dateconverts.parsing", "dateconverts.variants"]
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def workers_for(rows, workers=None):
+    """Number of workers to use for frames of ``rows`` rows (1 for small frames)."""
+    if rows < PARALLEL_MIN_ROWS:
+        return 1
+    return max(1, workers or default_workers())
+
+
+def _pool_context():
+    methods = multiprocessing.get_all_start_methods()
+    if "forkserver" in methods:
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(PRELOAD_MODULES)
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def process_workers():
+    return max(1, int(os.environ.get("DATECONVERTS_PROCESS_WORKERS", "0")) or default_workers())
+
+
+def process_pool():
+    """The shared process pool, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=process_workers(), mp_context=_pool_context())
+        return _pool
+
+
+def _discard_pool(pool):
+    """Drop ``pool`` (e.g. after a worker died) so the next call starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _call(fn, item):
+    try:
+        return fn(item), None
+    except Exception as e:
+        return None, e
+
+
+def _run_on(pool, fn, items, workers, progress):
+    outcomes = [None] * len(items)
+    pending = iter(enumerate(items))
+    running = {}
+
+    def submit_next():
+        for i, item in pending:
+            running[pool.submit(_call, fn, item)] = i
+            return
+
+    for _ in range(workers):
+        submit_next()
+    done = 0
+    try:
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                outcomes[running.pop(future)] = future.result()
+                done += 1
+                submit_next()
+                if progress is not None:
+                    progress(done, len(items))
+    except BaseException:
+        for future in running:
+            future.cancel()
+        raise
+    return outcomes
+
+
+def run_tasks(fn, items, workers=1, processes=False, progress=None):
+    """Apply ``fn`` to every item; returns ``[(result, error), ...]`` in input order.
+
+    With ``workers`` > 1 the items run on a thread pool, or on the shared
+    process pool with ``processes=True`` (``fn`` must then be a module
+    level function, and the items and results picklable).
+    ``progress(done, total)`` is called in the calling thread as items
+    finish; if it raises (e.g. to cancel a job), items not yet started are
+    cancelled and the exception propagates.
+    """
+    items = list(items)
+    workers = min(workers or 1, len(items))
+    if processes:
+        workers = min(workers, process_workers())
+    if workers <= 1:
+        outcomes = []
+        for item in items:
+            outcomes.append(_call(fn, item))
+            if progress is not None:
+                progress(len(outcomes), len(items))
+        return outcomes
+    if not processes:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return _run_on(pool, fn, items, workers, progress)
+    pool = process_pool()
+    try:
+        return _run_on(pool, fn, items, workers, progress)
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
@@ -0,0 +1,153 @@
+"""Per-session working frames under one server-wide memory cap.
+
+Each browser session of app1/app2 keeps the frame it is working on (the
+loaded columns plus the computed ``_Hr`` / percentile / bucket columns)
+between reruns.  In ``st.session_state`` those frames are invisible to
+the server: a few abandoned tabs with large uploads can exhaust memory.
+
+:class:`SessionStore` holds them in one place instead, measures each
+one, and keeps the total under ``max_bytes``:
+
+1. sessions idle for longer than ``idle_seconds`` are dropped first;
+2. then the least recently active sessions, until the total fits.
+
+The session being served is never evicted, even if it alone is over the
+cap.  An evicted session finds no frame on its next rerun and is told to
+recalculate (see :meth:`SessionStore.was_evicted`); the cached upload
+columns in :mod:`dateconverts.ingest` make that cheap.
+
+Finished background jobs (:mod:`dateconverts.jobs`) keep their results
+in the same store, under the job's id, until the session takes them, so
+results nobody picks up count against the cap and are evicted like idle
+sessions.
+
+Configuration (environment variables):
+
+* ``DATECONVERTS_SESSION_CAP_MB`` - memory cap for all session frames (default 2048)
+* ``DATECONVERTS_SESSION_IDLE_MINUTES`` - idle time after which a session
+  is evicted first (default 30)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from dateconverts.ingest import frame_nbytes
+
+# Remember this many evicted tokens so their sessions can be told why
+# their data is gone
+MAX_EVICTED_TOKENS = 1000
+
+
+def result_nbytes(result):
+    """Bytes held by the frames of a job result (a frame, or a dict holding frames)."""
+    values = result.values() if isinstance(result, dict) else [result]
+    return sum(frame_nbytes(v) for v in values if isinstance(v, pd.DataFrame))
+
+
+class SessionStore:
+    """Thread-safe store of one frame per session token, bounded by memory size."""
+
+    def __init__(self, max_bytes=2048 * 1024 * 1024, idle_seconds=30 * 60, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self._clock = clock
+        self._sessions = OrderedDict()  # token -> [frame, nbytes, last_seen], least recently active first
+        self._evicted = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total(self):
+        """Bytes held by all sessions."""
+        return self._total
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def touch(self, token):
+        """Mark ``token`` as active now and evict idle sessions."""
+        with self._lock:
+            entry = self._sessions.get(token)
+            if entry is not None:
+                entry[2] = self._clock()
+                self._sessions.move_to_end(token)
+            self._evict(keep=token)
+
+    def get(self, token):
+        """The frame of ``token`` or ``None``."""
+        with self._lock:
+            entry = self._sessions.get(token)
+            return None if entry is None else entry[0]
+
+    def put(self, token, df, nbytes=None):
+        """Store (or with ``None`` drop) the frame of ``token``; returns the evicted tokens.
+
+        Call again after changing the frame in place so its size is re-measured.
+        ``nbytes`` gives the size of something that is not a frame (a job result).
+        """
+        if df is None:
+            self.drop(token)
+            return []
+        nbytes = frame_nbytes(df) if nbytes is None else nbytes
+        with self._lock:
+            old = self._sessions.pop(token, None)
+            if old is not None:
+                self._total -= old[1]
+            self._sessions[token] = [df, nbytes, self._clock()]
+            self._total += nbytes
+            self._evicted.pop(token, None)
+            return self._evict(keep=token)
+
+    def drop(self, token):
+        with self._lock:
+            old = self._sessions.pop(token, None)
+            if old is not None:
+                self._total -= old[1]
+
+    def usage(self, token):
+        """Bytes held by ``token``'s frame (0 if it has none)."""
+        with self._lock:
+            entry = self._sessions.get(token)
+            return 0 if entry is None else entry[1]
+
+    def was_evicted(self, token):
+        """True (once) if ``token``'s frame was evicted since it was last stored."""
+        with self._lock:
+            return self._evicted.pop(token, None) is not None
+
+    def _evict(self, keep):
+        now = self._clock()
+        idle = [t for t, (_, _, seen) in self._sessions.items()
+                if t != keep and now - seen > self.idle_seconds]
+        lru = (t for t in list(self._sessions) if t != keep)
+        evicted = []
+        for token in idle:
+            self._remove(token, evicted)
+        for token in lru:
+            if self._total <= self.max_bytes:
+                break
+            if token in self._sessions:
+                self._remove(token, evicted)
+        return evicted
+
+    def _remove(self, token, evicted):
+        _, nbytes, _ = self._sessions.pop(token)
+        self._total -= nbytes
+        self._evicted[token] = True
+        while len(self._evicted) > MAX_EVICTED_TOKENS:
+            self._evicted.popitem(last=False)
+        evicted.append(token)
+
+
+def _default_sessions_from_env():
+    cap_mb = int(os.environ.get("DATECONVERTS_SESSION_CAP_MB", "2048"))
+    idle_minutes = float(os.environ.get("DATECONVERTS_SESSION_IDLE_MINUTES", "30"))
+    return SessionStore(max_bytes=cap_mb * 1024 * 1024, idle_seconds=idle_minutes * 60)
+
+
+# Module globals survive Streamlit reruns and are shared by every session
+# of the server process
+default_sessions = _default_sessions_from_env()
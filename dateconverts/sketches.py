@@ -0,0 +1,356 @@
+"""Approximate, mergeable percentile sketches for the ``_Hr`` columns.
+
+Exact quantiles need every value of a group in memory.  For month-scale
+data the apps can instead keep one small sketch per group and column:
+
+* :class:`QuantileSketch` is a DDSketch-style log-bucket histogram.  Any
+  quantile it reports is within a relative error ``alpha`` of a true
+  value of the data, two sketches merge by adding bucket counts, and
+  values are added with whole-array NumPy operations.
+* A :class:`SketchStore` holds the sketches of one ``_Hr`` column for all
+  groups and is saved as a small JSON file.  Each new upload is folded
+  into the saved sketches, so P90/P95 across many daily files can be
+  reported without reloading any of them.  The store remembers which
+  uploads it already contains, so the same file is never counted twice.
+
+The apps let users name a sketch folder; :func:`resolve_sketch_dir` keeps
+it inside one server-side base directory.  Folding an upload into a saved
+store is a read-modify-write, so :func:`fold_and_save` holds a lock per
+file (a thread lock, plus ``fcntl.flock`` across processes where
+available) and replaces the file atomically.
+
+Configuration (environment variables):
+
+* ``DATECONVERTS_SKETCH_DIR`` - base directory of all sketch folders
+  (default ``percentile_sketches`` in the working directory)
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from dateconverts.percentiles import broadcast_column, percentile_label
+
+DEFAULT_ALPHA = 0.01
+SKETCH_BASE_DIR = os.path.abspath(os.environ.get("DATECONVERTS_SKETCH_DIR", "percentile_sketches"))
+ALL_ROWS = "__all__"  # group key used when no grouping column is selected
+
+
+class QuantileSketch:
+    """Relative-error quantile sketch (DDSketch-style) for float values."""
+
+    def __init__(self, alpha=DEFAULT_ALPHA):
+        if not 0 < alpha < 1:
+            raise ValueError(f"alpha must be between 0 and 1, got {alpha}")
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}  # bucket key -> count
+        self.negative = {}  # bucket key of |x| -> count
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def bucket_keys(self, magnitudes):
+        """Bucket key for each positive value."""
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype("int64")
+
+    def _bucket_value(self, key):
+        # Midpoint (in relative terms) of bucket (gamma^(k-1), gamma^k]
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def _add_counts(self, store, keys, counts):
+        target = self.positive if store > 0 else self.negative
+        for key, cnt in zip(keys.tolist(), counts.tolist()):
+            target[key] = target.get(key, 0) + cnt
+
+    def update(self, values):
+        """Add an array of values; NaN is ignored."""
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.zero_count += int((values == 0).sum())
+        for store, part in ((1, values[values > 0]), (-1, -values[values < 0])):
+            if len(part):
+                keys, counts = np.unique(self.bucket_keys(part), return_counts=True)
+                self._add_counts(store, keys, counts)
+        return self
+
+    def merge(self, other):
+        """Fold ``other`` into this sketch (in place)."""
+        if not math.isclose(self.alpha, other.alpha):
+            raise ValueError(f"Cannot merge sketches with alpha {self.alpha} and {other.alpha}")
+        for key, cnt in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + cnt
+        for key, cnt in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + cnt
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """Approximate ``q``-quantile (0..1), NaN for an empty sketch."""
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        # Walk values in ascending order: large negatives first
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return max(-self._bucket_value(key), self.min)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return min(self._bucket_value(key), self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "alpha": self.alpha,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "zero_count": self.zero_count,
+            "positive": {str(k): v for k, v in self.positive.items()},
+            "negative": {str(k): v for k, v in self.negative.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(alpha=data["alpha"])
+        sketch.count = data["count"]
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        sketch.zero_count = data["zero_count"]
+        sketch.positive = {int(k): v for k, v in data["positive"].items()}
+        sketch.negative = {int(k): v for k, v in data["negative"].items()}
+        return sketch
+
+
+def _group_key(value):
+    """String key of a group value; equal numbers give equal keys whatever their dtype."""
+    if isinstance(value, (bool, np.bool_)):
+        return str(bool(value))
+    if isinstance(value, (int, np.integer)):
+        return str(int(value))
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        # A group column read as float (e.g. because of blanks) still matches its integer days
+        return str(int(value)) if value.is_integer() else repr(value)
+    return str(value)
+
+
+class SketchStore:
+    """Sketches of one ``_Hr`` column, one per group."""
+
+    def __init__(self, column, alpha=DEFAULT_ALPHA):
+        self.column = column
+        self.alpha = alpha
+        self.groups = {}    # group key -> QuantileSketch
+        self.sources = []   # upload keys already folded in
+
+    def update(self, df, group_col=None, source=None):
+        """Fold ``df[self.column]`` into the per-group sketches.
+
+        Returns False (and changes nothing) when ``source`` was already
+        folded into this store.
+        """
+        if source is not None and source in self.sources:
+            return False
+        values = pd.to_numeric(df[self.column], errors="coerce").to_numpy(dtype="float64")
+        if group_col:
+            codes, uniques = pd.factorize(df[group_col])
+        else:
+            codes, uniques = np.zeros(len(values), dtype="int64"), [ALL_ROWS]
+
+        valid = (codes >= 0) & ~np.isnan(values)
+        codes, values = codes[valid], values[valid]
+        # One sort by group code, then every group is a contiguous slice
+        order = np.argsort(codes, kind="stable")
+        codes, values = codes[order], values[order]
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+        for chunk_codes, chunk in zip(np.split(codes, bounds), np.split(values, bounds)):
+            if len(chunk) == 0:
+                continue
+            key = _group_key(uniques[chunk_codes[0]])
+            sketch = self.groups.get(key)
+            if sketch is None:
+                sketch = self.groups[key] = QuantileSketch(self.alpha)
+            sketch.update(chunk)
+
+        if source is not None:
+            self.sources.append(source)
+        return True
+
+    def merge(self, other):
+        """Fold another store of the same column into this one."""
+        for key, sketch in other.groups.items():
+            if key in self.groups:
+                self.groups[key].merge(sketch)
+            else:
+                self.groups[key] = QuantileSketch.from_dict(sketch.to_dict())
+        self.sources.extend(s for s in other.sources if s not in self.sources)
+        return self
+
+    def quantile(self, group, q):
+        sketch = self.groups.get(_group_key(group))
+        return math.nan if sketch is None else sketch.quantile(q)
+
+    def to_dict(self):
+        return {
+            "column": self.column,
+            "alpha": self.alpha,
+            "sources": self.sources,
+            "groups": {key: sketch.to_dict() for key, sketch in self.groups.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        store = cls(data["column"], alpha=data["alpha"])
+        store.sources = list(data.get("sources", []))
+        store.groups = {key: QuantileSketch.from_dict(s) for key, s in data["groups"].items()}
+        return store
+
+
+def resolve_sketch_dir(name, base=None):
+    """Absolute path of the sketch folder ``name`` inside ``base`` (default :data:`SKETCH_BASE_DIR`).
+
+    ``name`` is a relative folder name as typed by a user; an empty name is
+    the base directory itself.  Absolute paths and ``..`` components raise
+    ``ValueError``, as does a path that leaves ``base`` through a symlink.
+    """
+    base = os.path.realpath(SKETCH_BASE_DIR if base is None else base)
+    name = (name or "").strip()
+    if os.path.isabs(name) or os.path.splitdrive(name)[0]:
+        raise ValueError(f"Sketch folder must be a relative folder name, got {name!r}")
+    if ".." in re.split(r"[\\/]", name):
+        raise ValueError(f"Sketch folder must not contain '..', got {name!r}")
+    path = os.path.realpath(os.path.join(base, name))
+    if os.path.commonpath([base, path]) != base:
+        raise ValueError(f"Sketch folder {name!r} is outside the sketch directory")
+    return path
+
+
+def sketch_path(directory, column, group_col=None):
+    """File holding the sketches of ``column`` grouped by ``group_col``.
+
+    The name starts with the sanitized column names for readability and
+    ends with a hash of the raw names, so ``a/b`` and ``a_b`` get
+    different files.
+    """
+    name = f"{column}__by__{group_col}" if group_col else f"{column}__all"
+    readable = re.sub(r"[^\w.-]", "_", name)[:100]
+    digest = hashlib.blake2b(json.dumps([column, group_col]).encode("utf-8"), digest_size=8).hexdigest()
+    return os.path.join(directory, f"{readable}-{digest}.json")
+
+
+def load_store(directory, column, group_col=None, alpha=DEFAULT_ALPHA):
+    """Load the saved store for ``column`` or start an empty one."""
+    path = sketch_path(directory, column, group_col)
+    if not os.path.exists(path):
+        return SketchStore(column, alpha)
+    with open(path, encoding="utf-8") as f:
+        store = SketchStore.from_dict(json.load(f))
+    if not math.isclose(store.alpha, alpha):
+        raise ValueError(
+            f"Saved sketches for {column} use alpha {store.alpha}, not {alpha}; "
+            "pick the same error bound or another sketch folder"
+        )
+    return store
+
+
+def save_store(store, directory, group_col=None):
+    """Write ``store`` atomically: readers see the old or the new file, never a partial one."""
+    os.makedirs(directory, exist_ok=True)
+    path = sketch_path(directory, store.column, group_col)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(store.to_dict(), f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return path
+
+
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _locked(path):
+    """Hold the lock of sketch file ``path`` (threads of this process, and other processes)."""
+    with _path_locks_guard:
+        lock = _path_locks.setdefault(path, threading.Lock())
+    with lock:
+        try:
+            import fcntl
+        except ImportError:  # Windows: only the thread lock
+            yield
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def fold_and_save(df, hr_columns, directory, group_col=None, alpha=DEFAULT_ALPHA, source=None):
+    """Fold ``df`` into the saved sketches of every column and save them.
+
+    Each column's load-update-save runs under that file's lock, so uploads
+    folded at the same time by several sessions are all kept.
+    Returns ``{column: SketchStore}`` with the merged stores.
+    """
+    stores = {}
+    for col in hr_columns:
+        with _locked(sketch_path(directory, col, group_col)):
+            store = load_store(directory, col, group_col, alpha)
+            if store.update(df, group_col, source=source):
+                save_store(store, directory, group_col)
+        stores[col] = store
+    return stores
+
+
+def add_approx_percentile_columns(df, stores, percentiles, group_col=None, decimals=2):
+    """Add ``{col}_P{p}`` columns from sketches; returns the new column names.
+
+    Uses the same names as the exact path, so downstream steps don't care
+    which mode produced them.
+    """
+    names = []
+    if group_col:
+        codes, uniques = pd.factorize(df[group_col])
+    for p in percentiles:
+        for col, store in stores.items():
+            name = f"{col}_{percentile_label(p)}"
+            if group_col:
+                per_group = np.array([store.quantile(g, p / 100) for g in uniques], dtype="float64")
+                df[name] = broadcast_column(np.round(per_group, decimals), codes)
+            else:
+                value = round(store.quantile(ALL_ROWS, p / 100), decimals)
+                df[name] = broadcast_column([value], np.zeros(len(df), dtype="intp"))
+            names.append(name)
+    return names
@@ -0,0 +1,252 @@
+"""Date / Time / Hour-Slot splitting used by the Date-Time Splitter app.
+
+Every selected column ``col`` is parsed to datetimes and gets three new
+columns: ``col_Date``, ``col_Time`` and ``col_Hour_Slot``.
+
+There are only 1440 possible ``HH:MM`` values and 24 hour slots (96 with
+15-minute slots), so ``_Time`` and ``_Hour_Slot`` are Categoricals built by
+indexing a precomputed label table with the integer minute-of-day codes,
+instead of formatting one Python string per row.  ``_Date`` stays a
+datetime64 column normalized to midnight (pandas has no day unit) rather
+than an object column of ``datetime.date``.
+
+:func:`split_datetime_columns` works on an in-memory frame.
+:func:`stream_split_csv` does the same for CSV files of any size: the
+input is read in fixed-size chunks, each chunk is split and appended to
+an output file, so peak memory depends on the chunk size rather than the
+file size.  The output files live in a :class:`StreamOutputs` directory,
+which removes unused ones by age and total size.
+
+Configuration (environment variables):
+
+* ``DATECONVERTS_STREAM_DIR`` - directory for streamed outputs (default: a
+  new temp directory)
+* ``DATECONVERTS_STREAM_MB`` - size budget of that directory (default 4096)
+* ``DATECONVERTS_STREAM_TTL_MINUTES`` - time after its last use that a
+  file is removed (default 60)
+"""
+import os
+import tempfile
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from dateconverts.parsing import ParseReport, parse_columns
+from dateconverts.scheduler import run_tasks
+
+DEFAULT_CHUNKSIZE = 100_000
+SLOT_WIDTHS = (60, 30, 15)  # minutes
+MINUTES_PER_DAY = 24 * 60
+
+
+def _hhmm(minute_of_day):
+    return f"{minute_of_day // 60:02d}:{minute_of_day % 60:02d}"
+
+
+@lru_cache(maxsize=None)
+def time_labels():
+    """``"00:00"`` .. ``"23:59"``, indexed by minute of day."""
+    return pd.Index([_hhmm(m) for m in range(MINUTES_PER_DAY)])
+
+
+@lru_cache(maxsize=None)
+def slot_labels(slot_minutes=60):
+    """Slot labels such as ``"09:00 - 10:00"``, indexed by slot number."""
+    if slot_minutes not in SLOT_WIDTHS:
+        raise ValueError(f"Unsupported slot width {slot_minutes}, expected one of {SLOT_WIDTHS}")
+    return pd.Index([
+        f"{_hhmm(start)} - {_hhmm(start + slot_minutes)}"
+        for start in range(0, MINUTES_PER_DAY, slot_minutes)
+    ])
+
+
+def minute_of_day(parsed):
+    """Minute of day (0..1439) for each timestamp, -1 for NaT."""
+    minutes = parsed.dt.hour * 60 + parsed.dt.minute
+    return minutes.fillna(-1).to_numpy(dtype="int64")
+
+
+def _categorical(codes, labels):
+    # code -1 (NaT) stays missing
+    return pd.Categorical.from_codes(codes, categories=labels, ordered=True)
+
+
+def split_columns(parsed, col, slot_minutes=60):
+    """The ``_Date``, ``_Time`` and ``_Hour_Slot`` columns for ``col`` as a dict."""
+    minutes = minute_of_day(parsed)
+    slots = np.where(minutes >= 0, minutes // slot_minutes, -1)
+    return {
+        col + "_Date": parsed.dt.normalize(),
+        col + "_Time": _categorical(minutes, time_labels()),
+        col + "_Hour_Slot": _categorical(slots, slot_labels(slot_minutes)),
+    }
+
+
+def add_split_columns(df, col, parsed, slot_minutes=60):
+    """Add ``_Date``, ``_Time`` and ``_Hour_Slot`` columns for ``col``."""
+    for name, values in split_columns(parsed, col, slot_minutes).items():
+        df[name] = values
+
+
+def split_datetime_columns(df, columns, remove_original=False, formats=None, slot_minutes=60,
+                           numeric_format=None, workers=1):
+    """Split every column in ``columns`` in place; returns ``{col: ParseReport}``.
+
+    ``formats`` optionally maps a column to a known datetime format so it
+    isn't inferred again (used to keep chunks of one file consistent).
+    ``slot_minutes`` is the ``_Hour_Slot`` width: 60, 30 or 15.
+    ``numeric_format`` forces how numeric columns are read (epoch unit or
+    Excel serial, see :data:`~dateconverts.parsing.NUMERIC_FORMATS`).
+    With ``workers`` > 1 the columns are parsed and split concurrently;
+    the new columns are still added in column order.
+    """
+    columns = list(dict.fromkeys(columns))
+    parsed = parse_columns(df, columns, formats, numeric_format=numeric_format, workers=workers)
+    for col, (_, error) in parsed.items():
+        if error is not None:
+            raise error
+
+    def split(col):
+        return split_columns(parsed[col][0][0], col, slot_minutes)
+
+    reports = {}
+    for col, (new_columns, error) in zip(columns, run_tasks(split, columns, workers)):
+        if error is not None:
+            raise error
+        for name, values in new_columns.items():
+            df[name] = values
+        reports[col] = parsed[col][0][1]
+        if remove_original:
+            df.drop(columns=[col], inplace=True)
+    return reports
+
+
+def stream_split_csv(source, columns, out_path, remove_original=False,
+                     chunksize=DEFAULT_CHUNKSIZE, preview_rows=20, slot_minutes=60, numeric_format=None,
+                     workers=1, on_chunk=None):
+    """Split ``columns`` of a CSV chunk by chunk and write the result to ``out_path``.
+
+    ``source`` is a path or binary file object.  The datetime format of each
+    column is inferred on the first chunk and reused for the rest.
+    ``on_chunk(chunk)`` is called with every converted chunk (e.g. to
+    aggregate it) before it is written.
+
+    Returns ``(preview, reports, rows)``: the first ``preview_rows`` converted
+    rows, a ``{col: ParseReport}`` covering the whole file, and the row count.
+    """
+    reports = {col: ParseReport(column=col) for col in columns}
+    formats = {}
+    preview = None
+    rows = 0
+
+    with open(out_path, "w", encoding="utf-8", newline="") as out:
+        for i, chunk in enumerate(pd.read_csv(source, chunksize=chunksize)):
+            chunk_reports = split_datetime_columns(chunk, columns, remove_original, formats, slot_minutes,
+                                                   numeric_format, workers)
+            for col, report in chunk_reports.items():
+                reports[col].add(report)
+                if report.format is not None:
+                    formats.setdefault(col, report.format)
+
+            if on_chunk is not None:
+                on_chunk(chunk)
+            chunk.to_csv(out, index=False, header=(i == 0))
+            rows += len(chunk)
+            if preview is None:
+                preview = chunk.head(preview_rows)
+
+    return preview, reports, rows
+
+
+class StreamOutputs:
+    """Streamed output files in one directory, removed by age and total size.
+
+    A file counts as used when it is created (:meth:`new_path`) and each
+    time it is served (:meth:`touch`).  Files unused for ``ttl_seconds``
+    are removed, then the least recently used ones until the directory
+    holds at most ``max_bytes``.  The file being touched is never removed;
+    a session whose file was removed finds :meth:`touch` returning False
+    and converts again.
+    """
+
+    def __init__(self, max_bytes=4096 * 1024 * 1024, ttl_seconds=60 * 60, directory=None, clock=time.time):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.directory = directory or tempfile.mkdtemp(prefix="dateconverts_streams_")
+        self._clock = clock
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def new_path(self, suffix=".csv"):
+        """A new, empty file in the directory (older files are cleaned up first)."""
+        self.cleanup()
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=self.directory)
+        os.close(fd)
+        self._mark_used(path)
+        return path
+
+    def touch(self, path):
+        """Mark ``path`` as used and clean up the others; False if it is gone."""
+        try:
+            self._mark_used(path)
+        except OSError:
+            return False
+        self.cleanup(keep=path)
+        return True
+
+    def discard(self, path):
+        """Remove ``path`` (e.g. a result replaced by a new conversion)."""
+        if os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.directory):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _mark_used(self, path):
+        now = self._clock()
+        os.utime(path, (now, now))
+
+    def _files(self):
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+                except FileNotFoundError:
+                    continue
+        return sorted(files)
+
+    def cleanup(self, keep=None):
+        """Remove expired files, then the least recently used ones over the size budget.
+
+        Returns the bytes left in the directory.
+        """
+        keep = None if keep is None else os.path.abspath(keep)
+        with self._lock:
+            files = self._files()
+            total = sum(size for _, size, _ in files)
+            expired_before = self._clock() - self.ttl_seconds
+            for used, size, path in files:
+                if os.path.abspath(path) == keep:
+                    continue
+                if used < expired_before or total > self.max_bytes:
+                    self.discard(path)
+                    total -= size
+            return total
+
+
+def _default_streams_from_env():
+    return StreamOutputs(
+        max_bytes=int(os.environ.get("DATECONVERTS_STREAM_MB", "4096")) * 1024 * 1024,
+        ttl_seconds=float(os.environ.get("DATECONVERTS_STREAM_TTL_MINUTES", "60")) * 60,
+        directory=os.environ.get("DATECONVERTS_STREAM_DIR") or None,
+    )
+
+
+# Shared by every session of the server process
+default_streams = _default_streams_from_env()
@@ -0,0 +1,135 @@
+"""Streamlit widgets shared by the date / hour apps (pages needing pandas).
+
+Widgets every page uses live in :mod:`dateconverts.ui_common`.
+"""
+import uuid
+
+import pandas as pd
+import streamlit as st
+
+from dateconverts.export import EXPORT_FORMATS, export_bytes
+from dateconverts.jobs import default_jobs
+from dateconverts.parsing import NUMERIC_FORMATS, numeric_format_label
+from dateconverts.sessions import default_sessions
+
+
+def numeric_format_select():
+    """Selectbox for how numeric timestamp columns are encoded; None means auto-detect."""
+    return st.selectbox(
+        "🔢 Numeric timestamp columns are:", [None] + list(NUMERIC_FORMATS),
+        format_func=lambda fmt: "Auto-detect (epoch s/ms/µs/ns or Excel serial)" if fmt is None
+        else numeric_format_label(fmt),
+    )
+
+
+def parse_report_panel(reports):
+    """Datetime parsing report, noting how numeric columns were interpreted."""
+    for report in reports:
+        if report.format in NUMERIC_FORMATS:
+            st.info(f"🔢 {report.column} read as {numeric_format_label(report.format)}")
+    with st.expander("🔍 Datetime parsing report"):
+        st.dataframe(pd.DataFrame([r.as_dict() for r in reports]))
+
+
+def _session_token():
+    return st.session_state.setdefault("session_token", uuid.uuid4().hex)
+
+
+def session_frame():
+    """The frame this session is working on (kept in :data:`~dateconverts.sessions.default_sessions`).
+
+    Returns None before the first calculation, and after the frame was
+    evicted to keep the server under its memory cap (the user is told so).
+    """
+    token = _session_token()
+    default_sessions.touch(token)
+    if default_sessions.was_evicted(token):
+        st.warning("⚠️ Your calculated columns were released to free server memory. Please calculate again.")
+    return default_sessions.get(token)
+
+
+def set_session_frame(df):
+    """Store (or with None release) this session's frame; call again after changing it."""
+    default_sessions.put(_session_token(), df)
+
+
+def session_memory_panel():
+    """Sidebar readout of this session's frame size against the server-wide cap."""
+    mb = 2**20
+    with st.sidebar:
+        st.caption(
+            f"🧠 This session: {default_sessions.usage(_session_token()) / mb:,.1f} MB · "
+            f"all {len(default_sessions)} sessions: {default_sessions.total / mb:,.1f} / "
+            f"{default_sessions.max_bytes / mb:,.0f} MB"
+        )
+
+
+def session_job():
+    """This session's background job (running, or finished and not yet taken), or None."""
+    return default_jobs.get(_session_token())
+
+
+def submit_session_job(key, fn, *args, **kwargs):
+    """Start ``fn`` as this session's background job, unless one is already running.
+
+    ``key`` identifies what was asked for; if a different job is still
+    running, that one is kept and the user is told to cancel it first.
+    """
+    job = default_jobs.submit(_session_token(), key, fn, *args, **kwargs)
+    if job.key != key:
+        st.info("⏳ A calculation is already running for this session. Cancel it to start a new one.")
+    return job
+
+
+def cancel_session_job():
+    """Cancel this session's job and drop its result (e.g. a new file was uploaded)."""
+    default_jobs.cancel(_session_token())
+
+
+def take_finished_job():
+    """This session's job once it has finished (done, failed or cancelled), else None."""
+    return default_jobs.take(_session_token())
+
+
+def job_progress(job):
+    """Live progress bar and cancel button for a running job.
+
+    Refreshes every second without rerunning the rest of the script, and
+    reruns the whole app once the job has finished so its result is shown.
+    """
+    @st.fragment(run_every=1)
+    def progress():
+        if not job.running:
+            st.rerun()
+        st.progress(job.fraction, text=f"⏳ {job.describe()}")
+        if st.button("✖️ Cancel calculation", key=f"cancel_{job.id}", disabled=job.cancel_requested):
+            job.cancel()
+
+    progress()
+
+
+def cube_panel(cube, key, file_name="summary_cube"):
+    """Re-slice a :class:`~dateconverts.cube.SummaryCube` and download the slice.
+
+    Every widget change only re-aggregates the cube's cells, never the rows.
+    ``key`` prefixes the widget keys, so each page keeps its own selection.
+    """
+    st.markdown(f"### 🧊 Summary cube ({len(cube):,} cells)")
+    by = st.multiselect("Summarize by:", cube.dims, default=cube.dims, key=f"{key}_cube_by")
+    filters = {}
+    for col, dim in zip(st.columns(len(cube.dims) + 1), ["measure"] + cube.dims):
+        with col:
+            filters[dim] = st.multiselect(f"Only {dim}:", cube.levels(dim), key=f"{key}_cube_filter_{dim}")
+    if cube.histogram is not None and st.checkbox("Show duration bucket counts", key=f"{key}_cube_buckets"):
+        table = cube.bucket_counts(by, filters)
+    else:
+        table = cube.slice(by, filters)
+        if cube.percentiles and not (cube.exact and len(by) == len(cube.dims)):
+            st.caption(f"Percentiles of combined cells are interpolated to within {cube.bin_width:g} h.")
+    st.dataframe(table)
+    fmt = st.selectbox("Cube export format:", [f for f in ("xlsx", "parquet", "csv") if f in EXPORT_FORMATS],
+                       key=f"{key}_cube_format",
+                       format_func=lambda f: EXPORT_FORMATS[f]["label"])
+    info = EXPORT_FORMATS[fmt]
+    st.download_button(f"⬇️ Download Summary ({info['label']})", export_bytes(table, fmt),
+                       file_name=f"{file_name}.{info['extension']}", mime=info["mime"])
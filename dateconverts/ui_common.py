@@ -0,0 +1,127 @@
+"""Streamlit widgets every page uses, plus the variant pages' catalog upload,
+without the data-processing dependencies.
+
+The variant pages only need these, so importing them must not pull in
+pandas / numpy (see :mod:`dateconverts.ui` for the data widgets).
+
+In the multipage app (``streamlit_app.py``) one upload in the sidebar is
+shared by the date / hour pages: :func:`data_upload` returns it instead
+of showing an uploader on each page, so a file uploaded once can be
+split on one page and hour-diffed on another.
+"""
+import streamlit as st
+
+from dateconverts.catalog import (
+    line_errors, model_zip_file, parse_catalog_lines, read_catalog_lines, render_error_report
+)
+from dateconverts.instrument import profiler_from_env
+from dateconverts.variants import PREVIEW_LINES
+
+DATA_FILE_TYPES = ["csv", "xlsx"]
+DATA_UPLOAD_LABEL = "📤 Upload CSV or Excel file"
+CATALOG_FILE_TYPES = ["txt", "csv", "xlsx"]
+
+# Columns shown in the sidebar table; the JSON download has all of them
+PANEL_COLUMNS = ["stage", "seconds", "rows", "rows_per_sec", "rss_delta_mb", "peak_rss_mb", "traced_peak_mb"]
+
+
+def session_profiler():
+    """The session's :class:`~dateconverts.instrument.Profiler`, toggled from the sidebar.
+
+    Profiling starts enabled when ``DATECONVERTS_PROFILE_LOG`` is set (and
+    then also logs to that file); otherwise it is off until the user ticks
+    the sidebar checkbox.
+    """
+    if "profiler" not in st.session_state:
+        st.session_state.profiler = profiler_from_env()
+    profiler = st.session_state.profiler
+    with st.sidebar:
+        profiler.enabled = st.checkbox("⏱️ Record stage timings", value=profiler.enabled, key="profile_enabled")
+        profiler.trace_memory = profiler.enabled and st.checkbox(
+            "🧠 Trace allocations (slower)", value=profiler.trace_memory, key="profile_trace_memory"
+        )
+    return profiler
+
+
+def profiler_panel(profiler):
+    """Collapsible sidebar table of the recorded stages with a JSON download.
+
+    Call at the end of the script so the stages of the current run are included.
+    """
+    if not profiler.enabled and not profiler.records:
+        return
+    with st.sidebar.expander("⏱️ Stage timings", expanded=False):
+        if not profiler.records:
+            st.caption("Run a step to see its timings here.")
+            return
+        records = list(profiler.records)[::-1]  # newest first
+        st.dataframe([{col: r.get(col) for col in PANEL_COLUMNS} for r in records], hide_index=True)
+        st.download_button("⬇️ Download timings (JSON)", profiler.to_json(),
+                           file_name="stage_timings.json", mime="application/json")
+        if st.button("🧹 Clear timings"):
+            profiler.clear()
+
+
+def shared_upload_sidebar():
+    """The multipage app's sidebar upload, shared by its data pages."""
+    st.session_state.multipage = True
+    with st.sidebar:
+        st.session_state.shared_upload = st.file_uploader(DATA_UPLOAD_LABEL, type=DATA_FILE_TYPES,
+                                                          key="shared_upload_widget")
+    return st.session_state.shared_upload
+
+
+def data_upload():
+    """The page's data upload: the shared sidebar one in the multipage app, else its own uploader."""
+    if st.session_state.get("multipage"):
+        return st.session_state.get("shared_upload")
+    return st.file_uploader(DATA_UPLOAD_LABEL, type=DATA_FILE_TYPES)
+
+
+def catalog_upload_panel(profiler, strict=False):
+    """The variant pages' bulk catalog section: upload, parse, error report and per-model ZIP.
+
+    ``strict`` picks the page's parsing rules (see :func:`dateconverts.variants.parse_line`),
+    so a line gives the same fields whether it was pasted or uploaded.
+    """
+    st.markdown("---")
+    st.subheader("📂 Bulk Catalog File")
+    catalog_file = st.file_uploader("📤 Upload a catalog file (TXT, CSV or XLSX, one variant per line)",
+                                    type=CATALOG_FILE_TYPES)
+    if not catalog_file or not st.button("📦 Build Per-Model ZIP"):
+        return
+
+    try:
+        with profiler.stage("read_catalog") as stage:
+            catalog_lines, line_numbers = read_catalog_lines(catalog_file)
+            stage.rows = len(catalog_lines)
+    except Exception as e:
+        st.error(f"⚠️ Could not read {catalog_file.name}: {e}")
+        return
+
+    with st.spinner(f"Parsing {len(catalog_lines)} lines..."):
+        # Large catalogs are parsed in chunks across a process pool
+        with profiler.stage("parse_catalog", len(catalog_lines)):
+            parsed = parse_catalog_lines(catalog_lines, strict=strict)
+            errors = line_errors(catalog_lines, parsed, line_numbers)
+        with profiler.stage("build_zip", len(parsed)):
+            zip_file, model_count = model_zip_file(parsed, errors=errors)
+
+    st.success(f"✅ Parsed {len(catalog_lines)} variants into {model_count} models")
+
+    if errors:
+        st.warning(f"⚠️ {len(errors)} lines are missing a name or price")
+        st.dataframe(errors[:PREVIEW_LINES])
+        st.download_button(
+            "📥 Download Error Report (CSV)",
+            render_error_report(errors),
+            "variant_errors.csv",
+            "text/csv"
+        )
+
+    st.download_button(
+        "📥 Download ZIP (one HTML file per model)",
+        zip_file,
+        "variants_by_model.zip",
+        "application/zip"
+    )
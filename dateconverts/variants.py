@@ -0,0 +1,224 @@
+"""Variant line parsing and HTML rendering for the EV variant converters.
+
+A catalog line looks like::
+
+    Mahindra XEV 9e Pack One (Electric)Rs.21.90 Lakh*, 59 kWh, 542 km, 228 bhp
+"""
+import io
+import re
+import tempfile
+from html import escape
+
+# Catalog lines almost always follow one layout, which a single precompiled
+# pattern parses in one pass:
+#   <name>Rs.<price> Lakh*, <battery> kWh, <range> km, <bhp> bhp
+_CATALOG_LINE = re.compile(
+    r"(?P<head>.*?)Rs\.(?P<price>\d+(?:\.\d+)?) ?Lakh\*?"
+    r"(?:, (?P<battery>\d+(?:\.\d+)?) ?kWh)?"
+    r"(?:, (?P<range>\d+) ?km)?"
+    r"(?:, (?P<bhp>\d+(?:\.\d+)?) ?bhp)?",
+    re.DOTALL,
+)
+# If the name part contains one of these, a field could be found inside the
+# name, so such lines go through the general per-field rules instead
+_UNIT_WORDS = ("lakh", "kwh", "km", "bhp")
+
+# General per-field rules (first match anywhere in the text)
+_PRICE_RS = re.compile(r"Rs\.?\s*([\d\.]+)\s*Lakh", re.IGNORECASE)
+_PRICE = re.compile(r"([\d\.]+)\s*Lakh", re.IGNORECASE)
+_BATTERY = re.compile(r"(\d+\.?\d*)\s*kWh", re.IGNORECASE)
+_RANGE = re.compile(r"(\d+)\s*km", re.IGNORECASE)
+_BHP = re.compile(r"(\d+\.?\d*)\s*bhp", re.IGNORECASE)
+_LAKH_SPLIT = re.compile(r"\d+\.?\d*\s*Lakh", re.IGNORECASE)
+
+# "7.2kw Charger" -> "7.2kW Charger", "11kw" -> "11kW"
+_KW = re.compile(r"(\d+\.?\d*)\s*kw(\s+|\b)", re.IGNORECASE)
+_KW_SPACED = re.compile(r"(\d+\.?\d*)\s*kw\s+", re.IGNORECASE)
+
+VARIANT_FIELDS = ("name", "price", "battery", "range_km", "bhp")
+MODEL_WORDS = 3  # leading words of a variant name that identify its model
+
+# How much the Streamlit pages render; downloads always contain everything
+PREVIEW_LINES = 200
+PREVIEW_VARIANTS = 50
+
+
+def _fix_kw(match):
+    return match.group(1) + "kW" + (" " if match.group(2) else "")
+
+
+def _clean_name(name, strict):
+    if strict:
+        return _KW_SPACED.sub(r"\1kW ", name)
+    return _KW.sub(_fix_kw, name.rstrip(",*").strip())
+
+
+def _first(pattern, text):
+    match = pattern.search(text)
+    return match.group(1) if match else None
+
+
+def _format(name, price, battery, range_km, bhp):
+    return (
+        name,
+        price or "",
+        battery + " kWh" if battery else "",
+        range_km + " km" if range_km else "",
+        bhp + " bhp" if bhp else "",
+    )
+
+
+def parse_line(line, strict=False):
+    """Parse one catalog line into ``(name, price, battery, range_km, bhp)``.
+
+    The default rules are the ones from variant.py: the name is the text
+    before "Rs." (or before the "<number> Lakh" price when "Rs." is
+    missing) and every field is looked up in the whole line.
+
+    ``strict=True`` follows variant_app.py: the name is the text before
+    "Rs.", fields are only looked up after it, and the price needs "Rs.".
+    """
+    match = _CATALOG_LINE.fullmatch(line)
+    if match is not None:
+        head = match.group("head")
+        lowered = head.lower()
+        if "Rs." not in head and not any(word in lowered for word in _UNIT_WORDS):
+            return _format(_clean_name(head.strip(), strict), *match.group("price", "battery", "range", "bhp"))
+
+    rs_at = line.find("Rs.")
+    if strict:
+        if rs_at >= 0:
+            name = line[:rs_at].strip()
+            next_rs = line.find("Rs.", rs_at + 3)
+            details = line[rs_at:] if next_rs < 0 else line[rs_at:next_rs]
+        else:
+            name = line.strip()
+            details = line
+        price = _first(_PRICE_RS, details)
+    else:
+        if rs_at >= 0:
+            name = line[:rs_at].strip()
+        elif "Lakh" in line:
+            # Sometimes it's just "21.90 Lakh" without Rs.
+            lakh = _LAKH_SPLIT.search(line)
+            name = (line[:lakh.start()] if lakh else line).strip()
+        else:
+            # No price found, use the whole line as name
+            name = line.strip()
+        details = line
+        price = _first(_PRICE_RS, details) or _first(_PRICE, details)
+
+    return _format(
+        _clean_name(name, strict),
+        price,
+        _first(_BATTERY, details),
+        _first(_RANGE, details),
+        _first(_BHP, details),
+    )
+
+
+def parse_lines(lines, strict=False):
+    """Parse many lines at once; returns ``{field: list}`` column arrays."""
+    columns = {field: [] for field in VARIANT_FIELDS}
+    appends = [columns[field].append for field in VARIANT_FIELDS]
+    for line in lines:
+        for append, value in zip(appends, parse_line(line, strict)):
+            append(value)
+    return columns
+
+
+def parse_catalog(lines, strict=False):
+    """Parse many lines into a DataFrame with one row per line."""
+    import pandas as pd
+
+    return pd.DataFrame(parse_lines(lines, strict), columns=list(VARIANT_FIELDS))
+
+
+def extract_data(line):
+    """Extract variant name, price, battery, and range from a line of text"""
+    return parse_line(line)[:4]
+
+
+def extract_data_basic(line):
+    """Stricter variant of :func:`extract_data` used by variant_app.py.
+
+    The name is everything before "Rs." and price/battery/range are only
+    looked for after it.
+    """
+    return parse_line(line, strict=True)[:4]
+
+
+def split_lines(raw_data):
+    """Non-empty, stripped lines of pasted/uploaded catalog text."""
+    return [line.strip() for line in raw_data.strip().split("\n") if line.strip()]
+
+
+def model_name(name, words=MODEL_WORDS):
+    """Model a variant belongs to: the first ``words`` words of its name.
+
+    "Mahindra XEV 9e Pack One (Electric)" -> "Mahindra XEV 9e".
+    """
+    return " ".join(name.split()[:words])
+
+
+def group_by_model(all_data, words=MODEL_WORDS):
+    """``{model: [variant, ...]}`` in order of first appearance."""
+    groups = {}
+    for variant in all_data:
+        groups.setdefault(model_name(variant[0], words), []).append(variant)
+    return groups
+
+
+def write_variant_block(out, variants):
+    """Write one ``variant-toggle`` block for ``variants`` to ``out``."""
+    out.write(f"""<div class="variant-toggle">
+  <span class="variant-count-text">{len(variants)} Variants Available</span>
+  <span class="arrow">▼</span>
+</div>
+
+<div class="variant-content">
+""")
+    for name, price, battery, range_km in (v[:4] for v in variants):
+        out.write(f"""  <div class="variant-item">
+    <span>{escape(name)}</span>
+    <span>₹{escape(price)} Lakh | {escape(battery)} | {escape(range_km)}</span>
+  </div>
+
+""")
+    out.write("</div>")
+
+
+def write_variant_html(out, all_data, by_model=False, words=MODEL_WORDS):
+    """Stream the HTML for ``all_data`` to the text file ``out`` in one pass.
+
+    With ``by_model`` every model gets its own ``variant-toggle`` block.
+    Returns the number of blocks written.
+    """
+    blocks = group_by_model(all_data, words).values() if by_model else [all_data]
+    for i, variants in enumerate(blocks):
+        if i:
+            out.write("\n\n")
+        write_variant_block(out, variants)
+    return len(blocks)
+
+
+def render_variant_html(all_data, by_model=False, words=MODEL_WORDS):
+    """HTML for a list of ``(name, price, battery, range_km)`` tuples, as a string."""
+    out = io.StringIO()
+    write_variant_html(out, all_data, by_model, words)
+    return out.getvalue()
+
+
+def render_variant_file(all_data, by_model=False, words=MODEL_WORDS):
+    """Write the HTML to a temporary file; returns it as a binary file at offset 0.
+
+    The file is unbuffered (a raw ``FileIO``) so ``st.download_button``
+    accepts it directly.
+    """
+    raw = tempfile.TemporaryFile(buffering=0)
+    text = io.TextIOWrapper(io.BufferedWriter(raw), encoding="utf-8", newline="")
+    write_variant_html(text, all_data, by_model, words)
+    text.flush()
+    text.detach().detach()
+    raw.seek(0)
+    return raw
@@ -0,0 +1,40 @@
+import streamlit as st
+
+from dateconverts.ui_common import shared_upload_sidebar
+
+# One server for every tool.  A page's script, and with it its imports
+# (pandas, numpy, openpyxl for the date / hour tools), only runs once the
+# page is opened; the variant tools never load them.  Caches, session
+# frames and background jobs are module globals, so all pages share them.
+DATA_PAGES = [
+    st.Page("app.py", title="Date-Time Splitter", icon="⏰"),
+    st.Page("app1.py", title="Hour & Percentile Calculator", icon="📊"),
+    st.Page("app2.py", title="Hours, Percentiles & Buckets", icon="🧮"),
+]
+VARIANT_PAGES = [
+    st.Page("variant.py", title="EV Variant HTML Converter", icon="🚗"),
+    st.Page("variant_app.py", title="EV Variant HTML Converter (strict)", icon="🚙"),
+]
+
+
+def home():
+    st.title("🧰 Dateconverts tools")
+    st.write("The file uploaded in the sidebar is shared by the date and hour tools: split its "
+             "date-time columns on one page and calculate hour differences on another without "
+             "uploading it again.")
+    st.markdown("#### 📅 Date & hour tools")
+    for page in DATA_PAGES:
+        st.page_link(page)
+    st.markdown("#### 🚗 EV variant tools")
+    for page in VARIANT_PAGES:
+        st.page_link(page)
+
+
+page = st.navigation({
+    "": [st.Page(home, title="Home", icon="🧰", default=True)],
+    "Date & hour tools": DATA_PAGES,
+    "EV variant tools": VARIANT_PAGES,
+})
+# Rendered on every page so the upload survives visits to the variant tools
+shared_upload_sidebar()
+page.run()
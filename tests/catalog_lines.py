@@ -0,0 +1,27 @@
+"""Seeded catalog lines in the pasted-from-website format, for the parser tests."""
+import random
+
+MAKES = {
+    "Mahindra": ["XEV 9e", "BE 6", "XUV400"],
+    "Tata": ["Nexon EV", "Punch EV", "Curvv EV", "Tiago EV"],
+    "MG": ["Windsor EV", "ZS EV", "Comet EV"],
+    "Hyundai": ["Creta Electric", "Ioniq 5"],
+}
+TRIMS = ["Pack One", "Pack Two", "Pack Three Select", "Creative Plus", "Empowered Plus LR", "Exclusive Pro"]
+CHARGERS = ["", " 7.2kw Charger", " 11.2kw Charger", " 3.3 kw"]
+
+
+def generate_catalog(n_lines, seed=0):
+    """The same ``seed`` always gives the same lines."""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(n_lines):
+        make = rng.choice(list(MAKES))
+        name = f"{make} {rng.choice(MAKES[make])} {rng.choice(TRIMS)}{rng.choice(CHARGERS)} (Electric)"
+        price = f"{rng.uniform(7, 60):.2f}"
+        parts = [f"{rng.randint(25, 90)} kWh", f"{rng.randint(200, 700)} km"]
+        if rng.random() < 0.7:
+            parts.append(f"{rng.randint(60, 400)} bhp")
+        prefix = "Rs." if rng.random() < 0.95 else ""
+        lines.append(f"{name}{prefix}{price} Lakh*, " + ", ".join(parts))
+    return lines
@@ -0,0 +1,95 @@
+"""Duration buckets must match the ``pd.cut`` labels of the original app2.py."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from dateconverts.buckets import add_bucket_column, bucket_codes, bucket_histogram, bucket_values
+
+
+def legacy_buckets(values, width=0.5):
+    """The original bucketing of app2.py."""
+    values = pd.to_numeric(pd.Series(values), errors="coerce")
+    numeric_val = values.dropna()
+    min_val = np.floor(numeric_val.min())
+    max_val = np.ceil(numeric_val.max())
+    bins = np.arange(min_val, max_val + width, width)
+    labels = [f"{bins[i]:.1f}-{bins[i+1]:.1f} Hr" for i in range(len(bins) - 1)]
+    return pd.cut(values, bins=bins, labels=labels, include_lowest=True)
+
+
+def _labels(buckets):
+    return pd.Series(buckets).astype(object).where(pd.Series(buckets).notna(), None).tolist()
+
+
+def _values(seed, rows=5000):
+    rng = np.random.default_rng(seed)
+    values = np.round(rng.gamma(2, 3, rows) - 2, 2)
+    values[rng.random(rows) < 0.05] = np.nan
+    # Plenty of values exactly on the edges
+    values[::17] = np.round(values[::17] * 2) / 2
+    return values
+
+
+@pytest.mark.parametrize("width", [0.5, 1.0])
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_legacy_labels(seed, width):
+    values = _values(seed)
+    assert _labels(bucket_values(values, width)) == _labels(legacy_buckets(values, width))
+
+
+def test_right_closed_edges():
+    values = [0.0, 0.5, 0.51, 1.0, 1.5, 2.0]
+    assert _labels(bucket_values(values)) == [
+        "0.0-0.5 Hr", "0.0-0.5 Hr", "0.5-1.0 Hr", "0.5-1.0 Hr", "1.0-1.5 Hr", "1.5-2.0 Hr",
+    ]
+    assert _labels(bucket_values(values)) == _labels(legacy_buckets(values))
+
+
+def test_negative_durations():
+    values = [-1.2, -1.0, -0.5, 0.3]
+    codes, origin = bucket_codes(values)
+    assert origin == -2.0
+    assert codes.tolist() == [1, 1, 2, 4]
+    assert _labels(bucket_values(values)) == _labels(legacy_buckets(values))
+    assert _labels(bucket_values(values))[0] == "-1.5--1.0 Hr"
+
+
+def test_missing_values():
+    values = [np.nan, 0.2, np.nan, 3.7]
+    codes, _ = bucket_codes(values)
+    assert codes.tolist() == [-1, 0, -1, 7]
+    assert _labels(bucket_values(values)) == [None, "0.0-0.5 Hr", None, "3.5-4.0 Hr"]
+    codes, origin = bucket_codes([np.nan, np.nan])
+    assert codes.tolist() == [-1, -1] and origin is None
+    assert bucket_values([np.nan]) is None
+
+
+def test_only_populated_buckets_are_categories():
+    buckets = bucket_values([0.1, 0.2, 900.0])
+    assert list(buckets.categories) == ["0.0-0.5 Hr", "899.5-900.0 Hr"]
+    assert buckets.ordered
+
+
+def test_overflow_cap():
+    values = [0.1, 2.0, 2.01, 900.0, np.nan]
+    codes, _ = bucket_codes(values, cap=2.0)
+    assert codes.tolist() == [0, 3, -2, -2, -1]
+    buckets = bucket_values(values, cap=2.0)
+    # A value equal to the cap stays in its bucket; the overflow bucket comes last
+    assert _labels(buckets) == ["0.0-0.5 Hr", "1.5-2.0 Hr", ">2.0 Hr", ">2.0 Hr", None]
+    assert list(buckets.categories) == ["0.0-0.5 Hr", "1.5-2.0 Hr", ">2.0 Hr"]
+
+
+def test_fine_widths_get_two_decimals():
+    assert _labels(bucket_values([0.1, 0.3], width=0.25)) == ["0.00-0.25 Hr", "0.25-0.50 Hr"]
+
+
+def test_bucket_column_and_histogram():
+    df = pd.DataFrame({"a_Hr": [0.1, 0.2, 0.7, np.nan, 1.2], "grp": ["x", "y", "x", "x", "y"]})
+    assert add_bucket_column(df, "a_Hr") == "a_Bucket"
+    table = bucket_histogram(df, ["a_Bucket"])
+    assert table["bucket"].astype(str).tolist() == ["0.0-0.5 Hr", "0.5-1.0 Hr", "1.0-1.5 Hr"]
+    assert table["count"].tolist() == [2, 1, 1]
+    grouped = bucket_histogram(df, ["a_Bucket"], "grp")
+    assert grouped["count"].sum() == 4 and list(grouped.columns) == ["column", "grp", "bucket", "count"]
+    assert add_bucket_column(pd.DataFrame({"b_Hr": ["n/a", None]}), "b_Hr") is None
@@ -0,0 +1,122 @@
+"""The content-hash keyed frame cache: budget, spill files and keys."""
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dateconverts import ingest
+from dateconverts.ingest import FrameCache, LRUDict, frame_nbytes, load_upload, upload_key
+
+
+class FakeUpload(io.BytesIO):
+    """Stands in for Streamlit's UploadedFile."""
+
+    def __init__(self, data, name="data.csv", file_id=None):
+        super().__init__(data)
+        self.name = name
+        self.file_id = file_id
+
+
+def _frame(seed, rows=1000):
+    return pd.DataFrame({"x": np.random.default_rng(seed).random(rows), "n": np.arange(rows)})
+
+
+SIZE = frame_nbytes(_frame(0))
+
+
+def test_least_recently_used_frame_is_evicted():
+    cache = FrameCache(max_bytes=2 * SIZE)
+    cache.put("a", _frame(0))
+    cache.put("b", _frame(1))
+    cache.get("a")
+    assert cache.put("c", _frame(2)) == ["b"]
+    assert "b" not in cache and cache.get("b") is None
+    assert cache.nbytes == 2 * SIZE
+
+
+def test_newest_frame_is_kept_over_budget():
+    cache = FrameCache(max_bytes=SIZE // 2)
+    cache.put("a", _frame(0))
+    assert cache.put("big", _frame(1, rows=5000)) == ["a"]
+    assert cache.get("big") is not None
+
+
+@pytest.mark.parametrize("spill_format", ["parquet", "feather"])
+def test_evicted_frames_are_reloaded_from_spill(tmp_path, spill_format):
+    pytest.importorskip("pyarrow")
+    cache = FrameCache(max_bytes=SIZE, spill_dir=str(tmp_path), spill_format=spill_format)
+    first = _frame(0)
+    cache.put("a", first)
+    cache.put("b", _frame(1))
+    assert os.listdir(tmp_path) == [f"a.{spill_format}"]
+    assert "a" in cache
+    pd.testing.assert_frame_equal(cache.get("a"), first)
+    # Reloading makes it the newest frame again
+    assert cache.get("b") is not None and os.path.exists(tmp_path / f"b.{spill_format}")
+
+
+def test_spill_files_have_a_budget(tmp_path):
+    pytest.importorskip("pyarrow")
+    cache = FrameCache(max_bytes=SIZE, spill_dir=str(tmp_path), max_spill_bytes=1)
+    for i, key in enumerate("abc"):
+        cache.put(key, _frame(i))
+    # Every spilled file is over the tiny budget, so none is kept
+    assert os.listdir(tmp_path) == [] and cache.spill_nbytes == 0
+    cache = FrameCache(max_bytes=SIZE, spill_dir=str(tmp_path), max_spill_bytes=10 * SIZE)
+    for i, key in enumerate("abc"):
+        cache.put(key, _frame(i))
+    assert sorted(os.listdir(tmp_path)) == ["a.parquet", "b.parquet"]
+    cache.max_spill_bytes = os.path.getsize(tmp_path / "b.parquet")
+    cache.put("d", _frame(3))  # spills c; a is the least recently used file
+    assert sorted(os.listdir(tmp_path)) == ["c.parquet"]
+
+
+def test_spill_files_are_adopted_and_cleared(tmp_path):
+    pytest.importorskip("pyarrow")
+    cache = FrameCache(max_bytes=SIZE, spill_dir=str(tmp_path))
+    cache.put("a", _frame(0))
+    cache.put("b", _frame(1))
+    # A new process finds the file of the same content again
+    restarted = FrameCache(max_bytes=SIZE, spill_dir=str(tmp_path))
+    assert restarted.spill_nbytes > 0
+    pd.testing.assert_frame_equal(restarted.get("a"), _frame(0))
+    restarted.clear()
+    assert os.listdir(tmp_path) == [] and restarted.spill_nbytes == 0
+
+
+def test_invalidate_forgets_memory_and_disk(tmp_path):
+    pytest.importorskip("pyarrow")
+    cache = FrameCache(max_bytes=SIZE, spill_dir=str(tmp_path))
+    cache.put("a", _frame(0))
+    cache.put("b", _frame(1))
+    cache.invalidate("a")
+    cache.invalidate("b")
+    assert "a" not in cache and "b" not in cache
+    assert cache.nbytes == 0 and os.listdir(tmp_path) == []
+
+
+def test_keys_follow_content_and_sheet():
+    csv = b"a,b\n1,2\n"
+    assert upload_key(FakeUpload(csv)) == upload_key(FakeUpload(csv, name="renamed.csv"))
+    assert upload_key(FakeUpload(csv)) != upload_key(FakeUpload(csv + b"3,4\n"))
+    assert upload_key(FakeUpload(csv), "Sheet1") != upload_key(FakeUpload(csv), "Sheet2")
+
+
+def test_changed_upload_is_parsed_again():
+    cache = FrameCache()
+    assert load_upload(FakeUpload(b"a\n1\n"), cache=cache)["a"].tolist() == [1]
+    assert load_upload(FakeUpload(b"a\n2\n"), cache=cache)["a"].tolist() == [2]
+    # Adding columns to the returned frame does not touch the cached one
+    df = load_upload(FakeUpload(b"a\n1\n"), cache=cache)
+    df["b"] = 0
+    assert list(load_upload(FakeUpload(b"a\n1\n"), cache=cache).columns) == ["a"]
+
+
+def test_upload_lookups_are_bounded(monkeypatch):
+    monkeypatch.setattr(ingest, "_digests", LRUDict(max_entries=2))
+    for i in range(5):
+        ingest.upload_digest(FakeUpload(f"a\n{i}\n".encode(), file_id=f"id{i}"))
+    assert len(ingest._digests) == 2
+    assert "id4" in ingest._digests and "id0" not in ingest._digests
@@ -0,0 +1,88 @@
+"""Catalog file reading: the same lines as before, reported at their line in the file."""
+import csv
+import io
+
+import pytest
+from openpyxl import Workbook
+
+from dateconverts.catalog import line_errors, parse_catalog_lines, read_catalog_lines
+from dateconverts.variants import split_lines
+
+GOOD = "Tata Nexon EV Creative 45 (Electric) | Rs. 13.99 Lakh | 45 kWh | 489 km | 148 bhp"
+NO_PRICE = "Tata Punch EV Smart (Electric) | 25 kWh | 265 km | 80 bhp"
+
+
+class FakeUpload(io.BytesIO):
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+def _split_old(name, data):
+    """The lines as read before line numbers were kept."""
+    if name.endswith(".csv"):
+        rows = csv.reader(io.StringIO(data.decode("utf-8-sig", errors="replace"), newline=""))
+        return split_lines("\n".join(",".join(row) for row in rows))
+    return split_lines(data.decode("utf-8-sig", errors="replace"))
+
+
+# file -> (bytes, line numbers of the non-empty lines)
+TEXTS = {
+    "blank lines.txt": (f"\n\n{GOOD}\n\n   \n{NO_PRICE}\n{GOOD}\n\n".encode(), [3, 6, 7]),
+    "crlf.txt": (f"\ufeff{GOOD}\r\n\r\n{NO_PRICE}\r\n".encode(), [1, 3]),
+    # A quoted cell spanning lines 3-4, then a row of empty cells
+    "quoted.csv": (f'{GOOD}\n\n"{NO_PRICE}\nsecond line of the cell",x\n,,\n{GOOD}\n'.encode(), [1, 3, 4, 5, 6]),
+    "commas.csv": (f"\n{GOOD.replace(' | ', ',')}\n\n{NO_PRICE}\n".encode(), [2, 4]),
+}
+
+
+@pytest.mark.parametrize("name", TEXTS)
+def test_lines_are_unchanged_and_numbered_as_in_the_file(name):
+    data, expected = TEXTS[name]
+    lines, numbers = read_catalog_lines(FakeUpload(data, name))
+    assert lines == _split_old(name, data)
+    assert numbers == expected
+
+
+def test_errors_point_at_the_original_line():
+    data, _ = TEXTS["blank lines.txt"]
+    lines, numbers = read_catalog_lines(FakeUpload(data, "catalog.txt"))
+    errors = line_errors(lines, parse_catalog_lines(lines, workers=1), numbers)
+    assert [e["line"] for e in errors] == [6]
+    assert errors[0]["text"] == NO_PRICE
+    # Without numbers the lines are counted as given
+    assert [e["line"] for e in line_errors(lines, parse_catalog_lines(lines, workers=1))] == [2]
+
+
+def test_xlsx_rows_are_sheet_rows(tmp_path):
+    book = Workbook()
+    sheet = book.active
+    sheet["A2"] = GOOD
+    sheet["A4"] = NO_PRICE
+    sheet["A7"], sheet["B7"] = "Tata Tiago EV XE (Electric) | Rs. 7.99 Lakh", "19.2 kWh"
+    path = tmp_path / "catalog.xlsx"
+    book.save(path)
+    lines, numbers = read_catalog_lines(str(path))
+    assert lines == [GOOD, NO_PRICE, "Tata Tiago EV XE (Electric) | Rs. 7.99 Lakh,19.2 kWh"]
+    assert numbers == [2, 4, 7]
+    assert [e["line"] for e in line_errors(lines, parse_catalog_lines(lines, workers=1), numbers)] == [4]
+
+
+def test_large_catalogs_are_parsed_on_the_shared_pool(monkeypatch):
+    from dateconverts import catalog, scheduler
+
+    monkeypatch.setenv("DATECONVERTS_PROCESS_WORKERS", "2")
+    monkeypatch.setattr(catalog, "PARALLEL_MIN_LINES", 0)
+    calls = []
+
+    def run_tasks(fn, items, workers=1, processes=False, progress=None):
+        calls.append(processes)
+        return scheduler.run_tasks(fn, items, workers, processes, progress)
+
+    monkeypatch.setattr(catalog, "run_tasks", run_tasks)
+    lines = [GOOD, NO_PRICE, "Tata Tiago EV XE (Electric) | Rs. 7.99 Lakh"] * 20
+    pooled = parse_catalog_lines(lines, workers=2, chunk_lines=7)
+    assert calls == [True]
+    assert pooled == parse_catalog_lines(lines, workers=1)
+    # The server's pool (forkserver/spawn) is used, not a private forked one
+    assert scheduler.process_pool()._mp_context.get_start_method() in ("forkserver", "spawn")
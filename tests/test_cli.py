@@ -0,0 +1,83 @@
+"""The batch CLI end to end, on temporary input files."""
+import json
+import re
+
+import pandas as pd
+import pytest
+
+from dateconverts.cli import main, output_stems
+
+SPEC = {"pairs": [["start", "end"]], "percentiles": [90], "group_col": "group", "bucket": True}
+
+
+def _write_input(path, hours):
+    start = pd.Timestamp("2026-01-01 08:00")
+    pd.DataFrame({
+        "group": ["A", "B"] * (len(hours) // 2),
+        "start": [start.strftime("%d/%m/%Y %H:%M")] * len(hours),
+        "end": [(start + pd.Timedelta(hours=h)).strftime("%d/%m/%Y %H:%M") for h in hours],
+    }).to_csv(path, index=False)
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    # The same file name in two directories
+    for name, hours in (("a", [1, 2]), ("b", [3, 4, 5, 6])):
+        (tmp_path / name).mkdir()
+        _write_input(tmp_path / name / "data.csv", hours)
+    spec = tmp_path / "job.json"
+    spec.write_text(json.dumps(SPEC))
+    return tmp_path, str(spec)
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_same_file_names_get_their_own_outputs(inputs, workers, capsys):
+    root, spec = inputs
+    out = root / "out"
+    assert main(["run", spec, str(root / "a"), str(root / "b"), "-o", str(out), "-w", workers]) == 0
+
+    summary = json.loads((out / "run_summary.json").read_text())
+    assert summary["files"] == 2 and summary["failed"] == 0
+    outputs = {r["input"]: r["output"] for r in summary["results"]}
+    assert sorted(p.name for p in out.iterdir()) == [
+        "data_2_bucket_summary.csv", "data_2_processed.csv", "data_bucket_summary.csv", "data_processed.csv",
+        "run_summary.json",
+    ]
+    # Each output holds its own input's rows
+    a = pd.read_csv(outputs[str(root / "a" / "data.csv")])
+    b = pd.read_csv(outputs[str(root / "b" / "data.csv")])
+    assert a["start_to_end_Hr"].tolist() == [1.0, 2.0]
+    assert b["start_to_end_Hr"].tolist() == [3.0, 4.0, 5.0, 6.0]
+    assert "start_to_end_Hr_P90" in b.columns
+    assert "2 file(s), 0 failed" in capsys.readouterr().out
+
+
+def test_failed_input_is_reported(inputs):
+    root, spec = inputs
+    (root / "bad.csv").write_text("start,end\nnot a date,also not\n")
+    out = root / "out"
+    spec_data = dict(SPEC, pairs=[["start", "nope"]])
+    (root / "job.json").write_text(json.dumps(spec_data))
+    assert main(["run", spec, str(root / "bad.csv"), "-o", str(out)]) == 0
+    result = json.loads((out / "run_summary.json").read_text())["results"][0]
+    assert result["status"] == "partial" and result["errors"]
+    assert main(["run", spec, str(root / "missing*.csv"), "-o", str(out)]) == 2
+
+
+def test_output_stems():
+    assert output_stems(["a/data.csv", "b/data.csv", "c/Data.xlsx", "d/other.csv"]) == {
+        "a/data.csv": "data", "b/data.csv": "data_2", "c/Data.xlsx": "Data_3", "d/other.csv": "other",
+    }
+
+
+def test_variants_strict_rules(tmp_path):
+    catalog = tmp_path / "catalog.txt"
+    catalog.write_text("Tata Punch EV 25 kWh 315 km Rs.10.99 Lakh*\n", encoding="utf-8")
+    assert main(["variants", str(catalog), "-o", str(tmp_path / "default")]) == 0
+    assert main(["variants", str(catalog), "-o", str(tmp_path / "strict"), "--strict"]) == 0
+    fields = {}
+    for rules in ("default", "strict"):
+        html = (tmp_path / rules / "catalog.html").read_text(encoding="utf-8")
+        fields[rules] = re.findall(r'<div class="variant-item">\s*<span>.*?</span>\s*<span>(.*?)</span>', html)
+    # Only the default rules look for the battery and range before "Rs."
+    assert fields == {"default": ["₹10.99 Lakh | 25 kWh | 315 km"], "strict": ["₹10.99 Lakh |  | "]}
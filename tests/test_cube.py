@@ -0,0 +1,120 @@
+"""Summary cube statistics against plain pandas group-bys on the rows."""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dateconverts.cube import DATE_DIM, SLOT_DIM, SummaryCube, build_cube, split_measures, time_dims
+from dateconverts.export import export_bytes
+
+BIN_WIDTH = 0.5
+
+
+@pytest.fixture(scope="module")
+def rows():
+    rng = np.random.default_rng(0)
+    n = 50_000
+    start = pd.Series(pd.Timestamp("2025-03-01") + pd.to_timedelta(rng.integers(0, 7 * 86400, n), unit="s"))
+    start[rng.random(n) < 0.01] = pd.NaT
+    hours = pd.Series(np.round(rng.gamma(2, 2, n), 2))
+    hours[rng.random(n) < 0.02] = np.nan
+    group = pd.Series(pd.Categorical(rng.choice(["A", "B", "C"], n)))
+    return start, hours, group
+
+
+@pytest.fixture(scope="module")
+def cube(rows):
+    start, hours, group = rows
+    dims = time_dims(start)
+    dims["grp"] = group
+    return build_cube({"x_Hr": (dims, hours)}, [50, 90], BIN_WIDTH)
+
+
+def reference(rows, by):
+    start, hours, group = rows
+    frame = pd.DataFrame({DATE_DIM: start.dt.normalize(), SLOT_DIM: start.dt.hour, "grp": group, "v": hours})
+    return frame.dropna().groupby(by, observed=True)["v"]
+
+
+def test_full_grain_matches_pandas(rows, cube):
+    table = cube.slice()
+    expected = reference(rows, [DATE_DIM, SLOT_DIM, "grp"])
+    assert list(table.columns) == ["measure", DATE_DIM, SLOT_DIM, "grp", "count", "mean", "min", "max", "P50", "P90"]
+    np.testing.assert_array_equal(table["count"], expected.count())
+    np.testing.assert_array_equal(table["min"], expected.min())
+    np.testing.assert_array_equal(table["max"], expected.max())
+    np.testing.assert_allclose(table["mean"], expected.mean(), atol=0.005 + 1e-9)
+    np.testing.assert_allclose(table["P50"], expected.quantile(0.5), atol=0.005 + 1e-9)
+    np.testing.assert_allclose(table["P90"], expected.quantile(0.9), atol=0.005 + 1e-9)
+    # Hour slots stay in time order
+    assert table[SLOT_DIM].cat.categories[0] == "00:00 - 01:00"
+
+
+@pytest.mark.parametrize("by", [["grp"], [DATE_DIM], []])
+def test_roll_ups(rows, cube, by):
+    table = cube.slice(by)
+    expected = reference(rows, by or (lambda _: 0))
+    np.testing.assert_array_equal(table["count"], expected.count())
+    np.testing.assert_array_equal(table["min"], expected.min())
+    np.testing.assert_array_equal(table["max"], expected.max())
+    np.testing.assert_allclose(table["mean"], expected.mean(), atol=0.005 + 1e-9)
+    # Rolled-up percentiles come from the histograms: within one bin
+    for p in (50, 90):
+        assert (abs(table[f"P{p}"].to_numpy() - expected.quantile(p / 100).to_numpy()) <= BIN_WIDTH).all()
+
+
+def test_filters(rows, cube):
+    table = cube.slice(["grp"], {"grp": ["B"]})
+    assert table["grp"].tolist() == ["B"]
+    assert table["count"].iloc[0] == reference(rows, ["grp"]).count()["B"]
+
+
+def test_bucket_counts(rows, cube):
+    start, hours, group = rows
+    table = cube.bucket_counts(["grp"]).set_index("grp")
+    kept = hours.notna() & start.notna()  # rows without a date are in no cell
+    expected = pd.crosstab(group[kept], np.floor(hours / BIN_WIDTH)[kept])
+    assert table.drop(columns="measure").to_numpy().sum() == kept.sum()
+    np.testing.assert_array_equal(table.drop(columns="measure").to_numpy(), expected.to_numpy())
+    assert table.columns[1] == "0–0.5"
+
+
+def test_concat_of_parts_matches_whole(rows, cube):
+    start, hours, group = rows
+    parts = []
+    for i in range(0, len(start), 12_000):
+        dims = time_dims(start.iloc[i:i + 12_000])
+        dims["grp"] = group.iloc[i:i + 12_000]
+        parts.append(build_cube({"x_Hr": (dims, hours.iloc[i:i + 12_000])}, [50, 90], BIN_WIDTH))
+    merged = SummaryCube.concat(parts)
+    assert not merged.exact
+    whole, combined = cube.slice(["grp"]), merged.slice(["grp"])
+    pd.testing.assert_frame_equal(whole.drop(columns=["P50", "P90"]), combined.drop(columns=["P50", "P90"]),
+                                  check_dtype=False, check_categorical=False)
+    np.testing.assert_allclose(combined["P90"], whole["P90"], atol=1e-9)
+
+
+def test_count_only_measures():
+    df = pd.DataFrame({"ts": pd.to_datetime(["2025-01-01 08:10", "2025-01-01 08:50", "2025-01-02 23:00", None])})
+    df["ts_Date"] = df["ts"].dt.normalize()
+    df["ts_Hour_Slot"] = time_dims(df["ts"])[SLOT_DIM]
+    cube = build_cube(split_measures(df, ["ts"]))
+    table = cube.slice()
+    assert list(table.columns) == ["measure", DATE_DIM, SLOT_DIM, "count"]
+    assert table["count"].tolist() == [2, 1]
+    assert SummaryCube.concat([cube, cube]).slice([])["count"].tolist() == [6]
+
+
+def test_mismatched_dimensions_rejected(rows):
+    start, hours, group = rows
+    with pytest.raises(ValueError):
+        build_cube({"a": (time_dims(start), hours), "b": ({**time_dims(start), "grp": group}, hours)})
+    with pytest.raises(ValueError):
+        build_cube({})
+
+
+def test_export_round_trip(cube):
+    table = cube.slice(["grp"])
+    assert pd.read_parquet(io.BytesIO(export_bytes(table, "parquet")))["count"].tolist() == table["count"].tolist()
+    assert pd.read_excel(io.BytesIO(export_bytes(table, "xlsx")))["count"].tolist() == table["count"].tolist()
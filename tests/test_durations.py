@@ -0,0 +1,90 @@
+"""The vectorized durations must match the apps' original per-row code bit for bit."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from dateconverts.durations import DURATION_UNITS, compute_duration, to_60min_format
+
+
+def convert_to_60min_format(x):
+    """The original per-row conversion of app1.py / app2.py."""
+    if pd.isna(x):
+        return None
+    hrs = int(x)
+    mins = round((x - hrs) * 60)
+    return round(hrs + mins / 100, 2)
+
+
+def legacy_hhmm(diff_hours):
+    """What the apps stored in an ``_Hr`` column: per-row conversion, then ``round(2)``."""
+    return pd.Series(diff_hours).apply(convert_to_60min_format).round(2)
+
+
+def assert_bitwise_equal(actual, expected):
+    actual = np.asarray(actual, dtype="float64")
+    expected = np.asarray(expected, dtype="float64")
+    nan = np.isnan(expected)
+    np.testing.assert_array_equal(np.isnan(actual), nan)
+    np.testing.assert_array_equal(actual[~nan].view("int64"), expected[~nan].view("int64"))
+
+
+def boundary_hours():
+    """Values whose minutes sit on or next to a .5 rounding boundary, and minutes that round to 60."""
+    hours = np.arange(-3, 4, dtype="float64")
+    minutes = np.arange(60) + 0.5
+    exact = (hours[:, None] + np.sign(hours[:, None] + 0.5) * minutes[None, :] / 60).ravel()
+    return np.concatenate([
+        exact, np.nextafter(exact, np.inf), np.nextafter(exact, -np.inf),
+        hours + 59.6 / 60, hours - 59.6 / 60, hours + 0.999999,
+    ])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_hours_match_legacy(seed):
+    rng = np.random.default_rng(seed)
+    hours = rng.uniform(-48, 48, 20_000)
+    hours[rng.random(hours.size) < 0.05] = np.nan
+    assert_bitwise_equal(to_60min_format(hours), legacy_hhmm(hours))
+
+
+def test_rounding_boundaries_match_legacy():
+    hours = boundary_hours()
+    assert_bitwise_equal(to_60min_format(hours), legacy_hhmm(hours))
+
+
+def test_special_values_match_legacy():
+    hours = np.array([np.nan, 0.0, -0.0, -1e-9, 1e-9, -0.5, -1.25, 0.5, 1.0, 23.99, -23.99, 1e6, -1e6])
+    result = to_60min_format(hours)
+    assert_bitwise_equal(result, legacy_hhmm(hours))
+    # -0.0 comes out as +0.0, as the legacy int()/round() did
+    assert not np.signbit(result[2])
+
+
+def test_series_keeps_index_and_name():
+    hours = pd.Series([1.5, np.nan], index=[10, 20], name="x")
+    result = to_60min_format(hours)
+    assert list(result.index) == [10, 20] and result.name == "x"
+    assert_bitwise_equal(result, legacy_hhmm(hours))
+
+
+def test_compute_duration_matches_legacy_pipeline():
+    rng = np.random.default_rng(1)
+    start = pd.Series(pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 10**7, 5000), unit="s"))
+    end = start + pd.to_timedelta(rng.integers(-10**5, 10**5, 5000), unit="s")
+    end[rng.random(5000) < 0.05] = pd.NaT
+    diff_hours = (end - start).dt.total_seconds() / 3600
+    assert_bitwise_equal(compute_duration(start, end), legacy_hhmm(diff_hours))
+    np.testing.assert_array_equal(compute_duration(start, end, "hours"), diff_hours)
+    np.testing.assert_array_equal(compute_duration(start, end, "minutes"), (end - start).dt.total_seconds() / 60)
+
+
+def test_compute_duration_units():
+    start = pd.Series(pd.to_datetime(["2025-01-01 08:00"]))
+    end = pd.Series(pd.to_datetime(["2025-01-01 12:30"]))
+    assert compute_duration(start, end, "hhmm")[0] == 4.3
+    assert compute_duration(start, end, "hours")[0] == 4.5
+    assert compute_duration(start, end, "minutes")[0] == 270
+    assert compute_duration(start, end, "timedelta")[0] == pd.Timedelta(hours=4, minutes=30)
+    with pytest.raises(ValueError):
+        compute_duration(start, end, "days")
+    assert "days" not in DURATION_UNITS
@@ -0,0 +1,67 @@
+"""Export formats when pyarrow is missing, and the export file cache."""
+import importlib
+import importlib.util
+import os
+
+import pandas as pd
+import pytest
+
+from dateconverts import export, pipeline
+
+
+@pytest.fixture
+def without_pyarrow(monkeypatch):
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, "find_spec",
+                        lambda name, *args: None if name == "pyarrow" else find_spec(name, *args))
+    yield importlib.reload(export)
+    monkeypatch.undo()
+    importlib.reload(export)
+
+
+def test_parquet_is_offered_with_pyarrow():
+    assert "parquet" in export.EXPORT_FORMATS
+
+
+def test_parquet_is_not_offered_without_pyarrow(without_pyarrow, tmp_path):
+    assert list(without_pyarrow.EXPORT_FORMATS) == ["csv", "csv.gz", "xlsx"]
+    with pytest.raises(ValueError, match="pyarrow"):
+        without_pyarrow.write_export(pd.DataFrame({"a": [1]}), "parquet", str(tmp_path / "out.parquet"))
+
+
+def test_job_spec_rejects_unknown_output_format():
+    with pytest.raises(ValueError, match="output_format"):
+        pipeline.JobSpec.from_dict({"output_format": "xls"})
+    assert pipeline.JobSpec.from_dict({"output_format": "csv.gz"}).output_format == "csv.gz"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_export_files_are_kept_by_age_and_size(tmp_path):
+    clock = FakeClock()
+    df = pd.DataFrame({"x": range(1000)})
+    size = len(export.export_bytes(df, "csv"))
+    cache = export.ExportCache(max_bytes=3 * size, ttl_seconds=60, directory=str(tmp_path), clock=clock)
+    first = cache.export(df, "session-a", "csv")
+    # Many small exports of other sessions don't push it out while it fits
+    for i in range(20):
+        clock.now += 1
+        cache.export(df.head(10), f"other-{i}", "csv")
+    assert cache.get("session-a", "csv") == first
+    # Over the size budget the least recently used files go first
+    clock.now += 1
+    cache.export(df, "session-b", "csv")
+    cache.export(df, "session-c", "csv")
+    assert cache.get("other-0", "csv") is None and cache.get("session-a", "csv") == first
+    assert cache.total <= 3 * size
+    # Unused files expire; the one looked up is kept
+    clock.now += 61
+    assert cache.get("session-b", "csv") is not None
+    assert cache.get("session-a", "csv") is None and cache.get("session-c", "csv") is None
+    assert sorted(os.listdir(tmp_path)) == ["session-b.csv"]
@@ -0,0 +1,74 @@
+"""Variant HTML: escaped names and fields, one separate block per model."""
+import io
+import re
+import zipfile
+
+from dateconverts.catalog import model_filename, write_model_zip
+from dateconverts.variants import parse_line, render_variant_file, render_variant_html, write_variant_html
+
+NASTY = ('Tata <script>alert("x")</script> & Co', '1<2', 'a&b kWh', '"9" km', '')
+
+
+def _items(html):
+    return re.findall(r'<div class="variant-item">\s*<span>(.*?)</span>\s*<span>(.*?)</span>', html, re.DOTALL)
+
+
+def test_names_and_fields_are_escaped():
+    html = render_variant_html([NASTY])
+    assert "<script>" not in html and 'alert("x")' not in html
+    (name, fields), = _items(html)
+    assert name == "Tata &lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt; &amp; Co"
+    assert fields == "₹1&lt;2 Lakh | a&amp;b kWh | &quot;9&quot; km"
+
+
+def test_parsed_lines_are_escaped():
+    line = 'Kia <b>EV6</b> "GT" & More (Electric)Rs.60.97 Lakh*, 84 kWh, 663 km, 320 bhp'
+    html = render_variant_html([parse_line(line)])
+    (name, fields), = _items(html)
+    assert name == "Kia &lt;b&gt;EV6&lt;/b&gt; &quot;GT&quot; &amp; More (Electric)"
+    assert fields == "₹60.97 Lakh | 84 kWh | 663 km"
+
+
+VARIANTS = [
+    ("Tata Nexon EV Creative 45", "13.99", "45 kWh", "489 km", "148 bhp"),
+    ("Mahindra XEV 9e Pack One", "21.90", "59 kWh", "542 km", "228 bhp"),
+    ("Tata Nexon EV Empowered", "16.99", "45 kWh", "489 km", "148 bhp"),
+    ("MG <Windsor> EV Exclusive", "13.50", "38 kWh", "332 km", "134 bhp"),
+]
+
+
+def _blocks(html):
+    return html.split("\n\n<div class=\"variant-toggle\">")
+
+
+def test_one_closed_block_per_model():
+    html = render_variant_html(VARIANTS, by_model=True)
+    blocks = _blocks(html)
+    assert len(blocks) == 3
+    counts = [re.search(r"(\d+) Variants Available", block).group(1) for block in blocks]
+    assert counts == ["2", "1", "1"]
+    # Every block closes its own content before the next one starts
+    for block in blocks:
+        assert block.count('<div class="variant-content">') == 1 and block.endswith("</div>")
+    assert [name for name, _ in _items(blocks[0])] == ["Tata Nexon EV Creative 45", "Tata Nexon EV Empowered"]
+    assert "&lt;Windsor&gt;" in blocks[2]
+    # Without by_model everything is one block
+    assert len(_blocks(render_variant_html(VARIANTS))) == 1
+
+
+def test_streamed_file_matches_the_string():
+    out = io.StringIO()
+    assert write_variant_html(out, VARIANTS, by_model=True) == 3
+    assert render_variant_file(VARIANTS, by_model=True).read() == out.getvalue().encode("utf-8")
+
+
+def test_model_zip_keeps_models_apart():
+    out = io.BytesIO()
+    assert write_model_zip(out, VARIANTS) == 3
+    with zipfile.ZipFile(out) as archive:
+        names = archive.namelist()
+        assert names == ["Tata_Nexon_EV.html", "Mahindra_XEV_9e.html", "MG_Windsor_EV.html"]
+        windsor = archive.read("MG_Windsor_EV.html").decode("utf-8")
+    assert "&lt;Windsor&gt;" in windsor and "Tata" not in windsor
+    used = set()
+    assert [model_filename(m, used) for m in ("../x", "../x", "<>")] == ["x.html", "x_2.html", "variants.html"]
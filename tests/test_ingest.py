@@ -0,0 +1,137 @@
+"""The projected workbook reader (``read_columns``) against a full ``read_excel``."""
+import datetime
+import io
+import re
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from dateconverts.compact import compact_frame
+from dateconverts.ingest import parse_upload, read_columns, upload_columns
+
+
+class FakeUpload(io.BytesIO):
+    """Stands in for Streamlit's UploadedFile."""
+
+    def __init__(self, data, name="book.xlsx"):
+        super().__init__(data)
+        self.name = name
+
+
+def _workbook(rows, cells=()):
+    """XLSX bytes with ``rows`` appended from row 1 and extra ``cells`` ({"D9": value})."""
+    book = Workbook()
+    sheet = book.active
+    for row in rows:
+        sheet.append(row)
+    for ref, value in dict(cells).items():
+        sheet[ref] = value
+    out = io.BytesIO()
+    book.save(out)
+    return out.getvalue()
+
+
+def _with_dimension(data, ref):
+    """Rewrite the stored sheet dimension (``None`` removes it, as some writers do)."""
+    out = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(data)) as src, zipfile.ZipFile(out, "w") as dst:
+        for item in src.infolist():
+            content = src.read(item.filename)
+            if item.filename == "xl/worksheets/sheet1.xml":
+                dimension = b"" if ref is None else f'<dimension ref="{ref}" />'.encode()
+                content = re.sub(rb"<dimension [^>]*/>", dimension, content)
+            dst.writestr(item, content)
+    return out.getvalue()
+
+
+WORKBOOKS = {
+    "plain": _workbook([["a", "b", "c"], [1, "x", 1.5], [2, "y", 2.5]]),
+    "blank first row": _workbook([[None], ["a", "b"], [1, "x"]], {"C3": 3}),
+    "blank first row only": _workbook([], {"A2": 1, "B3": "x", "C4": 2.5}),
+    "missing values": _workbook([
+        ["code", "label", "amount", "when"],
+        ["NA", "N/A", 1.5, datetime.datetime(2026, 1, 2, 3, 4)],
+        ["12", "null", "NaN", None],
+        [None, "", "#N/A", "n/a"],
+        ["7", "ok", 3, "2026-01-03 04:05"],
+    ]),
+    "short header": _workbook([["a"], [1, 2, None, 4], [None, None, "z"]]),
+    "blank and trailing rows": _workbook(
+        [["a", "b", "c"], [1, None, None], [None, None, None], [None, None, "only c"], [2, "y", None]],
+        {"A9": None, "C12": ""}),
+    "duplicates and numbers": _workbook([["dup", "dup", 2026, None, "dup"], [1, 2, 3, 4, 5], [True, False, 1.0, "t", 2]]),
+    "header only": _workbook([["a", "b"]]),
+    "errors": _workbook([["a", "b"], ["#DIV/0!", 1], ["#N/A", 2], ["ok", 3]]),
+}
+# Sheets whose stored dimension is missing or wrong
+WORKBOOKS["unsized"] = _with_dimension(WORKBOOKS["short header"], None)
+WORKBOOKS["unsized blank first row"] = _with_dimension(WORKBOOKS["blank first row"], None)
+
+
+def _upload(name):
+    return FakeUpload(WORKBOOKS[name])
+
+
+def _assert_same(got, expected):
+    # Labels of mixed types (``2026`` next to ``dup``) are compared by value
+    pd.testing.assert_frame_equal(got, expected, check_column_type=False)
+
+
+@pytest.mark.parametrize("name", WORKBOOKS)
+def test_header_matches_read_excel(name):
+    expected = pd.read_excel(io.BytesIO(WORKBOOKS[name]))
+    assert upload_columns(_upload(name)) == list(expected.columns)
+
+
+@pytest.mark.parametrize("name", WORKBOOKS)
+def test_projected_columns_match_read_excel(name):
+    full = parse_upload(_upload(name))
+    columns = list(full.columns)
+    for column in columns:
+        _assert_same(read_columns(_upload(name), [column]), full[[column]])
+    # Several columns at once, in another order than the sheet's
+    picked = columns[::-1][:3]
+    if picked:
+        _assert_same(read_columns(_upload(name), picked), full[picked])
+
+
+def test_missing_values_are_nan():
+    df = read_columns(_upload("missing values"), ["code", "label", "amount"])
+    assert df["code"].isna().tolist() == [True, False, True, False]
+    assert df["label"].isna().tolist() == [True, True, True, False]
+    assert df["amount"].isna().tolist() == [False, True, True, False]
+    # Numeric text is typed like read_excel types it
+    expected = compact_frame(pd.read_excel(io.BytesIO(WORKBOOKS["missing values"]), usecols=[0]))
+    assert df["code"].dtype == expected["code"].dtype
+
+
+def test_blank_first_row_gives_unnamed_columns():
+    assert upload_columns(_upload("blank first row")) == ["Unnamed: 0", "Unnamed: 1", "Unnamed: 2"]
+    df = read_columns(_upload("blank first row"), ["Unnamed: 2", "Unnamed: 0"])
+    # The real header row is the first data row, as with read_excel
+    assert df["Unnamed: 0"].tolist() == ["a", 1]
+    assert np.isnan(df["Unnamed: 2"].iloc[0]) and df["Unnamed: 2"].iloc[1] == 3
+
+
+def test_unknown_column_is_an_error():
+    with pytest.raises(KeyError):
+        read_columns(_upload("plain"), ["nope"])
+
+
+def test_error_cells_are_nan():
+    df = read_columns(_upload("errors"), ["a"])
+    assert df["a"].isna().tolist() == [True, True, False]
+
+
+@pytest.mark.parametrize("ref, stored_width", [("A1:B3", 2), ("A1:F3", 6)])
+def test_wrong_dimension_is_corrected_by_projection(ref, stored_width):
+    data = _with_dimension(WORKBOOKS["short header"], ref)
+    upload = FakeUpload(data)
+    # The header phase trusts the stored dimension...
+    assert len(upload_columns(upload)) == stored_width
+    # ...and the projection pass replaces it with the exact names
+    read_columns(upload, ["a"])
+    assert upload_columns(upload) == list(pd.read_excel(io.BytesIO(data)).columns)
@@ -0,0 +1,83 @@
+"""Stage records of the profiler, timed with an injected clock."""
+import json
+
+import pytest
+
+from dateconverts.instrument import Profiler
+
+
+class Clock:
+    """Advances by ``step`` seconds on every reading."""
+
+    def __init__(self, step=0.5):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+def test_stage_time_and_rows():
+    profiler = Profiler(clock=Clock(step=2.0))
+    with profiler.stage("parse", rows=1000):
+        pass
+    with profiler.stage("export") as stage:
+        stage.rows = 300
+    parse, export = profiler.records
+    assert (parse["stage"], parse["status"], parse["seconds"], parse["rows"]) == ("parse", "ok", 2.0, 1000)
+    assert parse["rows_per_sec"] == 500
+    assert export["rows"] == 300 and export["rows_per_sec"] == 150
+
+
+def test_nested_stages():
+    profiler = Profiler(clock=Clock(step=1.0))
+    with profiler.stage("outer", rows=10):
+        with profiler.stage("inner", rows=5):
+            pass
+    inner, outer = profiler.records
+    # Readings: outer start 1, inner 2..3, outer end 4
+    assert (inner["stage"], inner["seconds"]) == ("inner", 1.0)
+    assert (outer["stage"], outer["seconds"]) == ("outer", 3.0)
+
+
+def test_failed_stage_is_recorded_and_raises():
+    profiler = Profiler(clock=Clock())
+    with pytest.raises(ValueError):
+        with profiler.stage("bad"):
+            raise ValueError("boom")
+    record, = profiler.records
+    assert record["status"] == "error" and record["rows"] is None and record["rows_per_sec"] is None
+
+
+def test_context_log_and_json(tmp_path):
+    log = tmp_path / "timings.jsonl"
+    profiler = Profiler(clock=Clock(), log_path=str(log), context={"input": "a.csv"}, max_records=2)
+    for name in ("a", "b", "c"):
+        with profiler.stage(name, rows=1):
+            pass
+    # Only the newest records are kept in memory; the log has them all
+    assert [r["stage"] for r in profiler.records] == ["b", "c"]
+    logged = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [r["stage"] for r in logged] == ["a", "b", "c"] and all(r["input"] == "a.csv" for r in logged)
+    assert json.loads(profiler.to_json()) == list(profiler.records)
+    profiler.clear()
+    assert not profiler.records
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler(enabled=False, clock=lambda: pytest.fail("clock read while disabled"))
+    with profiler.stage("parse", rows=10) as stage:
+        stage.rows = 20
+    assert not profiler.records and stage.rows is None
+
+
+def test_traced_memory_only_in_the_outer_stage():
+    profiler = Profiler(clock=Clock(), trace_memory=True)
+    with profiler.stage("outer"):
+        with profiler.stage("inner"):
+            blob = bytearray(2 * 2**20)
+        del blob
+    inner, outer = profiler.records
+    assert inner["traced_peak_mb"] is None
+    assert outer["traced_peak_mb"] >= 2
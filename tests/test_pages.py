@@ -0,0 +1,154 @@
+"""Page-level tests of the multipage app (streamlit_app.py) with Streamlit's AppTest."""
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeUpload(io.BytesIO):
+    """Stands in for Streamlit's UploadedFile (AppTest can't upload files)."""
+
+    def __init__(self, data, name, file_id):
+        super().__init__(data)
+        self.name = name
+        self.file_id = file_id
+
+
+@pytest.fixture
+def shared_upload(monkeypatch):
+    rng = np.random.default_rng(0)
+    start = pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 5 * 86400, 500), unit="s")
+    end = start + pd.to_timedelta(rng.integers(0, 36000, 500), unit="s")
+    data = pd.DataFrame({
+        "grp": rng.choice(["A", "B"], 500),
+        "start": start.strftime("%Y-%m-%d %H:%M"),
+        "end": end.strftime("%Y-%m-%d %H:%M"),
+    }).to_csv(index=False).encode()
+    monkeypatch.setattr(st, "file_uploader", lambda *args, **kwargs: FakeUpload(data, "shared.csv", "pages-test"))
+
+
+def _app():
+    at = AppTest.from_file(os.path.join(ROOT, "streamlit_app.py"), default_timeout=60)
+    at.run()
+    return at
+
+
+def _check(at, label_part):
+    for checkbox in at.checkbox:
+        if label_part in checkbox.label:
+            checkbox.check()
+
+
+def _calculate_hours(at):
+    at.selectbox(key="start_0").set_value("start")
+    at.selectbox(key="end_0").set_value("end")
+    _check(at, "summary cube")
+    at.run()
+    next(b for b in at.button if "Calculate" in b.label).click()
+    at.run()
+    for _ in range(100):
+        if at.success or at.warning or at.error:
+            return
+        time.sleep(0.1)
+        at.run()
+
+
+def test_summary_cubes_of_both_pages_coexist(shared_upload):
+    at = _app()
+    assert not at.exception
+
+    # Splitter page: row-count cube of the split column
+    at.switch_page("app.py")
+    at.run()
+    at.multiselect[0].set_value(["start"])
+    _check(at, "summary cube")
+    at.run()
+    assert not at.exception
+    assert any("Summary cube" in m.value for m in at.markdown)
+
+    # Hour page, same upload: must not pick up the splitter's cube
+    at.switch_page("app2.py")
+    at.run()
+    assert not at.exception
+    _calculate_hours(at)
+    assert not at.exception
+    assert any("Summary cube built" in s.value for s in at.success)
+
+    # And back: the splitter's cube is still its own
+    at.switch_page("app.py")
+    at.run()
+    at.multiselect[0].set_value(["start"])
+    _check(at, "summary cube")
+    at.run()
+    assert not at.exception
+    assert any("Summary cube" in m.value for m in at.markdown)
+
+
+def test_variant_pages_do_not_need_the_data_pages(shared_upload):
+    at = _app()
+    for page in ("variant.py", "variant_app.py"):
+        at.switch_page(page)
+        at.run()
+        assert not at.exception
+
+
+def _csv_download(at):
+    return [b for b in at.get("download_button") if "converted CSV" in b.label]
+
+
+def test_splitter_reruns_reuse_the_split(shared_upload, monkeypatch):
+    from dateconverts import splitter
+
+    calls = []
+    split = splitter.split_datetime_columns
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return split(*args, **kwargs)
+
+    monkeypatch.setattr(splitter, "split_datetime_columns", counted)
+    at = _app()
+    at.switch_page("app.py")
+    at.run()
+    at.multiselect[0].set_value(["start"])
+    _check(at, "summary cube")
+    at.run()
+    assert len(calls) == 1
+    assert not _csv_download(at)
+
+    # Re-slicing the cube and preparing the download don't split again
+    at.multiselect(key="split_cube_by").set_value(at.multiselect(key="split_cube_by").value[:1])
+    at.run()
+    next(b for b in at.button if "Prepare Download" in b.label).click()
+    at.run()
+    assert not at.exception
+    assert len(calls) == 1
+    assert _csv_download(at)
+
+    # Another option does
+    _check(at, "Delete original")
+    at.run()
+    assert len(calls) == 2 and not _csv_download(at)
+
+
+def test_variant_pages_share_the_catalog_panel(monkeypatch):
+    data = ("Tata Nexon EV Creative 45 (Electric)Rs.13.99 Lakh*, 45 kWh, 489 km\n"
+            "Mahindra XEV 9e Pack One (Electric)Rs.21.90 Lakh*, 59 kWh, 542 km\n"
+            "no price here\n").encode()
+    monkeypatch.setattr(st, "file_uploader", lambda *args, **kwargs: FakeUpload(data, "catalog.txt", "catalog-test"))
+    at = _app()
+    for page in ("variant.py", "variant_app.py"):
+        at.switch_page(page)
+        at.run()
+        next(b for b in at.button if "Per-Model ZIP" in b.label).click()
+        at.run()
+        assert not at.exception
+        assert [s.value for s in at.success] == ["Parsed 3 variants into 3 models"]
+        assert [w.value for w in at.warning] == ["1 lines are missing a name or price"]
@@ -0,0 +1,164 @@
+"""Datetime parsing: inferred text formats and numeric timestamp columns."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from dateconverts.parsing import ParseReport, infer_datetime_format, infer_numeric_format, parse_datetime
+
+def test_ambiguous_dates_follow_dayfirst():
+    values = ["05/06/2026 10:00", "01/02/2026 23:15"]
+    assert infer_datetime_format(values) == "%m/%d/%Y %H:%M"
+    assert infer_datetime_format(values, dayfirst=True) == "%d/%m/%Y %H:%M"
+    month_first, _ = parse_datetime(pd.Series(values))
+    day_first, _ = parse_datetime(pd.Series(values), dayfirst=True)
+    assert month_first[0] == pd.Timestamp("2026-05-06 10:00")
+    assert day_first[0] == pd.Timestamp("2026-06-05 10:00")
+
+
+def test_unambiguous_values_decide_the_order():
+    # 17/10 can only be day-first, so the whole column is read that way
+    values = pd.Series(["17/10/2026 14:05", "05/06/2026 10:00", "31/12/2025 00:00"])
+    parsed, report = parse_datetime(values)
+    assert report.format == "%d/%m/%Y %H:%M"
+    assert parsed.tolist() == [pd.Timestamp("2026-10-17 14:05"), pd.Timestamp("2026-06-05 10:00"),
+                               pd.Timestamp("2025-12-31")]
+
+
+def test_iso_and_seconds_and_am_pm():
+    assert infer_datetime_format(["2026-10-17T14:05:00", "2026-10-18 01:02:03"]) == "ISO8601"
+    assert infer_datetime_format(["17/10/2026 02:05 PM"], dayfirst=True) == "%d/%m/%Y %I:%M %p"
+    assert infer_datetime_format(["10/17/2026 14:05:09"]) == "%m/%d/%Y %H:%M:%S"
+
+
+def test_mixed_formats_fall_back_and_are_counted():
+    # The format is inferred from the distinct values: 20 day-first ones
+    # outvote one ISO value, which is left to the fallback
+    day_first = [f"{d:02d}/10/2026 14:05" for d in range(1, 21)]
+    values = pd.Series(day_first * 2 + ["2026-10-18T01:02:03", "not a date", None, "not a date"])
+    parsed, report = parse_datetime(values)
+    assert report.as_dict() == {
+        "column": None, "format": "%d/%m/%Y %H:%M", "rows": 44,
+        "unique_values": 22, "matched_rows": 40, "fallback_rows": 1, "failed_rows": 2,
+    }
+    assert parsed[40] == pd.Timestamp("2026-10-18 01:02:03")
+    assert parsed[41:].isna().all()
+
+
+def test_no_format_under_min_match():
+    values = ["17/10/2026 14:05", "2026-10-18", "Oct 19 2026", "19.10.2026 10:00"]
+    assert infer_datetime_format(values) is None
+    parsed, report = parse_datetime(pd.Series(values, name="when"))
+    assert report.format is None and report.column == "when"
+    assert report.matched_rows == 0 and report.fallback_rows == 4 and report.failed_rows == 0
+    assert parsed.notna().all()
+    assert infer_datetime_format([None, 3.5]) is None
+
+
+def test_forced_format_and_categorical_columns():
+    values = pd.Series(["05/06/2026 10:00", "05/06/2026 10:00", "06/07/2026 11:00"])
+    forced, report = parse_datetime(values, fmt="%d/%m/%Y %H:%M")
+    assert forced[0] == pd.Timestamp("2026-06-05 10:00") and report.matched_rows == 3
+    categorical, cat_report = parse_datetime(values.astype("category"))
+    pd.testing.assert_series_equal(categorical, parse_datetime(values)[0])
+    assert cat_report.unique_values == 2
+
+
+def test_reports_add_up_over_chunks():
+    total = ParseReport("when")
+    # Half of the first chunk is not a date, so no format is inferred for it
+    for chunk in (pd.Series(["2026-10-17", "bad"]), pd.Series(["2026-10-18", None])):
+        total.add(parse_datetime(chunk)[1])
+    assert total.format == "ISO8601"
+    assert (total.rows, total.matched_rows, total.fallback_rows, total.failed_rows) == (4, 1, 1, 1)
+
+
+STAMPS = pd.Series(pd.to_datetime([
+    "1999-12-31 23:59:59.123456789", "2026-10-17 14:05:00", "2038-01-19 03:14:07", "1975-06-01 00:00:00.5",
+], format="ISO8601")).astype("datetime64[ns]")
+
+
+def _epoch(unit):
+    # The stamps truncated to ``unit``, and their epoch values in it
+    truncated = STAMPS.dt.floor(unit)
+    return truncated, truncated.astype("int64") // pd.Timedelta(1, unit=unit).value
+
+
+@pytest.mark.parametrize("unit", ["s", "ms", "us", "ns"])
+def test_epochs_are_detected_by_range(unit):
+    expected, values = _epoch(unit)
+    parsed, report = parse_datetime(values)
+    assert report.format == f"epoch-{unit}"
+    assert report.matched_rows == len(values) and report.failed_rows == 0
+    pd.testing.assert_series_equal(parsed, expected, check_dtype=False)
+
+
+def test_excel_serials_1900():
+    serials = pd.Series([45947.5868055556, 36526.0, 25934.25])
+    parsed, report = parse_datetime(serials)
+    assert report.format == "excel-1900"
+    assert parsed.tolist() == [pd.Timestamp("2025-10-17 14:05:00"), pd.Timestamp("2000-01-01"),
+                               pd.Timestamp("1971-01-01 06:00")]
+
+
+def test_excel_serials_1904_only_when_asked_for():
+    serials = pd.Series([44485.0, 34564.5])
+    assert parse_datetime(serials)[1].format == "excel-1900"
+    parsed, report = parse_datetime(serials, numeric_format="excel-1904")
+    assert report.format == "excel-1904"
+    assert parsed.tolist() == [pd.Timestamp("2025-10-17"), pd.Timestamp("1998-08-19 12:00")]
+
+
+def test_nan_rows_stay_missing():
+    expected, values = _epoch("s")
+    values = values.astype("float64")
+    values.iloc[1] = np.nan
+    parsed, report = parse_datetime(values)
+    assert report.format == "epoch-s"
+    assert parsed.isna().tolist() == [False, True, False, False]
+    assert parsed[~parsed.isna()].tolist() == expected.drop(1).tolist()
+    # Missing values are not failures
+    assert (report.matched_rows, report.failed_rows) == (3, 0)
+
+
+@pytest.mark.parametrize("dtype", ["int32", "uint32", "Int64", "float32"])
+def test_downcast_columns(dtype):
+    expected, values = _epoch("s")
+    if dtype == "float32":
+        # float32 can't hold epoch seconds exactly; Excel serials to the day it can
+        values, expected = pd.Series([45947.0, 36526.0]), pd.Series(pd.to_datetime(["2025-10-17", "2000-01-01"]))
+    parsed, report = parse_datetime(values.astype(dtype))
+    assert report.failed_rows == 0
+    assert parsed.tolist() == expected.tolist()
+
+
+def test_nullable_ints_with_missing_values():
+    expected, values = _epoch("ms")
+    values = values.astype("Int64")
+    values.iloc[0] = pd.NA
+    parsed, report = parse_datetime(values)
+    assert report.format == "epoch-ms"
+    assert pd.isna(parsed.iloc[0])
+    assert parsed.iloc[1:].tolist() == expected.iloc[1:].tolist()
+
+
+@pytest.mark.parametrize("values", [[30, 45, 120, 600], [1, 2, 3, 4, 5], [0.5, 1.25, 7.75], [1500, 20000, 9]])
+def test_small_numbers_are_not_taken_for_dates(values):
+    assert infer_numeric_format(np.array(values)) is None
+    parsed, report = parse_datetime(pd.Series(values))
+    assert report.format is None
+    # Nothing lands in Excel's 1900-1901 either
+    assert not (parsed.dt.year < 1970).any()
+
+
+def test_asked_for_formats_read_early_dates():
+    parsed, report = parse_datetime(pd.Series([30, 61]), numeric_format="excel-1900")
+    assert report.format == "excel-1900"
+    assert parsed.tolist() == [pd.Timestamp("1900-01-29"), pd.Timestamp("1900-03-01")]
+
+
+def test_stray_values_in_an_inferred_column_are_not_dates():
+    serials = pd.Series([45947.0] * 19 + [30.0])
+    parsed, report = parse_datetime(serials)
+    assert report.format == "excel-1900"
+    assert pd.isna(parsed.iloc[-1])
+    assert report.failed_rows == 1
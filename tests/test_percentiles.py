@@ -0,0 +1,73 @@
+"""Percentile columns must match the apps' original merge-per-percentile code."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from dateconverts.percentiles import add_percentile_columns, parse_percentiles, percentile_label
+
+
+def legacy_percentiles(df, hr_columns, percentiles, group_col=None):
+    """The original Step 2 of app1.py / app2.py."""
+    for p in percentiles:
+        if group_col:
+            grouped = df.groupby(group_col)[hr_columns].quantile(p / 100).reset_index()
+            grouped[hr_columns] = grouped[hr_columns].round(2)
+            df = pd.merge(df, grouped, on=group_col, how="left", suffixes=("", f"_P{p}"))
+        else:
+            for col in hr_columns:
+                df[f"{col}_P{p}"] = round(df[col].quantile(p / 100), 2)
+    return df
+
+
+def frame(seed=0, rows=5000):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "grp": rng.choice(["A", "B", "C", None], rows),
+        "a_Hr": np.round(rng.gamma(2, 2, rows), 2),
+        "b_Hr": np.round(rng.uniform(-5, 30, rows), 2),
+    })
+    df.loc[rng.random(rows) < 0.05, "a_Hr"] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("group_col", [None, "grp"])
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_legacy(group_col, seed):
+    df = frame(seed)
+    expected = legacy_percentiles(df.copy(), ["a_Hr", "b_Hr"], [90, 95], group_col)
+    names = add_percentile_columns(df, ["a_Hr", "b_Hr"], [90, 95], group_col)
+    assert names == ["a_Hr_P90", "b_Hr_P90", "a_Hr_P95", "b_Hr_P95"]
+    for name in names:
+        np.testing.assert_array_equal(df[name].astype("float64").to_numpy(),
+                                      expected[name].astype("float64").to_numpy())
+
+
+def test_keeps_index_and_row_order():
+    df = frame().iloc[::-1].set_axis(np.arange(5000) * 3)
+    before = df.copy()
+    add_percentile_columns(df, ["a_Hr"], [50], "grp")
+    assert df.index.equals(before.index)
+    pd.testing.assert_frame_equal(df[before.columns], before)
+    # Rows without a group get no percentile
+    assert df.loc[df["grp"].isna(), "a_Hr_P50"].isna().all()
+
+
+def test_fractional_percentiles():
+    df = frame()
+    assert add_percentile_columns(df, ["a_Hr"], [99.5]) == ["a_Hr_P99.5"]
+    assert df["a_Hr_P99.5"].astype("float64").iloc[0] == round(df["a_Hr"].quantile(0.995), 2)
+
+
+def test_nothing_requested():
+    df = frame()
+    assert add_percentile_columns(df, [], [90]) == []
+    assert add_percentile_columns(df, ["a_Hr"], []) == []
+    assert list(df.columns) == ["grp", "a_Hr", "b_Hr"]
+
+
+def test_parse_percentiles():
+    assert parse_percentiles("90, 95, 99.5, 90,") == [90, 95, 99.5]
+    assert percentile_label(99.5) == "P99.5" and percentile_label(90) == "P90"
+    for bad in ("abc", "0.5", "100"):
+        with pytest.raises(ValueError):
+            parse_percentiles(bad)
@@ -0,0 +1,81 @@
+"""One calculate step for the apps' background jobs and the CLI's run_job."""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dateconverts.jobs import JobCancelled, JobRunner
+from dateconverts.pipeline import JobSpec, calculate_hours, calculate_hours_job, run_job
+
+PAIRS = [("start", "end"), ("start", "later"), ("start", "missing")]
+
+
+def _frame(rows=2000):
+    rng = np.random.default_rng(0)
+    start = pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 30 * 86400, rows), unit="s")
+    end = start + pd.to_timedelta(rng.integers(0, 20 * 3600, rows), unit="s")
+    return pd.DataFrame({
+        "group": rng.choice(["A", "B", "C"], rows),
+        "start": start.strftime("%d/%m/%Y %H:%M"),
+        "end": end.strftime("%d/%m/%Y %H:%M"),
+        "later": (end + pd.Timedelta(hours=3)).strftime("%d/%m/%Y %H:%M"),
+    })
+
+
+def test_run_job_matches_the_apps_calculation():
+    df = _frame()
+    spec = JobSpec.from_dict({"pairs": PAIRS, "percentiles": [50, 90], "group_col": "group",
+                              "bucket": True, "bucket_cap": 12})
+    app = calculate_hours(df, spec.pairs, spec.percentiles, "group", bucket=(spec.bucket_width, spec.bucket_cap))
+    assert list(df.columns) == ["group", "start", "end", "later"]  # the apps' frame is left alone
+
+    summary = run_job(df, spec)
+    pd.testing.assert_frame_equal(df, app["df"])
+    assert summary["hr_columns"] == app["hr_columns"] == ["start_to_end_Hr", "start_to_later_Hr"]
+    assert summary["bucket_columns"] == app["bucket_columns"]
+    pd.testing.assert_frame_equal(summary["bucket_summary"], app["bucket_summary"])
+    assert summary["percentile_columns"] == app["percentile_columns"]
+    assert len(summary["errors"]) == len(app["pair_errors"]) == 1
+
+
+def test_progress_reports_every_stage():
+    seen = []
+    calculate_hours(_frame(), PAIRS, [90], "group", bucket=(1.0, None), cube_slot_minutes=60,
+                    progress=lambda stage, rows, done, total: seen.append((stage, rows, done, total)))
+    stages = list(dict.fromkeys(stage for stage, *_ in seen))
+    assert stages == ["parse_datetime", "durations", "percentiles", "buckets", "bucket_histogram", "summary_cube"]
+    assert all(rows == 2000 for _, rows, _, _ in seen)
+    assert ("durations", 2000, 3, 3) in seen
+
+
+def test_cancelled_stops_at_the_next_stage():
+    stages = []
+
+    def progress(stage, rows, done, total):
+        stages.append(stage)
+
+    with pytest.raises(JobCancelled):
+        calculate_hours(_frame(), PAIRS, [90], progress=progress, cancelled=lambda: "durations" in stages)
+    assert stages[-1] == "durations"
+    assert "percentiles" not in stages
+
+
+def test_job_runner_reports_progress_and_cancels():
+    runner = JobRunner(max_workers=1)
+    release = threading.Event()
+    blocked = runner.submit("blocker", "k", lambda job: release.wait(10))
+    job = runner.submit("session", "k", calculate_hours_job, _frame(), PAIRS, [90])
+    runner.cancel("session")
+    release.set()
+    while blocked.running or job.running:
+        time.sleep(0.01)
+    assert job.status == "cancelled" and job.result is None
+
+    job = runner.submit("session", "k", calculate_hours_job, _frame(), PAIRS, [90], "group")
+    while job.running:
+        time.sleep(0.01)
+    assert job.status == "done"
+    assert job.stage == "percentiles" and job.rows_done == job.rows_total == 2000
+    assert job.result["hr_columns"] == ["start_to_end_Hr", "start_to_later_Hr"]
@@ -0,0 +1,83 @@
+"""The shared process pool and the text-column parsing that uses it."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from dateconverts import parsing, scheduler
+from dateconverts.parsing import parse_columns
+
+
+def _fails_on_three(x):
+    if x == 3:
+        raise ValueError("three")
+    return x * 2
+
+
+@pytest.fixture
+def two_processes(monkeypatch):
+    # Use the pool even on a single-core machine
+    monkeypatch.setenv("DATECONVERTS_PROCESS_WORKERS", "2")
+    monkeypatch.setattr(parsing, "PROCESS_MIN_VALUES", 0)
+
+
+def test_process_pool_is_kept_and_does_not_fork(two_processes):
+    first = scheduler.run_tasks(_fails_on_three, range(6), workers=2, processes=True)
+    pool = scheduler.process_pool()
+    second = scheduler.run_tasks(_fails_on_three, range(6), workers=2, processes=True)
+    assert scheduler.process_pool() is pool
+    assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+    for outcomes in (first, second):
+        assert [result for result, _ in outcomes] == [0, 2, 4, None, 8, 10]
+        assert isinstance(outcomes[3][1], ValueError)
+
+
+def test_progress_can_cancel(two_processes):
+    seen = []
+
+    def progress(done, total):
+        seen.append(done)
+        if done == 2:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        scheduler.run_tasks(_fails_on_three, range(20), workers=2, processes=True, progress=progress)
+    assert seen == [1, 2]
+
+
+def test_workers_are_capped_by_the_pool(monkeypatch):
+    monkeypatch.setenv("DATECONVERTS_PROCESS_WORKERS", "1")
+    monkeypatch.setattr(scheduler, "process_pool", lambda: pytest.fail("pool used with one process"))
+    assert scheduler.run_tasks(_fails_on_three, [1, 2], workers=4, processes=True) == [(2, None), (4, None)]
+
+
+def _frame():
+    rng = np.random.default_rng(0)
+    stamps = pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 10**6, 5000), unit="min")
+    df = pd.DataFrame({
+        "dmy": stamps.strftime("%d/%m/%Y %H:%M"),
+        "iso": stamps.strftime("%Y-%m-%d %H:%M:%S"),
+        "mixed": stamps.strftime("%d/%m/%Y %H:%M"),
+        "epoch": stamps.astype("int64") // 10**9,
+    })
+    df.loc[::7, "dmy"] = None
+    df.loc[3, "mixed"] = "2026-01-02T03:04:05"
+    df.loc[4, "mixed"] = "not a date"
+    return df
+
+
+def test_pooled_parsing_matches_in_process(two_processes):
+    df = _frame()
+    columns = ["dmy", "iso", "mixed", "epoch", "nope"]
+    serial = parse_columns(df, columns, workers=1)
+    pooled = parse_columns(df, columns, workers=2)
+    assert list(pooled) == columns
+    for col in columns[:-1]:
+        (parsed, report), error = pooled[col]
+        assert error is None
+        pd.testing.assert_series_equal(parsed, serial[col][0][0])
+        assert report == serial[col][0][1]
+        # And the same as parsing the column on its own
+        alone, alone_report = parsing.parse_datetime(df[col])
+        pd.testing.assert_series_equal(parsed, alone)
+        assert report == alone_report
+    assert isinstance(pooled["nope"][1], KeyError)
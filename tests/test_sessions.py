@@ -0,0 +1,112 @@
+"""Session frames and finished job results under one memory cap."""
+import time
+
+import numpy as np
+import pandas as pd
+
+from dateconverts.ingest import frame_nbytes
+from dateconverts.jobs import JobRunner, ResultEvicted
+from dateconverts.sessions import SessionStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _frame(rows=1000):
+    return pd.DataFrame({"x": np.arange(rows, dtype="float64")})
+
+
+SIZE = frame_nbytes(_frame())
+
+
+def _store(frames, idle_seconds=100):
+    clock = Clock()
+    return SessionStore(max_bytes=frames * SIZE, idle_seconds=idle_seconds, clock=clock), clock
+
+
+def test_least_recently_active_session_is_evicted_first():
+    store, clock = _store(frames=3)
+    for t, token in enumerate("abc"):
+        clock.now = t
+        store.put(token, _frame())
+    clock.now = 10
+    store.touch("a")  # now b is the least recently active
+    assert store.put("d", _frame()) == ["b"]
+    assert store.total == 3 * SIZE and len(store) == 3
+    assert store.get("b") is None and store.get("a") is not None
+    assert store.was_evicted("b") and not store.was_evicted("b")  # told once
+    assert not store.was_evicted("a")
+
+
+def test_idle_sessions_go_before_recent_ones():
+    store, clock = _store(frames=10, idle_seconds=5)
+    store.put("idle", _frame())
+    clock.now = 3
+    store.put("recent", _frame())
+    clock.now = 7
+    # Under the cap, but "idle" has not been seen for 7 s
+    store.touch("recent")
+    assert store.get("idle") is None and store.get("recent") is not None
+
+
+def test_served_session_is_kept_even_over_the_cap():
+    store, _ = _store(frames=1)
+    store.put("a", _frame())
+    assert store.put("big", _frame(5000)) == ["a"]
+    assert store.get("big") is not None and store.total == store.usage("big") > store.max_bytes
+
+
+def test_put_again_remeasures():
+    store, _ = _store(frames=10)
+    df = _frame()
+    store.put("a", df)
+    df["y"] = df["x"]
+    store.put("a", df)
+    assert store.usage("a") == store.total == frame_nbytes(df)
+    store.put("a", None)
+    assert store.total == 0 and len(store) == 0
+
+
+def _finish(runner, token, fn):
+    job = runner.submit(token, "k", fn)
+    while job.running:
+        time.sleep(0.01)
+    return job
+
+
+def test_finished_job_results_count_against_the_cap():
+    store, _ = _store(frames=3)
+    runner = JobRunner(max_workers=1, store=store)
+    job = _finish(runner, "a", lambda job: {"df": _frame(), "hr_columns": ["x"]})
+    assert job.result is None  # held by the store until taken
+    assert store.total == SIZE
+    taken = runner.take("a")
+    assert taken.status == "done" and taken.result["hr_columns"] == ["x"]
+    assert store.total == 0 and runner.get("a") is None
+
+
+def test_evicted_job_result_is_reported():
+    store, _ = _store(frames=1)
+    runner = JobRunner(max_workers=1, store=store)
+    _finish(runner, "a", lambda job: {"df": _frame()})
+    store.put("other session", _frame())  # pushes the untaken result out
+    taken = runner.take("a")
+    assert taken.status == "failed" and isinstance(taken.error, ResultEvicted)
+    assert taken.result is None
+
+
+def test_expired_and_cancelled_results_are_released():
+    store, _ = _store(frames=10)
+    runner = JobRunner(max_workers=1, finished_ttl=0, store=store)
+    _finish(runner, "a", lambda job: {"df": _frame()})
+    assert store.total == SIZE
+    assert runner.get("a") is None and store.total == 0
+    runner = JobRunner(max_workers=1, store=store)
+    _finish(runner, "b", lambda job: {"df": _frame()})
+    runner.cancel("b")
+    assert store.total == 0
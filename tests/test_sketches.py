@@ -0,0 +1,126 @@
+"""Approximate percentile sketches: accuracy, merging, persistence and the sketch folder rules."""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dateconverts.sketches import (
+    ALL_ROWS, QuantileSketch, SketchStore, add_approx_percentile_columns, fold_and_save, load_store,
+    resolve_sketch_dir, sketch_path
+)
+
+QUANTILES = [0, 0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 1]
+
+
+def assert_within_alpha(sketch, values):
+    """Each quantile is within relative error alpha of the value at its rank."""
+    ordered = np.sort(values[~np.isnan(values)])
+    for q in QUANTILES:
+        true = ordered[int(np.floor(q * (len(ordered) - 1)))]
+        assert abs(sketch.quantile(q) - true) <= sketch.alpha * abs(true) + 1e-12, q
+
+
+@pytest.mark.parametrize("alpha", [0.001, 0.01, 0.05])
+def test_quantiles_within_relative_error(alpha):
+    rng = np.random.default_rng(0)
+    values = np.concatenate([rng.lognormal(1, 1.5, 50_000), -rng.gamma(2, 3, 5_000), np.zeros(100), [np.nan] * 10])
+    sketch = QuantileSketch(alpha).update(values)
+    assert sketch.count == 55_100
+    assert_within_alpha(sketch, values)
+
+
+def test_merge_equals_one_pass():
+    rng = np.random.default_rng(1)
+    values = rng.normal(5, 4, 30_000)
+    whole = QuantileSketch().update(values)
+    merged = QuantileSketch().update(values[:10_000]).merge(QuantileSketch().update(values[10_000:]))
+    assert merged.to_dict() == whole.to_dict()
+    with pytest.raises(ValueError):
+        merged.merge(QuantileSketch(alpha=0.05))
+
+
+def test_round_trip_and_empty():
+    sketch = QuantileSketch().update(np.array([-2.0, 0.0, 3.5]))
+    assert QuantileSketch.from_dict(sketch.to_dict()).to_dict() == sketch.to_dict()
+    assert np.isnan(QuantileSketch().quantile(0.5))
+    with pytest.raises(ValueError):
+        QuantileSketch(alpha=1)
+
+
+def test_store_groups_and_sources():
+    df = pd.DataFrame({"g": ["a", "b", "a", None], "x_Hr": [1.0, 2.0, 3.0, 4.0]})
+    store = SketchStore("x_Hr")
+    assert store.update(df, "g", source="file-1")
+    assert not store.update(df, "g", source="file-1")  # same upload is not counted twice
+    assert store.groups["a"].count == 2 and store.groups["b"].count == 1 and len(store.groups) == 2
+    names = add_approx_percentile_columns(df, {"x_Hr": store}, [50], "g")
+    assert names == ["x_Hr_P50"]
+    assert df["x_Hr_P50"].isna().tolist() == [False, False, False, True]
+
+
+def test_fold_and_save_accumulates_uploads(tmp_path):
+    df = pd.DataFrame({"x_Hr": np.arange(1, 101, dtype="float64")})
+    fold_and_save(df, ["x_Hr"], str(tmp_path), source="day-1")
+    fold_and_save(df, ["x_Hr"], str(tmp_path), source="day-2")
+    fold_and_save(df, ["x_Hr"], str(tmp_path), source="day-2")
+    store = load_store(str(tmp_path), "x_Hr")
+    assert store.groups[ALL_ROWS].count == 200 and store.sources == ["day-1", "day-2"]
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
+
+
+def test_concurrent_folds_keep_every_upload(tmp_path):
+    df = pd.DataFrame({"g": ["a", "b"] * 500, "x_Hr": np.linspace(0.5, 20, 1000)})
+    threads = [threading.Thread(target=fold_and_save, args=(df, ["x_Hr"], str(tmp_path), "g"),
+                                kwargs={"source": f"upload-{i}"}) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store = load_store(str(tmp_path), "x_Hr", "g")
+    assert sorted(store.sources) == sorted(f"upload-{i}" for i in range(8))
+    assert sum(sketch.count for sketch in store.groups.values()) == 8 * 1000
+
+
+def test_resolve_sketch_dir_stays_inside_base(tmp_path):
+    base = tmp_path / "sketches"
+    base.mkdir()
+    assert resolve_sketch_dir("", base) == str(base.resolve())
+    assert resolve_sketch_dir("team/daily", base) == str((base / "team" / "daily").resolve())
+    for bad in ("../elsewhere", "a/../../b", "..", str(tmp_path / "abs"), "/etc"):
+        with pytest.raises(ValueError):
+            resolve_sketch_dir(bad, base)
+    os.symlink(tmp_path, base / "link")
+    with pytest.raises(ValueError):
+        resolve_sketch_dir("link/escaped", base)
+
+
+def test_sketch_path_is_sanitized(tmp_path):
+    path = sketch_path(str(tmp_path), "a/../b_Hr", "g/../../x")
+    assert os.path.dirname(path) == str(tmp_path)
+
+
+def test_similar_names_get_their_own_files(tmp_path):
+    paths = {sketch_path(str(tmp_path), col, group) for col, group in [
+        ("a/b_Hr", None), ("a_b_Hr", None), ("x_Hr", "a/b"), ("x_Hr", "a_b"), ("x_Hr", None),
+    ]}
+    assert len(paths) == 5
+    slash = pd.DataFrame({"a/b": ["k"], "x_Hr": [1.0]})
+    underscore = pd.DataFrame({"a_b": ["k"], "x_Hr": [100.0]})
+    fold_and_save(slash, ["x_Hr"], str(tmp_path), "a/b")
+    fold_and_save(underscore, ["x_Hr"], str(tmp_path), "a_b")
+    assert load_store(str(tmp_path), "x_Hr", "a/b").groups["k"].count == 1
+    assert load_store(str(tmp_path), "x_Hr", "a_b").groups["k"].count == 1
+
+
+def test_numeric_groups_match_across_dtypes(tmp_path):
+    ints = pd.DataFrame({"day": [1, 2, 1], "x_Hr": [1.0, 2.0, 3.0]})
+    floats = pd.DataFrame({"day": [1.0, np.nan, 2.5], "x_Hr": [4.0, 5.0, 6.0]})
+    fold_and_save(ints, ["x_Hr"], str(tmp_path), "day", source="ints")
+    stores = fold_and_save(floats, ["x_Hr"], str(tmp_path), "day", source="floats")
+    store = stores["x_Hr"]
+    assert sorted(store.groups) == ["1", "2", "2.5"]
+    assert store.groups["1"].count == 3
+    assert store.quantile(np.int64(1), 1) == pytest.approx(4.0, rel=store.alpha)
+    assert store.quantile(1.0, 1) == store.quantile(1, 1)
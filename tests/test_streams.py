@@ -0,0 +1,115 @@
+"""Streamed output files: the managed directory and app.py's streaming mode."""
+import os
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from dateconverts import splitter
+from dateconverts.splitter import StreamOutputs
+from test_pages import ROOT, FakeUpload
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _write(path, size):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def test_unused_files_expire(tmp_path):
+    clock = Clock()
+    streams = StreamOutputs(ttl_seconds=60, directory=str(tmp_path), clock=clock)
+    old = streams.new_path()
+    clock.now += 30
+    kept = streams.new_path()
+    clock.now += 40  # old: 70 s unused, kept: 40 s
+    new = streams.new_path()
+    assert not os.path.exists(old)
+    assert os.path.exists(kept) and os.path.exists(new)
+    assert not streams.touch(old)
+
+
+def test_touch_keeps_a_file_in_use(tmp_path):
+    clock = Clock()
+    streams = StreamOutputs(ttl_seconds=60, directory=str(tmp_path), clock=clock)
+    served = streams.new_path()
+    idle = streams.new_path()
+    for _ in range(3):
+        clock.now += 45
+        assert streams.touch(served)
+    assert os.path.exists(served) and not os.path.exists(idle)
+
+
+def test_size_budget_removes_least_recently_used(tmp_path):
+    clock = Clock()
+    streams = StreamOutputs(max_bytes=250, directory=str(tmp_path), clock=clock)
+    paths = []
+    for _ in range(3):
+        paths.append(streams.new_path())
+        _write(paths[-1], 100)
+        clock.now += 1
+    assert streams.touch(paths[0])  # now the most recently used; 300 bytes > 250
+    assert [os.path.exists(p) for p in paths] == [True, False, True]
+    # A file over the budget on its own is kept while it is in use
+    big = streams.new_path()
+    _write(big, 1000)
+    assert streams.touch(big)
+    assert os.listdir(tmp_path) == [os.path.basename(big)]
+
+
+def test_discard_stays_inside_the_directory(tmp_path):
+    streams = StreamOutputs(directory=str(tmp_path / "streams"))
+    outside = tmp_path / "keep.csv"
+    outside.write_text("x")
+    streams.discard(str(outside))
+    assert outside.exists()
+    path = streams.new_path()
+    streams.discard(path)
+    streams.discard(path)
+    assert not os.path.exists(path)
+
+
+@pytest.fixture
+def streams(monkeypatch, tmp_path):
+    data = "grp,start\n" + "".join(f"A,2026-01-0{1 + i % 9} 10:{i % 60:02d}\n" for i in range(300))
+    monkeypatch.setattr(st, "file_uploader", lambda *args, **kwargs: FakeUpload(data.encode(), "big.csv", "streams"))
+    streams = StreamOutputs(directory=str(tmp_path))
+    monkeypatch.setattr(splitter, "default_streams", streams)
+    return streams
+
+
+def _stream(at, column):
+    next(c for c in at.checkbox if "Streaming mode" in c.label).check()
+    at.run()
+    at.multiselect[0].set_value([column])
+    at.run()
+    assert not at.exception
+    assert any("rows streamed" in s.value for s in at.success)
+
+
+def test_app_keeps_one_stream_file_per_session(streams):
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    at.run()
+    _stream(at, "start")
+    first = os.listdir(streams.directory)
+    assert len(first) == 1
+
+    # New parameters replace the file
+    at.multiselect[0].set_value(["start", "grp"])
+    at.run()
+    second = os.listdir(streams.directory)
+    assert len(second) == 1 and second != first
+
+    # A file cleaned up while the session was idle is converted again
+    os.remove(os.path.join(streams.directory, second[0]))
+    at.run()
+    assert not at.exception
+    assert len(os.listdir(streams.directory)) == 1
+    assert any("rows streamed" in s.value for s in at.success)
@@ -0,0 +1,99 @@
+"""The single-pattern variant parser must give the original apps' results."""
+import re
+
+from catalog_lines import generate_catalog
+from dateconverts.variants import extract_data, extract_data_basic, parse_line, parse_lines, split_lines
+
+
+def legacy_extract_data(line):
+    """extract_data of the original variant.py."""
+    if "Rs." in line or "Lakh" in line:
+        if "Rs." in line:
+            name = line.split("Rs.")[0].strip()
+        else:
+            parts = re.split(r'\d+\.?\d*\s*Lakh', line, maxsplit=1, flags=re.IGNORECASE)
+            name = parts[0].strip()
+    else:
+        name = line.strip()
+    name = name.rstrip(',*').strip()
+    name = re.sub(r'(\d+\.?\d*)\s*kw\s+', r'\1kW ', name, flags=re.IGNORECASE)
+    name = re.sub(r'(\d+\.?\d*)\s*kw\b', r'\1kW', name, flags=re.IGNORECASE)
+    price_match = re.search(r'Rs\.?\s*([\d\.]+)\s*Lakh', line, re.IGNORECASE)
+    if not price_match:
+        price_match = re.search(r'([\d\.]+)\s*Lakh', line, re.IGNORECASE)
+    price = price_match.group(1) if price_match else ""
+    battery_match = re.search(r'(\d+\.?\d*)\s*kWh', line, re.IGNORECASE)
+    battery = battery_match.group(1) + " kWh" if battery_match else ""
+    range_match = re.search(r'(\d+)\s*km', line, re.IGNORECASE)
+    range_km = range_match.group(1) + " km" if range_match else ""
+    return name, price, battery, range_km
+
+
+def legacy_extract_data_basic(line):
+    """extract_data of the original variant_app.py."""
+    if "Rs." in line:
+        parts = line.split("Rs.")
+        name = parts[0].strip()
+        details = "Rs." + parts[1]
+    else:
+        name = line.strip()
+        details = line
+    name = re.sub(r'(\d+\.?\d*)\s*kw\s+', r'\1kW ', name, flags=re.IGNORECASE)
+    price_match = re.search(r'Rs\.?\s*([\d\.]+)\s*Lakh', details, re.IGNORECASE)
+    price = price_match.group(1) if price_match else ""
+    battery_match = re.search(r'(\d+\.?\d*)\s*kWh', details, re.IGNORECASE)
+    battery = battery_match.group(1) + " kWh" if battery_match else ""
+    range_match = re.search(r'(\d+)\s*km', details, re.IGNORECASE)
+    range_km = range_match.group(1) + " km" if range_match else ""
+    return name, price, battery, range_km
+
+
+EDGE_LINES = [
+    "Mahindra XEV 9e Pack One (Electric)Rs.21.90 Lakh*, 59 kWh, 542 km, 228 bhp",
+    "Mahindra XEV 9e Pack One 7.2kw Charger (Electric)Rs.22.40 Lakh*, 59 kWh, 542 km",
+    "Tata Nexon EV 11.2 KW (Electric)Rs.17.19 Lakh*, 40.5 kWh, 465 km",
+    "Tata Punch EV Smart 3.3kw",
+    "MG Comet EV Executive 17.3 kWh, 230 km",
+    "Hyundai Creta Electric 15.99 Lakh*, 42 kWh, 390 km",
+    "Kia EV6 GT Line Rs. 60.95 Lakh, 77.4 kWh, 708 km, 321 bhp",
+    "BYD Seal Premium Rs.45.55 Lakh*",
+    "Long Range 500km Edition (Electric)Rs.30.00 Lakh*, 79 kWh, 600 km",
+    "Citroen eC3 Feel Rs.11.61 Lakh*, 29.2 kWh, 320 km, Rs.12.00 Lakh on-road",
+    "Volvo EX40 Rs.lakh*, kWh, km",
+    "Name only, no details at all*,",
+    "",
+    "   padded line Rs.9.99 Lakh*, 30 kWh, 250 km   ",
+]
+
+
+def first_mismatch(extract, legacy, lines):
+    """The first line ``extract`` parses differently from ``legacy``, with both results."""
+    for line in lines:
+        if extract(line) != legacy(line):
+            return line, extract(line), legacy(line)
+    return None
+
+
+def test_extract_data_matches_variant_py():
+    assert first_mismatch(extract_data, legacy_extract_data, EDGE_LINES + generate_catalog(1000, seed=3)) is None
+
+
+def test_extract_data_basic_matches_variant_app_py():
+    lines = EDGE_LINES + generate_catalog(1000, seed=4)
+    assert first_mismatch(extract_data_basic, legacy_extract_data_basic, lines) is None
+
+
+def test_parse_lines_is_parse_line_per_line():
+    lines = generate_catalog(500, seed=5)
+    columns = parse_lines(lines)
+    rows = [parse_line(line) for line in lines]
+    assert [tuple(values[i] for values in columns.values()) for i in range(len(lines))] == rows
+
+
+def test_bhp_is_extracted():
+    assert parse_line(EDGE_LINES[0])[4] == "228 bhp"
+    assert parse_line(EDGE_LINES[1])[4] == ""
+
+
+def test_split_lines():
+    assert split_lines("\n a \n\n b\n") == ["a", "b"]
@@ -1,84 +1,58 @@
 import streamlit as st
-import re
+
+from dateconverts.ui_common import catalog_upload_panel, profiler_panel, session_profiler
+from dateconverts.variants import (
+    PREVIEW_LINES, PREVIEW_VARIANTS, render_variant_file, render_variant_html, split_lines
+)
+from dateconverts.variants import extract_data_basic as extract_data
 
 st.set_page_config(page_title="EV Variant HTML Converter", layout="wide")
 st.title("🚗 EV Variant to HTML Code Converter")
 
+# Optional per-stage timings (sidebar)
+profiler = session_profiler()
+
 raw_data = st.text_area("Paste Variant Data Here", height=300, 
                         placeholder="Example:\nMahindra XEV 9e Pack One (Electric)Rs.21.90 Lakh*, 59 kWh, 542 km, 228 bhp")
 
-def extract_data(line):
-    # --- FULL NAME (Everything before the price) ---
-    # Split by "Rs." to separate name from details
-    if "Rs." in line:
-        parts = line.split("Rs.")
-        name = parts[0].strip()
-        details = "Rs." + parts[1]
-    else:
-        name = line.strip()
-        details = line
-    
-    # Fix kw to kW in name
-    name = re.sub(r'(\d+\.?\d*)\s*kw\s+', r'\1kW ', name, flags=re.IGNORECASE)
-    
-    # --- Extract Price ---
-    # Match patterns like "21.90 Lakh*" or "21.90 Lakh"
-    price_match = re.search(r'Rs\.?\s*([\d\.]+)\s*Lakh', details, re.IGNORECASE)
-    price = price_match.group(1) if price_match else ""
-    
-    # --- Extract Battery ---
-    # Match patterns like "59 kWh"
-    battery_match = re.search(r'(\d+\.?\d*)\s*kWh', details, re.IGNORECASE)
-    battery = battery_match.group(1) + " kWh" if battery_match else ""
-    
-    # --- Extract Range ---
-    # Match patterns like "542 km"
-    range_match = re.search(r'(\d+)\s*km', details, re.IGNORECASE)
-    range_km = range_match.group(1) + " km" if range_match else ""
-    
-    return name, price, battery, range_km
+by_model = st.checkbox("Group variants by model (one toggle block per model)", value=True)
 
 if st.button("🔄 Generate HTML Code"):
     if not raw_data.strip():
         st.warning("⚠️ Please paste some data.")
     else:
-        lines = [line.strip() for line in raw_data.strip().split("\n") if line.strip()]
+        lines = split_lines(raw_data)
         
         variant_count = len(lines)
         
-        html_output = f"""<div class="variant-toggle">
-  <span class="variant-count-text">{variant_count} Variants Available</span>
-  <span class="arrow">▼</span>
-</div>
-
-<div class="variant-content">
-"""
-        
-        for line in lines:
-            name, price, battery, range_km = extract_data(line)
-            html_output += f"""  <div class="variant-item">
-    <span>{name}</span>
-    <span>₹{price} Lakh | {battery} | {range_km}</span>
-  </div>
-
-"""
-        
-        html_output += "</div>"
+        # Each line is parsed once and reused for the HTML and the preview
+        with profiler.stage("parse_lines", len(lines)):
+            all_data = [extract_data(line) for line in lines]
+        with profiler.stage("render_html", len(all_data)):
+            html_file = render_variant_file(all_data, by_model=by_model)
         
         st.success(f"✅ Generated HTML for {variant_count} variants")
         
         # Show preview of extracted data
         st.subheader("Preview:")
-        for i, line in enumerate(lines, 1):
-            name, price, battery, range_km = extract_data(line)
+        for i, (name, price, battery, range_km) in enumerate(all_data[:PREVIEW_LINES], 1):
             st.write(f"{i}. **{name}** - ₹{price} Lakh | {battery} | {range_km}")
+        if variant_count > PREVIEW_LINES:
+            st.info(f"… {variant_count - PREVIEW_LINES} more variants not shown in the preview")
         
         st.subheader("HTML Code:")
-        st.code(html_output, language="html")
+        st.code(render_variant_html(all_data[:PREVIEW_VARIANTS], by_model=by_model), language="html")
+        if variant_count > PREVIEW_VARIANTS:
+            st.caption(f"Showing the first {PREVIEW_VARIANTS} of {variant_count} variants; the download has all of them.")
         
         st.download_button(
             "📥 Download HTML",
-            html_output,
+            html_file,
             "variants.html",
             "text/html"
         )
+
+# --- Bulk catalog files ---
+catalog_upload_panel(profiler, strict=True)
+
+profiler_panel(profiler)